@@ -5,16 +5,59 @@ import requests
 import time
 import random
 import json
+import heapq
+import logging
+import asyncio
+import itertools
+from contextvars import ContextVar
 from datetime import datetime, timedelta
 from typing import Optional, Dict, List, Any, Tuple
 import threading
 
+from utils import get_logger
+from metrics import metrics
+from tracing import span
+
+api_logger = get_logger("api")
+
+API_REQUEST_SECONDS = metrics.histogram(
+    "roblox_api_request_seconds", "Latência de cada tentativa de requisição à API do Roblox", ("endpoint",)
+)
+API_REQUESTS = metrics.counter(
+    "roblox_api_requests_total", "Requisições à API do Roblox por resultado final", ("endpoint", "result")
+)
+API_ERRORS = metrics.counter(
+    "roblox_api_errors_total", "Tentativas com erro na API do Roblox por motivo", ("endpoint", "reason")
+)
+API_CACHE_LOOKUPS = metrics.counter(
+    "roblox_api_cache_lookups_total", "Consultas ao cache de respostas da API", ("endpoint", "result")
+)
+LIMITER_WAIT_SECONDS = metrics.histogram(
+    "roblox_api_limiter_wait_seconds", "Espera no rate limiter antes de cada requisição", ("endpoint", "priority")
+)
+
+# Classes de prioridade do rate limiter (menor valor = maior prioridade)
+PRIORITY_INTERACTIVE = 0    # Comandos slash (prazo de resposta do Discord)
+PRIORITY_NOTIFICATION = 1   # Enriquecimento de notificações (badge, avatar, jogo)
+PRIORITY_BACKGROUND = 2     # Polling dos monitores
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: 'interactive',
+    PRIORITY_NOTIFICATION: 'notification',
+    PRIORITY_BACKGROUND: 'background'
+}
+
+# Prioridade da requisição atual (propagada para asyncio.to_thread via contextvars)
+request_priority: ContextVar[int] = ContextVar('request_priority', default=PRIORITY_BACKGROUND)
+
 class RateLimiter:
-    """Controla rate limiting para APIs do Roblox"""
+    """Controla rate limiting para APIs do Roblox com filas de prioridade"""
     
     def __init__(self):
         self.last_calls = {}
-        self.lock = threading.Lock()
+        self.condition = threading.Condition()
+        self.waiting = {}  # {endpoint: heap de (prioridade, sequência)}
+        self.sequence = itertools.count()
         
         # Rate limits por endpoint (calls per minute)
         self.limits = {
@@ -24,34 +67,101 @@ class RateLimiter:
             'places': 600,     # 600 calls/minute para places API
             'groups': 600      # 600 calls/minute para groups API
         }
+        
+        # Fração do limite que cada classe pode ocupar (o restante fica reservado para classes superiores)
+        self.class_share = {
+            PRIORITY_INTERACTIVE: 1.0,
+            PRIORITY_NOTIFICATION: 0.9,
+            PRIORITY_BACKGROUND: 0.8
+        }
+        
+        # Tempo de espera por classe
+        self.wait_stats = {
+            name: {'count': 0, 'total_wait': 0.0, 'max_wait': 0.0}
+            for name in PRIORITY_NAMES.values()
+        }
     
-    def wait_if_needed(self, endpoint: str):
-        """Aguarda se necessário para respeitar rate limits"""
-        with self.lock:
-            now = time.time()
-            
-            if endpoint not in self.last_calls:
-                self.last_calls[endpoint] = []
-            
-            # Limpar calls antigas (últimos 60 segundos)
-            self.last_calls[endpoint] = [
-                call_time for call_time in self.last_calls[endpoint]
-                if now - call_time < 60
-            ]
-            
-            limit = self.limits.get(endpoint, 60)
-            
-            if len(self.last_calls[endpoint]) >= limit:
-                # Calcular tempo de espera
-                oldest_call = min(self.last_calls[endpoint])
-                wait_time = 60 - (now - oldest_call) + 0.1
-                
-                if wait_time > 0:
-                    print(f"⏳ Rate limit: aguardando {wait_time:.1f}s para {endpoint}")
-                    time.sleep(wait_time)
+    def wait_if_needed(self, endpoint: str, priority: Optional[int] = None):
+        """Aguarda se necessário para respeitar rate limits, atendendo primeiro as classes mais prioritárias"""
+        if priority is None:
+            priority = request_priority.get()
+        
+        ticket = (priority, next(self.sequence))
+        started = time.monotonic()
+        announced = False
+        
+        with self.condition:
+            queue = self.waiting.setdefault(endpoint, [])
+            heapq.heappush(queue, ticket)
             
-            # Registrar esta chamada
-            self.last_calls[endpoint].append(time.time())
+            try:
+                while True:
+                    now = time.time()
+                    
+                    # Limpar calls antigas (últimos 60 segundos)
+                    calls = [
+                        call_time for call_time in self.last_calls.get(endpoint, [])
+                        if now - call_time < 60
+                    ]
+                    self.last_calls[endpoint] = calls
+                    
+                    limit = self.limits.get(endpoint, 60)
+                    allowed = max(1, int(limit * self.class_share.get(priority, 1.0)))
+                    
+                    if queue[0] == ticket and len(calls) < allowed:
+                        # Registrar esta chamada
+                        heapq.heappop(queue)
+                        calls.append(now)
+                        break
+                    
+                    if len(calls) >= allowed:
+                        # Calcular tempo até liberar uma vaga para esta classe
+                        wait_time = 60 - (now - calls[len(calls) - allowed]) + 0.1
+                        if not announced and queue[0] == ticket:
+                            api_logger.debug("⏳ Rate limit: aguardando %.1fs para %s (%s)", wait_time, endpoint, PRIORITY_NAMES.get(priority, priority))
+                            announced = True
+                    else:
+                        # Há vaga, mas uma requisição mais prioritária está na frente
+                        wait_time = 0.5
+                    
+                    self.condition.wait(timeout=max(wait_time, 0.01))
+            except BaseException:
+                if ticket in queue:
+                    queue.remove(ticket)
+                    heapq.heapify(queue)
+                raise
+            finally:
+                self.condition.notify_all()
+        
+        waited = time.monotonic() - started
+        self._record_wait(priority, waited)
+        LIMITER_WAIT_SECONDS.observe(waited, endpoint=endpoint, priority=PRIORITY_NAMES.get(priority, priority))
+    
+    def _record_wait(self, priority: int, waited: float):
+        """Registra o tempo de espera de uma classe de prioridade"""
+        stats = self.wait_stats.setdefault(PRIORITY_NAMES.get(priority, str(priority)), {'count': 0, 'total_wait': 0.0, 'max_wait': 0.0})
+        stats['count'] += 1
+        stats['total_wait'] += waited
+        stats['max_wait'] = max(stats['max_wait'], waited)
+    
+    def get_wait_stats(self) -> Dict[str, Dict[str, float]]:
+        """Retorna o tempo médio e máximo de espera por classe de prioridade"""
+        return {
+            name: {
+                'count': stats['count'],
+                'average_wait': round(stats['total_wait'] / stats['count'], 3) if stats['count'] else 0.0,
+                'max_wait': round(stats['max_wait'], 3)
+            }
+            for name, stats in self.wait_stats.items()
+        }
+
+async def call_with_priority(priority: int, func, *args, **kwargs):
+    """Executa uma função de API bloqueante em thread com a classe de prioridade indicada"""
+    token = request_priority.set(priority)
+    try:
+        return await asyncio.to_thread(func, *args, **kwargs)
+    finally:
+        request_priority.reset(token)
 
 class APIClient:
     """Cliente de API melhorado com retry logic e tratamento robusto de erros"""
@@ -79,6 +189,32 @@ class APIClient:
             'cache_hits': 0,
             'retries': 0
         }
+        
+        # Páginas por consulta paginada (para estimativa de capacidade)
+        self.page_stats = {}  # {tipo: {'requests': n, 'pages': total}}
+        # Requisições e acertos de cache por endpoint (para estimativa de capacidade)
+        self.endpoint_cache_stats = {}  # {endpoint: {'requests': n, 'hits': n}}
+    
+    def record_pages(self, kind: str, pages: int):
+        """Registra quantas páginas uma consulta paginada precisou"""
+        entry = self.page_stats.setdefault(kind, {'requests': 0, 'pages': 0})
+        entry['requests'] += 1
+        entry['pages'] += pages
+    
+    def average_pages(self, kind: str, default: float = 1.0) -> float:
+        """Média de páginas por consulta paginada observada"""
+        entry = self.page_stats.get(kind)
+        if not entry or not entry['requests']:
+            return default
+        return entry['pages'] / entry['requests']
+    
+    def cache_hit_rate(self, endpoint: Optional[str] = None) -> float:
+        """Fração de requisições atendidas pelo cache (de todos os endpoints ou de um só)"""
+        if endpoint is not None:
+            entry = self.endpoint_cache_stats.get(endpoint)
+            return entry['hits'] / entry['requests'] if entry and entry['requests'] else 0.0
+        lookups = self.stats['total_calls'] - self.stats['retries'] + self.stats['cache_hits']
+        return self.stats['cache_hits'] / lookups if lookups > 0 else 0.0
     
     def _is_cache_valid(self, key: str, ttl_minutes: int = 5) -> bool:
         """Verifica se cache é válido"""
@@ -115,15 +251,22 @@ class APIClient:
             (sucesso, dados, erro)
         """
         
+        endpoint_stats = self.endpoint_cache_stats.setdefault(endpoint, {'requests': 0, 'hits': 0})
+        endpoint_stats['requests'] += 1
+        
         # Verificar cache se habilitado
         if cache_ttl > 0:
             cache_key = f"{url}:{json.dumps(params, sort_keys=True) if params else ''}"
             if self._is_cache_valid(cache_key, cache_ttl):
                 self.stats['cache_hits'] += 1
+                endpoint_stats['hits'] += 1
+                API_CACHE_LOOKUPS.inc(endpoint=endpoint, result="hit")
                 return True, self._get_cache(cache_key), None
+            API_CACHE_LOOKUPS.inc(endpoint=endpoint, result="miss")
         
         # Rate limiting
-        self.rate_limiter.wait_if_needed(endpoint)
+        with span("rate_limiter_wait", endpoint=endpoint):
+            self.rate_limiter.wait_if_needed(endpoint)
         
         last_error = None
         
@@ -135,21 +278,29 @@ class APIClient:
                     self.stats['retries'] += 1
                     # Backoff exponencial com jitter
                     wait_time = (2 ** attempt) + random.uniform(0, 1)
-                    print(f"🔄 Retry {attempt}/{max_retries} em {wait_time:.1f}s para {url}")
+                    api_logger.debug("🔄 Retry %d/%d em %.1fs para %s", attempt, max_retries, wait_time, url)
                     time.sleep(wait_time)
                 
                 # Fazer request
-                if method.upper() == 'GET':
-                    response = self.session.get(url, params=params, timeout=timeout)
-                elif method.upper() == 'POST':
-                    response = self.session.post(url, params=params, json=json_data, timeout=timeout)
-                else:
-                    raise ValueError(f"Método HTTP não suportado: {method}")
+                request_started = time.perf_counter()
+                try:
+                    with span("http", endpoint=endpoint, attempt=attempt) as http_span:
+                        if method.upper() == 'GET':
+                            response = self.session.get(url, params=params, timeout=timeout)
+                        elif method.upper() == 'POST':
+                            response = self.session.post(url, params=params, json=json_data, timeout=timeout)
+                        else:
+                            raise ValueError(f"Método HTTP não suportado: {method}")
+                        if http_span:
+                            http_span.attrs["status"] = response.status_code
+                finally:
+                    API_REQUEST_SECONDS.observe(time.perf_counter() - request_started, endpoint=endpoint)
                 
                 # Verificar status code
                 if response.status_code == 200:
                     try:
-                        data = response.json()
+                        with span("json_decode", endpoint=endpoint):
+                            data = response.json()
                         self.stats['successful_calls'] += 1
                         
                         # Salvar no cache se habilitado
@@ -157,46 +308,55 @@ class APIClient:
                             cache_key = f"{url}:{json.dumps(params, sort_keys=True) if params else ''}"
                             self._set_cache(cache_key, data)
                         
+                        API_REQUESTS.inc(endpoint=endpoint, result="success")
                         return True, data, None
                         
                     except json.JSONDecodeError as e:
                         last_error = f"Erro ao decodificar JSON: {e}"
-                        print(f"⚠️  {last_error}")
+                        API_ERRORS.inc(endpoint=endpoint, reason="invalid_json")
+                        api_logger.warning(f"⚠️  {last_error}", {"url": url})
                         continue
                         
                 elif response.status_code == 429:  # Rate limited
                     last_error = "Rate limit atingido"
-                    print(f"⚠️  {last_error}, aguardando...")
+                    API_ERRORS.inc(endpoint=endpoint, reason="rate_limited")
+                    api_logger.warning(f"⚠️  {last_error}, aguardando...", {"url": url})
                     time.sleep(60)  # Aguardar 1 minuto
                     continue
                     
                 elif response.status_code in [500, 502, 503, 504]:  # Server errors
                     last_error = f"Erro do servidor: {response.status_code}"
-                    print(f"⚠️  {last_error}, tentando novamente...")
+                    API_ERRORS.inc(endpoint=endpoint, reason="server_error")
+                    api_logger.warning(f"⚠️  {last_error}, tentando novamente...", {"url": url})
                     continue
                     
                 else:
                     last_error = f"Status code inesperado: {response.status_code}"
+                    API_ERRORS.inc(endpoint=endpoint, reason=f"status_{response.status_code}")
                     # Para outros erros, não tentar novamente
                     break
                     
             except requests.exceptions.Timeout:
                 last_error = "Timeout na requisição"
-                print(f"⏰ {last_error}")
+                API_ERRORS.inc(endpoint=endpoint, reason="timeout")
+                api_logger.debug("⏰ %s: %s", last_error, url)
                 continue
                 
             except requests.exceptions.ConnectionError:
                 last_error = "Erro de conexão"
-                print(f"🔌 {last_error}")
+                API_ERRORS.inc(endpoint=endpoint, reason="connection")
+                api_logger.debug("🔌 %s: %s", last_error, url)
                 continue
                 
             except Exception as e:
                 last_error = f"Erro inesperado: {e}"
-                print(f"❌ {last_error}")
+                API_ERRORS.inc(endpoint=endpoint, reason="exception")
+                api_logger.warning(f"❌ {last_error}", {"url": url})
                 continue
         
         # Se chegou aqui, todas as tentativas falharam
         self.stats['failed_calls'] += 1
+        API_REQUESTS.inc(endpoint=endpoint, result="failed")
         return False, None, last_error
     
     def get_stats(self) -> Dict[str, Any]:
@@ -207,12 +367,18 @@ class APIClient:
         return {
             **self.stats,
             'success_rate': round(success_rate, 2),
-            'cache_entries': len(self.cache)
+            'limiter_wait': self.rate_limiter.get_wait_stats(),
+            'cache_entries': len(self.cache),
+            'cache_hit_rate': round(self.cache_hit_rate() * 100, 2),
+            'average_badge_pages': round(self.average_pages('badges'), 2)
         }
 
 # Instância global do cliente
 api_client = APIClient()
 
+# Máximo de grupos por chamada do endpoint de consulta múltipla
+GROUP_BATCH_SIZE = 100
+
 def get_user_badges_robust(user_id: int) -> Tuple[List[Dict], bool, Optional[str]]:
     """
     Versão robusta para obter badges do usuário
@@ -223,6 +389,7 @@ def get_user_badges_robust(user_id: int) -> Tuple[List[Dict], bool, Optional[str
         all_badges = []
         cursor = None
         error_count = 0
+        pages = 0
         max_errors = 3
         
         while True:
@@ -241,7 +408,7 @@ def get_user_badges_robust(user_id: int) -> Tuple[List[Dict], bool, Optional[str
             
             if not success:
                 error_count += 1
-                print(f"❌ Erro ao obter badges do usuário {user_id} (tentativa {error_count}): {error}")
+                api_logger.warning(f"❌ Erro ao obter badges do usuário {user_id} (tentativa {error_count}): {error}")
                 
                 if error_count >= max_errors:
                     return [], False, f"Falhou após {max_errors} tentativas: {error}"
@@ -253,12 +420,13 @@ def get_user_badges_robust(user_id: int) -> Tuple[List[Dict], bool, Optional[str
             if not data or 'data' not in data:
                 return [], False, "Resposta da API inválida"
             
+            pages += 1
             batch_badges = data.get('data', [])
             if not batch_badges:
                 break
                 
             all_badges.extend(batch_badges)
-            print(f"    🔗 API Badges: +{len(batch_badges)} badges obtidas (total: {len(all_badges)})")
+            api_logger.debug("🔗 API Badges: +%d badges obtidas (total: %d)", len(batch_badges), len(all_badges))
             
             cursor = data.get('nextPageCursor')
             if not cursor:
@@ -267,6 +435,7 @@ def get_user_badges_robust(user_id: int) -> Tuple[List[Dict], bool, Optional[str
             # Pequeno delay entre páginas para evitar rate limit
             time.sleep(0.1)
         
+        api_client.record_pages('badges', pages)
         return all_badges, True, None
         
     except Exception as e:
@@ -293,14 +462,14 @@ def get_users_presence_robust(user_ids: List[int]) -> Tuple[List[Dict], bool, Op
             return [], False, "Resposta da API inválida"
         
         presences = data.get('userPresences', [])
-        print(f"    🔗 API Presença: {len(presences)} usuários retornados")
+        api_logger.debug("🔗 API Presença: %d usuários retornados", len(presences))
         
-        # Debug detalhado
-        for presence in presences:
-            user_id = presence.get('userId')
-            status = presence.get('userPresenceType', 0)
-            status_text = {0: "Offline", 1: "Online", 2: "Em Jogo", 3: "No Studio"}.get(status, "Desconhecido")
-            print(f"    🔍 Debug: Usuário {user_id} = Status {status} ({status_text})")
+        # Debug detalhado (só percorre as presenças se o nível DEBUG estiver habilitado para a API)
+        if api_logger.isEnabledFor(logging.DEBUG):
+            for presence in presences:
+                status = presence.get('userPresenceType', 0)
+                status_text = {0: "Offline", 1: "Online", 2: "Em Jogo", 3: "No Studio"}.get(status, "Desconhecido")
+                api_logger.debug("🔍 Usuário %s = Status %s (%s)", presence.get('userId'), status, status_text)
         
         return presences, True, None
         
@@ -443,7 +612,7 @@ def get_place_info_robust(place_id: int) -> Tuple[Optional[Dict], bool, Optional
         
         place_info = data[0]
         place_name = place_info.get('name', 'Nome não encontrado')
-        print(f"    🎮 Jogo encontrado: {place_name}")
+        api_logger.debug("🎮 Jogo encontrado: %s", place_name)
         
         return place_info, True, None
         
@@ -474,6 +643,40 @@ def get_group_info_robust(group_id: int) -> Tuple[Optional[Dict], bool, Optional
     except Exception as e:
         return None, False, f"Erro inesperado: {e}"
 
+def get_groups_info_batch(group_ids: List[int]) -> Tuple[Dict[int, Dict], bool, Optional[str]]:
+    """
+    Obtém informações de vários grupos de uma vez (endpoint de consulta múltipla)
+    Returns: ({group_id: info}, sucesso, erro) - sucesso é False se algum lote falhou
+    """
+    url = "https://groups.roblox.com/v2/groups"
+    groups_info = {}
+    last_error = None
+    
+    for start in range(0, len(group_ids), GROUP_BATCH_SIZE):
+        batch = group_ids[start:start + GROUP_BATCH_SIZE]
+        try:
+            success, data, error = api_client.make_request(
+                url, 'groups', params={'groupIds': ','.join(str(group_id) for group_id in batch)},
+                max_retries=2, timeout=15
+            )
+            
+            if not success:
+                last_error = error
+                continue
+            
+            if not data or 'data' not in data:
+                last_error = "Resposta da API inválida"
+                continue
+            
+            for group in data.get('data', []):
+                if group.get('id'):
+                    groups_info[group['id']] = group
+                    
+        except Exception as e:
+            last_error = f"Erro inesperado: {e}"
+    
+    return groups_info, last_error is None, last_error
+
 def get_group_members_robust(group_id: int, limit: int = 100) -> Tuple[List[Dict], bool, Optional[str]]:
     """
     Versão robusta para obter membros do grupo
@@ -482,23 +685,16 @@ def get_group_members_robust(group_id: int, limit: int = 100) -> Tuple[List[Dict
     """
     try:
         # Primeiro obter todos os roles do grupo
-        roles_url = f"https://groups.roblox.com/v1/groups/{group_id}/roles"
-        
-        success, roles_data, error = api_client.make_request(
-            roles_url, 'groups', max_retries=2, timeout=10
-        )
+        roles, success, error = get_group_roles_robust(group_id)
         
         if not success:
             return [], False, error
         
-        if not roles_data or 'roles' not in roles_data:
-            return [], False, "Não foi possível obter roles do grupo"
-        
         all_members = []
         unique_members = {}  # Para evitar duplicatas
         
         # Iterar através de cada role
-        for role in roles_data['roles']:
+        for role in roles:
             role_id = role.get('id')
             if not role_id:
                 continue
@@ -522,7 +718,7 @@ def get_group_members_robust(group_id: int, limit: int = 100) -> Tuple[List[Dict
                 )
                 
                 if not success:
-                    print(f"Erro ao obter membros do role {role_id}: {error}")
+                    api_logger.warning(f"Erro ao obter membros do role {role_id}: {error}")
                     break
                 
                 if not data or 'data' not in data:
@@ -574,6 +770,106 @@ def get_group_members_robust(group_id: int, limit: int = 100) -> Tuple[List[Dict
     except Exception as e:
         return [], False, f"Erro inesperado: {e}"
 
+def get_group_roles_robust(group_id: int) -> Tuple[List[Dict], bool, Optional[str]]:
+    """
+    Versão robusta para obter os roles do grupo (inclui memberCount de cada role)
+    Returns: (roles, sucesso, erro)
+    """
+    try:
+        url = f"https://groups.roblox.com/v1/groups/{group_id}/roles"
+        
+        success, data, error = api_client.make_request(
+            url, 'groups', max_retries=2, timeout=10
+        )
+        
+        if not success:
+            return [], False, error
+        
+        if not data or 'roles' not in data:
+            return [], False, "Não foi possível obter roles do grupo"
+        
+        return data['roles'], True, None
+        
+    except Exception as e:
+        return [], False, f"Erro inesperado: {e}"
+
+def get_role_members_robust(group_id: int, role_id: int) -> Tuple[List[Dict], bool, Optional[str]]:
+    """
+    Versão robusta para obter todos os membros de um role do grupo (paginado)
+    Returns: ([{'userId', 'username'}], sucesso, erro)
+    """
+    try:
+        url = f"https://groups.roblox.com/v1/groups/{group_id}/roles/{role_id}/users"
+        members = []
+        cursor = None
+        pages = 0
+        
+        while True:
+            params = {
+                'limit': 100,
+                'sortOrder': 'Asc'
+            }
+            
+            if cursor:
+                params['cursor'] = cursor
+            
+            success, data, error = api_client.make_request(
+                url, 'groups', params=params,
+                max_retries=2, timeout=15
+            )
+            
+            if not success:
+                return [], False, error
+            
+            if not data or 'data' not in data:
+                return [], False, "Resposta da API inválida"
+            
+            pages += 1
+            for member in data.get('data', []):
+                if member.get('userId'):
+                    members.append({
+                        'userId': member['userId'],
+                        'username': member.get('username', f"User{member['userId']}")
+                    })
+            
+            cursor = data.get('nextPageCursor')
+            if not cursor:
+                break
+            
+            # Pequeno delay entre páginas para evitar rate limit
+            time.sleep(0.1)
+        
+        api_client.record_pages('group_roles', pages)
+        return members, True, None
+        
+    except Exception as e:
+        return [], False, f"Erro inesperado: {e}"
+
+def get_users_info_batch(user_ids: List[int]) -> Tuple[Dict[int, Dict], bool, Optional[str]]:
+    """
+    Obtém informações de vários usuários de uma vez
+    Returns: ({user_id: info}, sucesso, erro)
+    """
+    try:
+        url = "https://users.roblox.com/v1/users"
+        
+        success, data, error = api_client.make_request(
+            url, 'users', method='POST',
+            json_data={"userIds": list(user_ids), "excludeBannedUsers": False},
+            max_retries=2, timeout=10
+        )
+        
+        if not success:
+            return {}, False, error
+        
+        if not data or 'data' not in data:
+            return {}, False, "Resposta da API inválida"
+        
+        return {user['id']: user for user in data['data'] if user.get('id')}, True, None
+        
+    except Exception as e:
+        return {}, False, f"Erro inesperado: {e}"
+
 def print_api_stats():
     """Imprime estatísticas das APIs"""
     stats = api_client.get_stats()
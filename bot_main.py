@@ -8,8 +8,8 @@ import os
 import sys
 import threading
 import time
-from discord_bot import run_bot
-from keep_alive import keep_alive, setup_shutdown_handlers
+from discord_bot import run_bot, request_shutdown
+from keep_alive import keep_alive, setup_shutdown_handlers, register_shutdown_callback
 
 def main():
     """Função principal para executar o bot"""
@@ -19,6 +19,8 @@ def main():
     print("=" * 50)
     
     # 0. Configurar handlers de shutdown na main thread
+    # (no desligamento o bot grava o estado pendente e fecha a conexão)
+    register_shutdown_callback(request_shutdown)
     setup_shutdown_handlers()
     
     # 1. Iniciar keep-alive em thread separada primeiro
@@ -0,0 +1,87 @@
+"""
+Planejador de capacidade do monitoramento
+Estima as chamadas de API por ciclo a partir do conjunto monitorado e compara com os rate limits
+"""
+
+import math
+from typing import Dict, Any
+
+from api_utils import api_client, GROUP_BATCH_SIZE, PRIORITY_BACKGROUND
+from config import MONITORING_CONFIG, GROUP_SNAPSHOT_CONFIG
+
+# Usuários por chamada da API de presença
+PRESENCE_BATCH_SIZE = 100
+
+
+def estimate_monitor(name: str, calls_per_cycle: float, endpoint: str, interval: float) -> Dict[str, Any]:
+    """Estima a latência de atualização de um monitor dado o limite por minuto do endpoint"""
+    # Requisições atendidas pelo cache não consomem o limite do endpoint
+    hit_rate = api_client.cache_hit_rate(endpoint)
+    calls_per_cycle *= 1 - hit_rate
+    # O polling dos monitores roda na classe de fundo, que só pode ocupar parte do limite do endpoint
+    rate_limiter = api_client.rate_limiter
+    limit_per_minute = max(1, int(rate_limiter.limits.get(endpoint, 60) * rate_limiter.class_share[PRIORITY_BACKGROUND]))
+    min_cycle_seconds = calls_per_cycle / limit_per_minute * 60 if limit_per_minute else 0.0
+    achievable = max(interval, min_cycle_seconds)
+    recommended = max(interval, min_cycle_seconds * MONITORING_CONFIG["capacity_headroom"])
+
+    return {
+        "monitor": name,
+        "endpoint": endpoint,
+        "calls_per_cycle": round(calls_per_cycle, 1),
+        "cache_hit_rate": round(hit_rate * 100, 1),
+        "limit_per_minute": limit_per_minute,
+        "interval": interval,
+        "min_cycle_seconds": round(min_cycle_seconds, 1),
+        "achievable_latency": round(achievable, 1),
+        "recommended_interval": round(recommended, 1),
+        "utilization": round(min_cycle_seconds / interval * 100, 1) if interval else 0.0,
+        "over_capacity": min_cycle_seconds > interval
+    }
+
+
+def plan_capacity(
+    tracked_users: int,
+    tracked_groups: int,
+    intervals: Dict[str, float],
+    pending_baseline: int = 0
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Monta o relatório de capacidade de todos os monitores
+    Usa a média observada de páginas por usuário e por role, as consultas de membros por grupo
+    e a taxa de acerto do cache de cada endpoint
+    """
+    badge_pages = api_client.average_pages('badges')
+
+    # Monitorados e baseline fazem a mesma listagem de badges; do baseline só entram alguns usuários por ciclo
+    baseline_users = min(pending_baseline, MONITORING_CONFIG["baseline_batch_size"])
+    badge_calls = (tracked_users - pending_baseline + baseline_users) * badge_pages
+    presence_calls = math.ceil(tracked_users / PRESENCE_BATCH_SIZE)
+    # Grupos são deduplicados e consultados em lote
+    group_calls = math.ceil(tracked_groups / GROUP_BATCH_SIZE)
+    if GROUP_SNAPSHOT_CONFIG["enabled"]:
+        # Snapshot de membros: por grupo verificado, a lista de roles e as páginas de membros dos roles reenumerados
+        # (antes de haver observações, supõe só a reenumeração periódica, com um role por grupo)
+        refresh_share = min(1.0, intervals["groups"] / GROUP_SNAPSHOT_CONFIG["refresh_interval_seconds"])
+        enumerated_roles = api_client.average_pages('group_refresh_roles', refresh_share)
+        group_calls += tracked_groups * (1 + enumerated_roles * api_client.average_pages('group_roles'))
+
+    return {
+        "badges": estimate_monitor("badges", badge_calls, 'badges', intervals["badges"]),
+        "presence": estimate_monitor("presence", presence_calls, 'presence', intervals["presence"]),
+        "groups": estimate_monitor("groups", group_calls, 'groups', intervals["groups"])
+    }
+
+
+def format_capacity_report(report: Dict[str, Dict[str, Any]]) -> str:
+    """Formata o relatório de capacidade para exibição em embeds"""
+    lines = []
+    for estimate in report.values():
+        status = "⚠️" if estimate["over_capacity"] else "✅"
+        lines.append(
+            f"{status} **{estimate['monitor']}**: {estimate['calls_per_cycle']} chamadas/ciclo "
+            f"(cache {estimate['cache_hit_rate']}%), "
+            f"uso {estimate['utilization']}%, latência ~{estimate['achievable_latency']}s "
+            f"(sugerido: {estimate['recommended_interval']}s)"
+        )
+    return "\n".join(lines)
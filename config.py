@@ -17,12 +17,19 @@ BOT_OWNER_ID = int(os.getenv("BOT_OWNER_ID", "0")) if os.getenv("BOT_OWNER_ID")
 PORT = int(os.getenv("PORT", "5000"))
 RENDER_SERVICE_NAME = os.getenv("RENDER_SERVICE_NAME", "roblox-discord-bot")
 IS_RENDER = bool(os.getenv('RENDER'))
+# Token dos endpoints de diagnóstico do keep_alive (/metrics, /status detalhado, /traces); sem token, só acesso local
+DEBUG_ENDPOINTS_TOKEN = os.getenv("DEBUG_ENDPOINTS_TOKEN")
 
 # Data persistence configuration for Render
 DATA_DIR = os.getenv("DATA_DIR", ".")  # Render Volume path or current directory
 BADGES_FILE = os.path.join(DATA_DIR, "known_badges.json")
 PRESENCE_FILE = os.path.join(DATA_DIR, "last_presence.json")
 GUILD_DATA_FILE = os.path.join(DATA_DIR, "guild_data.json")
+CHECKPOINT_FILE = os.path.join(DATA_DIR, "monitor_checkpoint.json")
+STATE_DB_FILE = os.path.join(DATA_DIR, "bot_state.db")  # SQLite (WAL) com badges, presença e servidores
+STATE_JOURNAL_FILE = os.path.join(DATA_DIR, "state_journal.bin")  # Journal append-only (modo "journal")
+STATE_SNAPSHOT_FILE = os.path.join(DATA_DIR, "state_snapshot.bin")  # Snapshot binário (mmap) para inicialização rápida
+ARCHIVE_DIR = os.path.join(DATA_DIR, "archive")  # Estado órfão arquivado pela coleta de lixo
 
 # Ensure data directory exists
 if not os.path.exists(DATA_DIR):
@@ -57,31 +64,112 @@ CHECK_INTERVAL = 30
 # Configurações de Rate Limiting e Segurança
 RATE_LIMIT_CONFIG = {
     "max_requests_per_minute": 50,  # Limite de requisições por minuto
+    "max_requests_per_minute_per_guild": 200,  # Limite de comandos por minuto somando todos os usuários do servidor
+    "block_seconds": 300,           # Bloqueio do usuário que estoura o limite
+    "eviction_interval_seconds": 300,  # Intervalo para descartar limites de usuários/servidores inativos
     "max_users_per_guild": 500,     # Limite de usuários por servidor
     "max_groups_per_guild": 20,     # Limite de grupos por servidor
     "backoff_multiplier": 2.0,      # Multiplicador para backoff exponencial
     "max_backoff_time": 300         # Tempo máximo de backoff em segundos
 }
 
+# Configurações dos ciclos de monitoramento
+MONITORING_CONFIG = {
+    "baseline_batch_size": 10,       # Usuários novos registrados (sem notificar) por ciclo de badges
+    "checkpoint_every_users": 25,    # Salvar progresso do ciclo de badges a cada N usuários
+    "fair_share_default_weight": 1.0,  # Peso padrão de cada servidor no escalonamento justo
+    "fair_share_default_cap": 0,     # Máximo de usuários por servidor em cada ciclo (0 = sem limite)
+    "cycle_history_size": 20,        # Ciclos guardados para estatísticas de duração
+    "overrun_stretch_factor": 1.25,  # Fator de aumento do intervalo quando um ciclo estoura
+    "max_interval_multiplier": 4,    # Intervalo efetivo máximo (múltiplo do intervalo base)
+    "relax_threshold": 0.5,          # Abaixo dessa fração do intervalo, o intervalo volta a diminuir
+    "overrun_alert_after": 3,        # Estouros consecutivos antes de alertar o proprietário
+    "low_priority_max_defer_seconds": 600,  # Tempo máximo que um usuário offline pode ser adiado
+    "capacity_headroom": 1.2,        # Folga aplicada ao intervalo sugerido pelo planejador de capacidade
+    "auto_stretch_interval": True    # Aplicar automaticamente o intervalo sugerido pelo planejador
+}
+
+# Configurações dos snapshots de membros dos grupos monitorados
+GROUP_SNAPSHOT_CONFIG = {
+    "enabled": True,                 # Detectar quem entrou/saiu dos grupos monitorados
+    "directory": os.path.join(DATA_DIR, "group_snapshots"),  # Snapshots binários por grupo
+    "refresh_interval_seconds": 1800,  # Reenumerar todos os roles mesmo sem mudança de contagem
+    "max_role_members": 20000,       # Roles maiores usam apenas a contagem de membros
+    "max_names_listed": 10           # Nomes listados por notificação
+}
+
+# Configurações de persistência do estado (badges conhecidas e presença ficam em memória)
+PERSISTENCE_CONFIG = {
+    "mode": "sqlite",                # "sqlite" (upserts no banco) ou "journal" (anexar ao journal e compactar depois)
+    "flush_interval_seconds": 15,    # Intervalo de gravação das chaves alteradas (perda máxima em crash)
+    "max_dirty_keys": 200,           # Gravar antes do intervalo se houver muitas chaves alteradas
+    "journal_fsync": True,           # fsync a cada lote anexado ao journal
+    "journal_compact_bytes": 4 * 1024 * 1024,  # Compactar o journal no banco acima desse tamanho
+    "journal_compact_interval_seconds": 600,   # Compactar o journal pelo menos nesse intervalo
+    "snapshot_interval_seconds": 1800,  # Gravar o snapshot binário de inicialização (também no desligamento)
+    "max_resident_guilds": 200,      # Servidores mantidos em memória (os monitores leem os ociosos direto do banco)
+    "guild_idle_seconds": 3600,      # Servidor sem acesso há mais tempo que isso pode sair da memória
+    "gc_interval_hours": 6,          # Intervalo da coleta de estado órfão (usuários/grupos não monitorados)
+    "gc_archive": True               # Arquivar (JSON gzip) o estado órfão antes de remover
+}
+
 # Configurações de Backup e Recuperação
 BACKUP_CONFIG = {
     "enable_auto_backup": True,      # Habilitar backup automático
     "backup_interval_hours": 12,  # Intervalo de backup em horas
     "max_backup_files": 5,        # Máximo de arquivos de backup
     "backup_on_critical_error": True, # Backup em caso de erro crítico
+    "compression": "lzma",           # Compressão dos blobs de backup: gzip, bz2 ou lzma
     "backup_dir": os.path.join(DATA_DIR, "backups")  # Diretório de backup no DATA_DIR
 }
 
+# Configurações de tracing dos ciclos de monitoramento
+TRACING_CONFIG = {
+    "enabled": True,                 # Registrar spans dos ciclos de badges, presença e grupos
+    "buffer_size": 10,               # Traces lentos mantidos em memória (buffer circular)
+    "max_spans_per_trace": 2000,     # Spans guardados por trace (os demais entram só no resumo por fase)
+    "default_slow_trace_seconds": 60,  # Ciclo mais lento que isso entra no buffer
+    "slow_trace_seconds": {          # Limite por ciclo
+        "badges": 120,
+        "presence": 30,
+        "groups": 120
+    }
+}
+
+# Detector de lag do event loop (chamadas bloqueantes atrasam o heartbeat do Discord)
+LOOP_MONITOR_CONFIG = {
+    "enabled": True,
+    "interval_seconds": 0.5,         # Intervalo do heartbeat no event loop
+    "block_threshold_seconds": 0.25, # Atraso a partir do qual a pilha do loop é capturada e registrada
+    "alert_threshold_seconds": 5,    # Atraso que gera DM ao proprietário (com cooldown)
+    "stack_depth": 12,               # Frames guardados da pilha de cada travamento
+    "max_offenders": 50              # Locais de travamento mantidos no ranking
+}
+
 # Configurações de Logging
 LOGGING_CONFIG = {
     "log_level": "INFO",             # DEBUG, INFO, WARNING, ERROR, CRITICAL
     "log_file": os.path.join(DATA_DIR, "bot.log"),  # Arquivo de log no DATA_DIR
     "max_log_size": 10 * 1024 * 1024, # 10MB máximo por arquivo
     "backup_count": 5,               # Número de arquivos de log rotativos
+    "file_format": "json",           # Formato do arquivo de log: json (uma linha por registro) ou text
+    "subsystem_levels": {            # Nível por subsistema (RobloxBot.<subsistema>); ausente = log_level
+        "api": "INFO"
+    },
     "log_api_calls": True,           # Log das chamadas da API
     "log_errors_to_discord": True    # Enviar erros críticos para Discord
 }
 
+# Configurações de notificações (modo digest)
+# Valores padrão; cada servidor pode sobrescrever no seu config (get_guild_config)
+NOTIFICATION_CONFIG = {
+    "digest_enabled": True,          # Agrupar eventos do mesmo canal em uma única mensagem
+    "digest_window_seconds": 15,     # Janela de agrupamento antes do envio
+    "digest_max_embeds": 10,         # Máximo de embeds por mensagem (limite do Discord: 10)
+    "digest_summary_threshold": 10,  # Acima desse número de eventos, enviar um embed de resumo
+    "digest_summary_max_lines": 25   # Máximo de linhas listadas no embed de resumo
+}
+
 # ====== COMO CONFIGURAR ======
 
 """
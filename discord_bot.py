@@ -1,11 +1,12 @@
 import discord
 from discord.ext import commands, tasks
+import io
 import json
 import os
-import threading
 from datetime import datetime
 import asyncio
 import time
+import math
 from api_utils import (
     get_user_badges_robust,
     get_users_presence_robust, 
@@ -15,8 +16,14 @@ from api_utils import (
     get_badge_info_robust,
     get_place_info_robust,
     get_group_info_robust,
+    get_groups_info_batch,
     get_group_members_robust,
-    print_api_stats
+    print_api_stats,
+    api_client,
+    call_with_priority,
+    request_priority,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_NOTIFICATION
 )
 from config import (
     AUTHORIZED_DISCORD_IDS,
@@ -26,7 +33,11 @@ from config import (
     EMOJIS,
     BOT_OWNER_ID,
     RATE_LIMIT_CONFIG,
-    BACKUP_CONFIG
+    BACKUP_CONFIG,
+    LOGGING_CONFIG,
+    MONITORING_CONFIG,
+    PERSISTENCE_CONFIG,
+    LOOP_MONITOR_CONFIG
 )
 from utils import (
     logger,
@@ -40,8 +51,13 @@ from utils import (
     task_watchdog,
     critical_notifier
 )
+from notifications import notification_digest
+from scheduler import CycleMonitor, get_cycle_monitor, cycle_monitors, badge_deferral, badge_checkpoint, badge_scheduler
+from capacity import plan_capacity, format_capacity_report
+from group_snapshots import refresh_group_membership
 from functools import wraps
-from typing import Any, cast
+from concurrent.futures import Future
+from typing import Any, List, Sequence, Tuple, cast
 
 # ====== CLASSES DE EXCEÇÃO CUSTOMIZADAS ======
 
@@ -54,44 +70,133 @@ class SystemError(Exception):
     pass
 
 # ====== CONFIGURAÇÕES DOS ARQUIVOS ======
-from config import GUILD_DATA_FILE, BADGES_FILE, PRESENCE_FILE
+from config import STATE_DB_FILE
+from state_store import state_store, resident_state, init_state
+from persistence import persistence_writer
+from state_gc import find_orphans, remove_orphans, format_gc_report
+from metrics import metrics
+from tracing import tracer, span
+from loop_monitor import loop_monitor
 
 # ====== VARIÁVEIS GLOBAIS ======
 bot = commands.Bot(command_prefix='!', intents=discord.Intents.all())
 # Estrutura baseada em guild: {guild_id: {"tracked_users": {...}, "tracked_groups": {...}, "config": {...}}}
-guild_data = {}
+guild_data = {}  # Apenas servidores residentes; os demais são carregados do banco sob demanda
+guild_last_access = {}  # {guild_id: timestamp} para remover servidores ociosos da memória
+monitored_guilds = set()  # Servidores com usuários ou grupos monitorados (residentes ou não)
 monitoring_active = False
-monitoring_lock = threading.Lock()
+monitoring_lock = asyncio.Lock()
 
 # ====== FUNÇÕES DE ARQUIVO ======
 
 def load_guild_data():
-    """Carrega dados de todos os servidores com sistema robusto"""
-    global guild_data
-    guild_data = safe_json_load(GUILD_DATA_FILE, {})
+    """Carrega os dados apenas dos servidores em que o bot está (os demais ficam no banco)"""
+    stored_guilds = state_store.guild_ids()
     
-    # Aviso se arquivo não existir (dados perdidos)
-    if not os.path.exists(GUILD_DATA_FILE):
-        railway_env = os.getenv('RAILWAY_ENVIRONMENT_NAME')
-        if railway_env:
-            logger.warning("⚠️ guild_data.json não encontrado - dados perdidos no restart (Railway)")
-        else:
-            logger.info("📋 guild_data.json não encontrado - primeira execução")
+    if not stored_guilds:
+        logger.info("📋 Nenhum servidor no banco de estado - primeira execução")
+    
+    for guild in bot.guilds:
+        load_guild(str(guild.id))
     
-    logger.info(f"Dados dos servidores carregados: {len(guild_data)} servidor(es)")
+    logger.info(f"Dados dos servidores carregados: {len(guild_data)} de {len(stored_guilds)} servidor(es) no banco")
+
+def load_guild(guild_str: str) -> bool:
+    """Carrega um servidor do banco para a memória, se ainda não estiver residente. Returns: se existia no banco"""
+    guild_last_access[guild_str] = time.time()
+    if guild_str in guild_data:
+        return True
+    data = state_store.load_guild(guild_str)
+    if data is None:
+        return False
+    guild_data[guild_str] = data
+    update_monitored_guild(guild_str)
+    return True
+
+def update_monitored_guild(guild_str: str):
+    """Atualiza o índice de servidores monitorados a partir da cópia residente do servidor"""
+    guild_info = guild_data.get(guild_str, {})
+    if guild_info.get("tracked_users") or guild_info.get("tracked_groups"):
+        monitored_guilds.add(guild_str)
+    else:
+        monitored_guilds.discard(guild_str)
+
+def peek_guild(guild_str: str):
+    """
+    Dados do servidor para leitura nos monitores, sem renovar o acesso
+    Servidores fora da memória são lidos do banco e não voltam a ser residentes
+    """
+    data = guild_data.get(guild_str)
+    if data is None:
+        data = state_store.load_guild(guild_str)
+    return data
+
+def get_monitored_guilds() -> dict:
+    """{guild_id: dados} dos servidores monitorados (os ociosos são lidos do banco a cada chamada)"""
+    guilds = {}
+    for guild_str in list(monitored_guilds):
+        data = peek_guild(guild_str)
+        if data is not None:
+            guilds[guild_str] = data
+    return guilds
+
+def evict_guild(guild_str: str):
+    """Remove um servidor da memória, gravando antes o estado atual"""
+    data = guild_data.pop(guild_str, None)
+    guild_last_access.pop(guild_str, None)
+    if data is not None:
+        # Mesmo key do save_guild_data: um save pendente passa a gravar esta cópia
+        persistence_writer.submit(f"guild_data:{guild_str}", state_store.save_guild, guild_str, data)
 
-def save_guild_data():
-    """Salva dados de todos os servidores com sistema robusto"""
-    success = safe_json_save(GUILD_DATA_FILE, guild_data)
+def evict_idle_guilds() -> int:
+    """Remove da memória os servidores ociosos mais antigos quando o limite de residentes é ultrapassado"""
+    budget = PERSISTENCE_CONFIG["max_resident_guilds"]
+    if len(guild_data) <= budget:
+        return 0
+
+    idle_before = time.time() - PERSISTENCE_CONFIG["guild_idle_seconds"]
+    candidates = sorted(
+        (guild_last_access.get(guild_str, 0), guild_str) for guild_str in guild_data
+        if guild_last_access.get(guild_str, 0) < idle_before
+    )
+    evicted = 0
+    for _, guild_str in candidates[:len(guild_data) - budget]:
+        evict_guild(guild_str)
+        evicted += 1
+
+    if evicted:
+        logger.info(f"{evicted} servidor(es) ocioso(s) removido(s) da memória ({len(guild_data)} residentes)")
+    return evicted
+
+def save_guild_data_now(guild_id=None) -> bool:
+    """Salva dados de um servidor (ou de todos os alterados, se guild_id for None)"""
+    if guild_id is None:
+        success = state_store.save_guilds(guild_data)
+    else:
+        guild_str = str(guild_id)
+        success = guild_str not in guild_data or state_store.save_guild(guild_str, guild_data[guild_str])
+
+    target = "dos servidores" if guild_id is None else f"do servidor {guild_id}"
     if success:
-        logger.info("Dados dos servidores salvos com sucesso")
+        logger.info(f"Dados {target} salvos com sucesso")
     else:
-        logger.error("Falha ao salvar dados dos servidores")
+        logger.error(f"Falha ao salvar dados {target}")
+    return success
+
+def save_guild_data(guild_id=None) -> Future:
+    """
+    Agenda a gravação fora do event loop: só o registro do servidor informado é regravado
+    (sem guild_id, todos os servidores alterados). Aguarde o future se precisar do resultado
+    """
+    for guild_str in (list(guild_data) if guild_id is None else [str(guild_id)]):
+        update_monitored_guild(guild_str)
+    key = "guild_data" if guild_id is None else f"guild_data:{guild_id}"
+    return persistence_writer.submit(key, save_guild_data_now, guild_id)
 
 def get_guild_data(guild_id: int):
-    """Obtém dados do servidor específico"""
+    """Obtém dados do servidor específico (carregados do banco sob demanda)"""
     guild_str = str(guild_id)
-    if guild_str not in guild_data:
+    if not load_guild(guild_str):
         guild_data[guild_str] = {
             "tracked_users": {},
             "tracked_groups": {},
@@ -108,42 +213,35 @@ def get_tracked_groups(guild_id: int):
     return get_guild_data(guild_id)["tracked_groups"]
 
 def get_guild_config(guild_id: int):
-    """Obtém configurações do servidor"""
+    """Obtém configurações do servidor (só o que foi definido; os padrões entram na leitura)"""
     return get_guild_data(guild_id)["config"]
 
-def load_known_badges():
-    """Carrega as badges já conhecidas do arquivo"""
-    badges = safe_json_load(BADGES_FILE, {})
-    
-    # Aviso se arquivo não existir (dados perdidos)
-    if not os.path.exists(BADGES_FILE):
-        railway_env = os.getenv('RAILWAY_ENVIRONMENT_NAME')
-        if railway_env:
-            logger.warning("⚠️ known_badges.json não encontrado - histórico de badges perdido (Railway)")
-            logger.warning("   Podem ocorrer notificações duplicadas!")
-    
-    return badges
+def get_digest_settings(guild_id: int):
+    """Obtém configurações de digest de notificações do servidor"""
+    return notification_digest.settings_from_config(get_guild_config(guild_id))
 
-def save_known_badges(badges):
-    """Salva as badges conhecidas no arquivo"""
-    safe_json_save(BADGES_FILE, badges)
+def load_known_badges():
+    """Badges já conhecidas (residentes em memória, carregadas do banco uma única vez)"""
+    return resident_state.known_badges
 
 def load_last_presence():
-    """Carrega o último status de presença dos usuários"""
-    presence = safe_json_load(PRESENCE_FILE, {})
-    
-    # Aviso se arquivo não existir (dados perdidos)
-    if not os.path.exists(PRESENCE_FILE):
-        railway_env = os.getenv('RAILWAY_ENVIRONMENT_NAME')
-        if railway_env:
-            logger.warning("⚠️ last_presence.json não encontrado - status de presença perdido (Railway)")
-            logger.warning("   Primeiras mudanças de status podem não ser detectadas!")
-    
-    return presence
+    """Último status de presença dos usuários (residente em memória)"""
+    return resident_state.presence
+
+def flush_state_now() -> int:
+    """Grava apenas as badges e presenças alteradas desde o último flush (síncrono)"""
+    flushed = resident_state.flush()
+    if flushed:
+        logger.info(f"Estado residente gravado: {flushed} chave(s) alterada(s)")
+    return flushed
+
+def flush_state() -> Future:
+    """Agenda o flush do estado residente fora do event loop"""
+    return persistence_writer.submit("resident_state", flush_state_now)
 
-def save_last_presence(presence_data):
-    """Salva o último status de presença dos usuários"""
-    safe_json_save(PRESENCE_FILE, presence_data)
+def save_badge_checkpoint() -> Future:
+    """Agenda a gravação do checkpoint de badges (cópia tirada agora, gravada fora do event loop)"""
+    return persistence_writer.submit("badge_checkpoint", badge_checkpoint.persist, badge_checkpoint.snapshot_state())
 
 # Função removida: is_authorized agora é redundante
 # A lógica foi integrada no decorador @secure_command
@@ -186,7 +284,9 @@ def secure_command(require_owner: bool = False):
             
             # Verificar rate limiting (exceto para owner)
             if not is_owner(user_id):
-                can_proceed, limit_message = rate_limiter.can_make_request(user_id)
+                can_proceed, limit_message = rate_limiter.can_make_request(
+                    user_id, interaction.guild.id if interaction.guild else None
+                )
                 if not can_proceed:
                     await interaction.response.send_message(f"⚠️ {limit_message}", ephemeral=True)
                     return
@@ -198,7 +298,8 @@ def secure_command(require_owner: bool = False):
                 )
                 return
             
-            # Executar comando original
+            # Executar comando original (chamadas de API furam a fila do polling em segundo plano)
+            priority_token = request_priority.set(PRIORITY_INTERACTIVE)
             try:
                 return await func(interaction, *args, **kwargs)
             except Exception as e:
@@ -218,6 +319,8 @@ def secure_command(require_owner: bool = False):
                     await interaction.followup.send("❌ Erro interno no comando. Tente novamente.", ephemeral=True)
                 else:
                     await interaction.response.send_message("❌ Erro interno no comando. Tente novamente.", ephemeral=True)
+            finally:
+                request_priority.reset(priority_token)
                     
         # Marcar função como protegida
         try:
@@ -241,9 +344,10 @@ def presence_type_to_text(presence_type: int) -> str:
     }
     return presence_map.get(presence_type, "❓ Desconhecido")
 
-def get_notification_channel(guild_id: int):
-    """Obtém o canal de notificações para o servidor"""
-    config = get_guild_config(guild_id)
+def get_notification_channel(guild_id: int, config: dict = None):
+    """Obtém o canal de notificações para o servidor (os monitores passam a config lida com peek_guild)"""
+    if config is None:
+        config = get_guild_config(guild_id)
     channel_id = config.get("notification_channel_id") or NOTIFICATION_CHANNEL_ID
     if channel_id:
         channel = bot.get_channel(channel_id)
@@ -251,6 +355,45 @@ def get_notification_channel(guild_id: int):
             return channel
     return None
 
+def build_badge_embed(user_data: dict, badge_info: dict, channel, avatar_url=None) -> discord.Embed:
+    """Cria o embed de notificação de uma nova badge"""
+    embed = discord.Embed(
+        title="🏆 Nova Badge Conquistada!",
+        color=COLORS["badge"],
+        timestamp=datetime.utcnow()
+    )
+    embed.add_field(name="👤 Usuário", value=user_data['name'], inline=True)
+    embed.add_field(name="🏆 Badge", value=badge_info.get('name', 'Badge Desconhecida'), inline=True)
+    embed.add_field(name="🏠 Servidor", value=channel.guild.name, inline=True)
+
+    if badge_info.get('description'):
+        embed.add_field(name="📝 Descrição", value=badge_info['description'][:100], inline=False)
+
+    if avatar_url:
+        embed.set_thumbnail(url=avatar_url)
+
+    return embed
+
+def build_badge_burst_embed(user_data: dict, badge_names: list, total: int, channel, avatar_url=None) -> discord.Embed:
+    """Cria um embed de resumo para várias badges conquistadas de uma vez"""
+    lines = [f"• {name}" for name in badge_names]
+    if total > len(badge_names):
+        lines.append(f"… e mais {total - len(badge_names)} badge(s)")
+
+    embed = discord.Embed(
+        title=f"🏆 {total} Novas Badges Conquistadas!",
+        description="\n".join(lines)[:4000],
+        color=COLORS["badge"],
+        timestamp=datetime.utcnow()
+    )
+    embed.add_field(name="👤 Usuário", value=user_data['name'], inline=True)
+    embed.add_field(name="🏠 Servidor", value=channel.guild.name, inline=True)
+
+    if avatar_url:
+        embed.set_thumbnail(url=avatar_url)
+
+    return embed
+
 # ====== EVENTOS DO BOT ======
 
 # ====== HANDLERS GLOBAIS DE ERRO ======
@@ -310,6 +453,20 @@ async def on_error(event: str, *args, **kwargs):
         logger.warning(f"Erro de task detectado: {event}. Ativando restart via watchdog...")
         # O watchdog vai detectar e reiniciar a task automaticamente
 
+@bot.event
+async def on_guild_join(guild: discord.Guild):
+    """Ao entrar (ou voltar) em um servidor, carrega o estado salvo dele"""
+    if load_guild(str(guild.id)):
+        logger.info(f"Dados do servidor {guild.id} carregados do banco")
+    evict_idle_guilds()
+
+@bot.event
+async def on_guild_remove(guild: discord.Guild):
+    """Ao sair de um servidor, o estado fica apenas no banco (e deixa de ser monitorado)"""
+    monitored_guilds.discard(str(guild.id))
+    evict_guild(str(guild.id))
+    logger.info(f"Servidor {guild.id} removido da memória (dados mantidos no banco)")
+
 @bot.event
 async def on_ready():
     """Executado quando o bot está online"""
@@ -325,9 +482,7 @@ async def on_ready():
         print("🔄 Os dados do bot (usuários monitorados, badges, presença)")
         print("   serão PERDIDOS a cada restart no Railway!")
         print("\n📋 Arquivos afetados:")
-        print("   • guild_data.json (configurações por servidor)")
-        print("   • known_badges.json (badges já detectadas)")
-        print("   • last_presence.json (status de presença)")
+        print("   • bot_state.db (servidores, badges já detectadas e status de presença)")
         print("\n🔧 SOLUÇÕES RECOMENDADAS:")
         print("   1. Use Railway PostgreSQL add-on")
         print("   2. Configure backup externo (Google Drive, S3)")
@@ -359,13 +514,48 @@ async def on_ready():
         if not monitoring_groups_task.is_running():
             monitoring_groups_task.start()
             logger.info("Task de monitoramento de grupos iniciada")
-        
-            
+
+        if not notification_flush_task.is_running():
+            notification_flush_task.start()
+            logger.info("Task de envio de digests de notificações iniciada")
+
+        if not capacity_planner_task.is_running():
+            capacity_planner_task.start()
+            logger.info("Task do planejador de capacidade iniciada")
+
+        if not state_flush_task.is_running():
+            state_flush_task.start()
+            logger.info("Task de gravação do estado residente iniciada")
+
+        if not state_snapshot_task.is_running():
+            state_snapshot_task.start()
+            logger.info("Task de snapshot do estado iniciada")
+
+        if not state_gc_task.is_running():
+            state_gc_task.start()
+            logger.info("Task de coleta de estado órfão iniciada")
+
+        if PERSISTENCE_CONFIG["mode"] == "journal" and not state_compaction_task.is_running():
+            state_compaction_task.start()
+            logger.info("Task de compactação do journal de estado iniciada")
+
         # Registrar e ativar TaskWatchdog com todas as tasks críticas
         task_watchdog.register_task("badges", monitoring_badge_task, lambda: monitoring_badge_task.start())
         task_watchdog.register_task("presence", monitoring_presence_task, lambda: monitoring_presence_task.start())
         task_watchdog.register_task("groups", monitoring_groups_task, lambda: monitoring_groups_task.start())
-        
+        task_watchdog.register_task("notifications", notification_flush_task, lambda: notification_flush_task.start())
+        task_watchdog.register_task("capacity", capacity_planner_task, lambda: capacity_planner_task.start())
+        task_watchdog.register_task("state_flush", state_flush_task, lambda: state_flush_task.start())
+        task_watchdog.register_task("state_snapshot", state_snapshot_task, lambda: state_snapshot_task.start())
+        task_watchdog.register_task("state_gc", state_gc_task, lambda: state_gc_task.start())
+        if PERSISTENCE_CONFIG["mode"] == "journal":
+            task_watchdog.register_task("state_compaction", state_compaction_task, lambda: state_compaction_task.start())
+
+        # Detector de lag do event loop (captura a pilha de chamadas bloqueantes)
+        if LOOP_MONITOR_CONFIG["enabled"]:
+            loop_monitor.start()
+            task_watchdog.register_task("loop_lag", loop_monitor)
+
         # Iniciar watchdog para monitoramento ativo
         watchdog_task = asyncio.create_task(task_watchdog.monitor_tasks())
         task_watchdog.register_task("watchdog_monitor", watchdog_task)
@@ -379,9 +569,7 @@ async def on_ready():
         logger.info("✅ Sistema de monitoramento bulletproof iniciado para todos os servidores!")
         
         # Criar backup inicial
-        backup_success = backup_manager.create_backup([
-            "guild_data.json", "known_badges.json", "last_presence.json"
-        ], "startup")
+        backup_success = await backup_manager.create_backup_async([STATE_DB_FILE], "startup")
         if backup_success:
             logger.info("Backup inicial criado com sucesso")
             
@@ -512,7 +700,7 @@ async def monitor_user(interaction: discord.Interaction, username: str):
             "added_at": datetime.now().isoformat()
         }
         
-        if save_guild_data():
+        if await persistence_writer.wait(save_guild_data(interaction.guild.id)):
             logger.info(f"Usuário adicionado: {username} (ID: {user_id})", {
                 "guild": interaction.guild.id,
                 "added_by": interaction.user.id,
@@ -571,7 +759,7 @@ async def remove_user(interaction: discord.Interaction, username: str):
         
         # Remover da lista
         del guild_users[str(user_id)]
-        save_guild_data()
+        save_guild_data(interaction.guild.id)
         
         embed = discord.Embed(
             title="✅ Usuário Removido do Monitoramento",
@@ -622,8 +810,8 @@ async def setup_bot(interaction: discord.Interaction):
         return
     
     # Mostrar status do sistema
-    total_users = sum(len(guild_info.get("tracked_users", {})) for guild_info in guild_data.values())
-    total_groups = sum(len(guild_info.get("tracked_groups", {})) for guild_info in guild_data.values())
+    total_users = sum(len(guild_info.get("tracked_users", {})) for guild_info in get_monitored_guilds().values())
+    total_groups = sum(len(guild_info.get("tracked_groups", {})) for guild_info in get_monitored_guilds().values())
     
     embed = discord.Embed(
         title="🔧 Status do Sistema",
@@ -635,6 +823,7 @@ async def setup_bot(interaction: discord.Interaction):
     embed.add_field(name="👥 Total Usuários", value=str(total_users), inline=True)
     embed.add_field(name="📊 Total Grupos", value=str(total_groups), inline=True)
     embed.add_field(name="💾 Backups", value="✅ Ativo" if BACKUP_CONFIG["enable_auto_backup"] else "❌ Inativo", inline=True)
+    embed.add_field(name="📈 Capacidade", value=format_capacity_report(build_capacity_report())[:1024], inline=False)
     
     await interaction.response.send_message(embed=embed, ephemeral=True)
 
@@ -684,7 +873,7 @@ async def set_channel(interaction: discord.Interaction, channel: discord.TextCha
         # Salvar configuração para este servidor
         config = get_guild_config(interaction.guild.id)
         config["notification_channel_id"] = channel.id
-        save_guild_data()
+        save_guild_data(interaction.guild.id)
         
         embed = discord.Embed(
             title="✅ Canal Configurado",
@@ -699,6 +888,90 @@ async def set_channel(interaction: discord.Interaction, channel: discord.TextCha
     except Exception as e:
         await interaction.response.send_message(f"❌ Erro: {e}")
 
+@bot.tree.command(name="configurardigest", description="Configura o agrupamento de notificações (digest) deste servidor")
+@discord.app_commands.describe(
+    ativado="Agrupar notificações do mesmo canal em uma única mensagem",
+    janela="Janela de agrupamento em segundos (5-300)",
+    limite_resumo="Acima desse número de eventos, enviar um resumo (1-50)"
+)
+@secure_command()
+async def configure_digest(interaction: discord.Interaction, ativado: bool = None, janela: int = None, limite_resumo: int = None):
+    """Comando /configurardigest - Ajusta o modo digest de notificações do servidor"""
+
+    # Validar tudo antes de alterar o config compartilhado (um erro não deixa mudança pela metade)
+    if janela is not None and (janela < 5 or janela > 300):
+        await interaction.response.send_message("❌ A janela deve estar entre 5 e 300 segundos.", ephemeral=True)
+        return
+
+    if limite_resumo is not None and (limite_resumo < 1 or limite_resumo > 50):
+        await interaction.response.send_message("❌ O limite de resumo deve estar entre 1 e 50.", ephemeral=True)
+        return
+
+    config = get_guild_config(interaction.guild.id)
+    if janela is not None:
+        config["digest_window_seconds"] = janela
+    if limite_resumo is not None:
+        config["digest_summary_threshold"] = limite_resumo
+    if ativado is not None:
+        config["digest_enabled"] = ativado
+
+    save_guild_data(interaction.guild.id)
+    settings = notification_digest.settings_from_config(config)
+    # Janelas já abertas passam a usar a nova configuração
+    await notification_digest.update_settings(interaction.guild.id, settings)
+
+    embed = discord.Embed(
+        title="📬 Configuração de Notificações",
+        color=COLORS["success"]
+    )
+    embed.add_field(name="📦 Digest", value="✅ Ativo" if settings["digest_enabled"] else "❌ Inativo", inline=True)
+    embed.add_field(name="⏱️ Janela", value=f"{settings['digest_window_seconds']}s", inline=True)
+    embed.add_field(name="📋 Resumo acima de", value=f"{settings['digest_summary_threshold']} eventos", inline=True)
+    embed.add_field(name="🖼️ Embeds por mensagem", value=str(settings["digest_max_embeds"]), inline=True)
+
+    await interaction.response.send_message(embed=embed)
+
+@bot.tree.command(name="escalonamento", description="Ajusta o peso e o limite por ciclo deste servidor no monitoramento (somente proprietário)")
+@discord.app_commands.describe(
+    peso="Peso do servidor na fila justa (0.1-10)",
+    limite="Máximo de usuários verificados por ciclo (0 = sem limite)"
+)
+@secure_command(require_owner=True)
+async def configure_schedule(interaction: discord.Interaction, peso: float = None, limite: int = None):
+    """Comando /escalonamento - Ajusta a participação do servidor no escalonamento justo"""
+
+    if not interaction.guild:
+        await interaction.response.send_message("❌ Este comando só pode ser usado em servidores Discord!", ephemeral=True)
+        return
+
+    # Validar tudo antes de alterar o config compartilhado
+    if peso is not None and (peso < 0.1 or peso > 10):
+        await interaction.response.send_message("❌ O peso deve estar entre 0.1 e 10.", ephemeral=True)
+        return
+
+    if limite is not None and limite < 0:
+        await interaction.response.send_message("❌ O limite não pode ser negativo.", ephemeral=True)
+        return
+
+    config = get_guild_config(interaction.guild.id)
+    if peso is not None:
+        config["schedule_weight"] = peso
+    if limite is not None:
+        config["schedule_cap"] = limite
+
+    save_guild_data(interaction.guild.id)
+
+    cap = config.get("schedule_cap", MONITORING_CONFIG["fair_share_default_cap"])
+    embed = discord.Embed(
+        title="⚖️ Escalonamento do Servidor",
+        color=COLORS["success"]
+    )
+    embed.add_field(name="🏠 Servidor", value=interaction.guild.name, inline=True)
+    embed.add_field(name="⚖️ Peso", value=str(config.get("schedule_weight", MONITORING_CONFIG["fair_share_default_weight"])), inline=True)
+    embed.add_field(name="🔢 Limite por ciclo", value=str(cap) if cap else "Sem limite", inline=True)
+
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
 @bot.tree.command(name="adicionargrupo", description="Adiciona um grupo do Roblox para monitorar mudanças de membros")
 @discord.app_commands.describe(group_id="ID do grupo do Roblox para monitorar")
 @secure_command()
@@ -751,7 +1024,7 @@ async def add_group(interaction: discord.Interaction, group_id: int):
             "added_at": datetime.now().isoformat()
         }
         
-        if save_guild_data():
+        if await persistence_writer.wait(save_guild_data(interaction.guild.id)):
             logger.info(f"Grupo adicionado: {group_id}", {
                 "guild": interaction.guild.id,
                 "added_by": interaction.user.id,
@@ -830,7 +1103,7 @@ async def add_group_members_to_monitoring(interaction: discord.Interaction, grou
             else:
                 already_tracked += 1
         
-        save_guild_data()
+        save_guild_data(interaction.guild.id)
         
         embed = discord.Embed(
             title="✅ Membros Adicionados ao Monitoramento Individual",
@@ -862,18 +1135,16 @@ async def emergency_command(interaction: discord.Interaction):
     await interaction.response.defer(ephemeral=True)
     
     try:
-        # Backup forçado
-        backup_success = backup_manager.create_backup([
-            "guild_data.json", "known_badges.json", "last_presence.json", "bot.log"
-        ], "emergency")
+        # Backup forçado (com o estado residente gravado antes)
+        await persistence_writer.wait(flush_state())
+        backup_success = await backup_manager.create_backup_async([STATE_DB_FILE, LOGGING_CONFIG["log_file"]], "emergency")
         
         # Limpar rate limits de todos os usuários
-        rate_limiter.requests.clear()
-        rate_limiter.blocked_users.clear()
+        rate_limiter.reset()
         
         # Diagnóstico do sistema
-        total_users = sum(len(guild_info.get("tracked_users", {})) for guild_info in guild_data.values())
-        total_groups = sum(len(guild_info.get("tracked_groups", {})) for guild_info in guild_data.values())
+        total_users = sum(len(guild_info.get("tracked_users", {})) for guild_info in get_monitored_guilds().values())
+        total_groups = sum(len(guild_info.get("tracked_groups", {})) for guild_info in get_monitored_guilds().values())
         
         embed = discord.Embed(
             title="🚨 Recuperação de Emergência",
@@ -885,6 +1156,7 @@ async def emergency_command(interaction: discord.Interaction):
         embed.add_field(name="👥 Total Usuários", value=str(total_users), inline=True)
         embed.add_field(name="📊 Total Grupos", value=str(total_groups), inline=True)
         embed.add_field(name="📋 Tasks Ativas", value=f"Badges: {monitoring_badge_task.is_running()}\nPresença: {monitoring_presence_task.is_running()}\nGrupos: {monitoring_groups_task.is_running()}", inline=False)
+        embed.add_field(name="📈 Capacidade", value=format_capacity_report(build_capacity_report())[:1024], inline=False)
         
         logger.critical("Comando de emergência executado", None, {
             "user": interaction.user.id,
@@ -897,6 +1169,27 @@ async def emergency_command(interaction: discord.Interaction):
         logger.critical("Erro no comando de emergência", e)
         await interaction.followup.send("❌ Erro crítico no sistema de emergência!", ephemeral=True)
 
+@bot.tree.command(name="traces", description="Mostra onde o tempo dos ciclos de monitoramento lentos foi gasto (proprietário)")
+@secure_command(require_owner=True)
+async def traces_command(interaction: discord.Interaction):
+    """Comando /traces - Resumo dos traces lentos recentes, com o dump completo em anexo"""
+    await interaction.response.defer(ephemeral=True)
+
+    embed = discord.Embed(title="⏱️ Traces dos Ciclos de Monitoramento", color=COLORS["info"])
+    slow_traces = list(tracer.slow_traces)[::-1][:3]
+    if slow_traces:
+        for trace in slow_traces:
+            embed.add_field(name="🐢 Ciclo lento", value=tracer.format_summary(trace)[:1024], inline=False)
+    else:
+        embed.description = "✅ Nenhum ciclo lento registrado"
+    for trace in list(tracer.last_traces.values()):
+        embed.add_field(name=f"🕐 Último ciclo: {trace.name}", value=tracer.format_summary(trace, top=4)[:1024], inline=False)
+    embed.set_footer(text=f"Traces: {tracer.stats['traces']} | Lentos: {tracer.stats['slow_traces']}")
+
+    dump = json.dumps(tracer.dump(), ensure_ascii=False, indent=1).encode("utf-8")
+    trace_file = discord.File(io.BytesIO(dump), filename=f"traces_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    await interaction.followup.send(embed=embed, file=trace_file, ephemeral=True)
+
 @bot.tree.command(name="grupos", description="Lista todos os grupos monitorados neste servidor")
 @secure_command()
 async def list_groups(interaction: discord.Interaction):
@@ -928,96 +1221,278 @@ async def list_groups(interaction: discord.Interaction):
 
 # ====== MONITORAMENTO AUTOMÁTICO ======
 
+async def finish_monitor_cycle(cycle_monitor: CycleMonitor, loop_task, deferred: int = 0):
+    """Encerra a medição do ciclo, aplica o intervalo efetivo e alerta o proprietário em sobrecarga"""
+    result = cycle_monitor.end_cycle(deferred)
+    if not result:
+        return
+
+    if result["interval_changed"]:
+        loop_task.change_interval(seconds=result["effective_interval"])
+        logger.info(f"Intervalo efetivo de {cycle_monitor.name} ajustado para {result['effective_interval']:.1f}s")
+
+    if result["overrun"] and cycle_monitor.should_alert():
+        stats = cycle_monitor.get_stats()
+        await critical_notifier.notify_owner(
+            "⏱️ Monitoramento Sobrecarregado",
+            f"Os ciclos de **{cycle_monitor.name}** estão demorando mais que o intervalo configurado. "
+            "O conjunto monitorado pode ter excedido a capacidade.",
+            f"overrun_{cycle_monitor.name}",
+            {
+                "Última duração": f"{stats['last_duration']}s",
+                "Intervalo base": f"{stats['base_interval']}s",
+                "Intervalo efetivo": f"{stats['effective_interval']}s",
+                "Estouros": str(stats['overruns']),
+                "Usuários adiados": str(stats['deferred_users'])
+            }
+        )
+
+async def baseline_known_badges(pending_baseline: dict, limit: int = None) -> int:
+    """Registra silenciosamente as badges atuais de usuários recém-monitorados"""
+    batch_size = limit if limit is not None else MONITORING_CONFIG["baseline_batch_size"]
+    baselined = 0
+
+    for roblox_id_str, guild_id in list(pending_baseline.items())[:batch_size]:
+        try:
+            current_badges, success, error = await asyncio.to_thread(get_user_badges_robust, int(roblox_id_str))
+        except Exception as e:
+            logger.error(f"Erro no baseline de badges do usuário {roblox_id_str}", e, {"guild": guild_id})
+            continue
+
+        if not success:
+            logger.warning(f"Baseline de badges adiado para o usuário {roblox_id_str}", {"error": error})
+            continue
+
+        resident_state.record_badges(roblox_id_str, [badge['id'] for badge in current_badges])
+        baselined += 1
+
+    if pending_baseline:
+        logger.info(f"Baseline de badges: {baselined} usuário(s) registrados, {len(pending_baseline) - baselined} pendente(s)")
+
+    return baselined
+
+MONITOR_INTERVALS = {
+    "badges": CHECK_INTERVAL,
+    "presence": CHECK_INTERVAL,
+    "groups": CHECK_INTERVAL * 3
+}
+
+def build_capacity_report() -> dict:
+    """Estima a capacidade do monitoramento para o conjunto monitorado atual"""
+    guilds = get_monitored_guilds()
+    user_guilds = build_user_guild_index(guilds)
+    known_badges = load_known_badges()
+    pending_baseline = sum(1 for roblox_id_str in user_guilds if roblox_id_str not in known_badges)
+    tracked_groups = set()
+    for guild_info in guilds.values():
+        tracked_groups.update(guild_info.get("tracked_groups", {}))
+
+    return plan_capacity(len(user_guilds), len(tracked_groups), MONITOR_INTERVALS, pending_baseline)
+
+def format_member_list(members: List[Tuple[int, str]], total: int) -> str:
+    """Formata a lista de membros que entraram/saíram de um grupo"""
+    names = [f"[{name}](https://www.roblox.com/users/{user_id}/profile)" for user_id, name in members]
+    text = ", ".join(names)
+    if total > len(members):
+        text += f" e mais {total - len(members)}"
+    return text[:1024]
+
+def build_group_index() -> dict:
+    """Monta o índice global {group_id_str: [(guild_id, canal, registro do grupo), ...]} dos grupos monitorados"""
+    group_index = {}
+    for guild_id, guild_info in get_monitored_guilds().items():
+        guild_groups = guild_info.get("tracked_groups", {})
+        if not guild_groups:
+            continue
+
+        # Verificar canal de notificações
+        channel = get_notification_channel(int(guild_id), guild_info.get("config", {}))
+        if not channel:
+            continue
+
+        for group_id_str, group_data in guild_groups.items():
+            group_index.setdefault(group_id_str, []).append((guild_id, channel, group_data))
+    return group_index
+
+def get_schedule_settings(guilds: dict):
+    """Obtém pesos e limites por ciclo do escalonamento justo de cada servidor"""
+    weights, caps = {}, {}
+    for guild_id, guild_info in guilds.items():
+        config = guild_info.get("config", {})
+        weights[guild_id] = config.get("schedule_weight", MONITORING_CONFIG["fair_share_default_weight"])
+        caps[guild_id] = config.get("schedule_cap", MONITORING_CONFIG["fair_share_default_cap"])
+    return weights, caps
+
+def build_user_guild_index(guilds: dict) -> dict:
+    """Monta o índice global {roblox_id_str: [guild_id, ...]} dos usuários monitorados"""
+    user_guilds = {}
+    for guild_id, guild_info in guilds.items():
+        for roblox_id_str in guild_info.get("tracked_users", {}):
+            user_guilds.setdefault(roblox_id_str, []).append(guild_id)
+    return user_guilds
+
+async def notify_new_badges(targets: list, new_badge_ids: Sequence[int], avatar_url=None):
+    """Notifica novas badges em todos os canais que monitoram o usuário"""
+    badge_infos = {}  # Cada badge é consultada uma única vez, mesmo com vários servidores
+
+    async def get_badge_info(badge_id):
+        if badge_id not in badge_infos:
+            badge_info, success, _ = await call_with_priority(PRIORITY_NOTIFICATION, get_badge_info_robust, badge_id)
+            badge_infos[badge_id] = badge_info if success and badge_info else None
+        return badge_infos[badge_id]
+
+    for guild_id, channel, user_data in targets:
+        settings = get_digest_settings(int(guild_id))
+
+        if settings["digest_enabled"] and len(new_badge_ids) > settings["digest_summary_threshold"]:
+            # Rajada de badges: um único embed de resumo, consultando apenas as badges listadas
+            listed_ids = list(new_badge_ids)[:settings["digest_summary_max_lines"]]
+            badge_names = []
+            for badge_id in listed_ids:
+                badge_info = await get_badge_info(badge_id)
+                badge_names.append(badge_info.get('name', 'Badge Desconhecida') if badge_info else f"Badge {badge_id}")
+
+            embed = build_badge_burst_embed(user_data, badge_names, len(new_badge_ids), channel, avatar_url)
+            await notification_digest.notify(
+                channel, embed,
+                f"🏆 **{user_data['name']}** conquistou **{len(new_badge_ids)}** badges",
+                settings
+            )
+        else:
+            for badge_id in new_badge_ids:
+                badge_info = await get_badge_info(badge_id)
+                if badge_info:
+                    embed = build_badge_embed(user_data, badge_info, channel, avatar_url)
+                    await notification_digest.notify(
+                        channel, embed,
+                        f"🏆 **{user_data['name']}** conquistou **{badge_info.get('name', 'Badge Desconhecida')}**",
+                        settings
+                    )
+
 @tasks.loop(seconds=CHECK_INTERVAL)
 async def monitoring_badge_task():
     """Task de monitoramento de badges para todos os servidores"""
+    cycle_monitor = get_cycle_monitor("badges", MONITOR_INTERVALS["badges"])
+    deferred = 0
+    trace = None
     try:
-        with monitoring_lock:
+        async with monitoring_lock:
+            cycle_monitor.start_cycle()
+            trace = tracer.start_trace("badges", backpressure=cycle_monitor.backpressure)
             known_badges = load_known_badges()
-            
-            # Iterar através de todos os servidores
-            for guild_id, guild_info in guild_data.items():
-                guild_users = guild_info.get("tracked_users", {})
-                if not guild_users:
+            pending_baseline = {}  # {roblox_id_str: guild_id} usuários novos, ainda sem badges conhecidas
+
+            # Sob backpressure, usuários offline verificados recentemente são adiados
+            last_presence = load_last_presence() if cycle_monitor.backpressure else {}
+
+            # Fila justa ponderada entre servidores, retomada a partir dos cursores do checkpoint
+            with span("plan"):
+                guilds = get_monitored_guilds()
+                user_guilds = build_user_guild_index(guilds)
+                guild_users = {gid: list(info.get("tracked_users", {})) for gid, info in guilds.items()}
+                weights, caps = get_schedule_settings(guilds)
+            processed = 0
+
+            for roblox_id_str, scheduled_guild in badge_scheduler.plan(guild_users, weights, caps):
+                guild_ids = user_guilds[roblox_id_str]
+
+                # Usuários recém-adicionados passam pelo baseline silencioso antes do diff
+                if roblox_id_str not in known_badges:
+                    pending_baseline.setdefault(roblox_id_str, guild_ids[0])
                     continue
-                    
-                # Verificar canal de notificações
-                channel = get_notification_channel(int(guild_id))
-                if not channel:
+
+                if cycle_monitor.backpressure and badge_deferral.should_defer(roblox_id_str, last_presence.get(roblox_id_str, 0)):
+                    deferred += 1
                     continue
-                
-                for roblox_id_str, user_data in guild_users.items():
+
+                try:
+                    roblox_id = int(roblox_id_str)
+
+                    # Servidores com canal de notificações que monitoram este usuário
+                    targets = []
+                    for guild_id in guild_ids:
+                        channel = get_notification_channel(int(guild_id), guilds[guild_id].get("config", {}))
+                        user_data = guilds[guild_id]["tracked_users"].get(roblox_id_str)
+                        if channel and user_data:
+                            targets.append((guild_id, channel, user_data))
+                    if not targets:
+                        continue
+
+                    # Obter badges atuais do usuário com tratamento robusto
                     try:
-                        roblox_id = int(roblox_id_str)
-                        
-                        # Obter badges atuais do usuário com tratamento robusto
-                        try:
+                        with span("fetch_badges"):
                             current_badges, success, _ = await asyncio.to_thread(get_user_badges_robust, roblox_id)
-                            if not success or not current_badges:
-                                continue
-                        except Exception as e:
-                            logger.error(f"Erro ao obter badges do usuário {roblox_id}", e, {"guild": guild_id})
+                        if not success or not current_badges:
                             continue
-                        
-                        # Comparar com badges conhecidas
-                        current_badge_ids = set(badge['id'] for badge in current_badges)
-                        user_known_badges = set(known_badges.get(roblox_id_str, []))
-                        new_badge_ids = current_badge_ids - user_known_badges
-                        
-                        if new_badge_ids:
-                            try:
-                                # Obter info do usuário com tratamento seguro
-                                user_info, _, _ = await asyncio.to_thread(get_user_info_robust, int(roblox_id))
-                                avatar_url, _, _ = await asyncio.to_thread(get_user_avatar_robust, int(roblox_id))
-                            except Exception as e:
-                                logger.warning(f"Erro ao obter info do usuário {roblox_id}", None, {"error": str(e)})
-                                user_info, avatar_url = None, None
-                            
-                            for badge_id in new_badge_ids:
-                                badge_info, success, _ = await asyncio.to_thread(get_badge_info_robust, badge_id)
-                                if success and badge_info:
-                                    embed = discord.Embed(
-                                        title="🏆 Nova Badge Conquistada!",
-                                        color=COLORS["badge"],
-                                        timestamp=datetime.utcnow()
-                                    )
-                                    embed.add_field(name="👤 Usuário", value=user_data['name'], inline=True)
-                                    embed.add_field(name="🏆 Badge", value=badge_info.get('name', 'Badge Desconhecida'), inline=True)
-                                    embed.add_field(name="🏠 Servidor", value=channel.guild.name, inline=True)
-                                    
-                                    if badge_info.get('description'):
-                                        embed.add_field(name="📝 Descrição", value=badge_info['description'][:100], inline=False)
-                                    
-                                    if avatar_url:
-                                        embed.set_thumbnail(url=avatar_url)
-                                    
-                                    await channel.send(embed=embed)
-                                    await asyncio.sleep(1)  # Delay entre notificações
-                        
-                        # Atualizar badges conhecidas
-                        known_badges[roblox_id_str] = list(current_badge_ids)
-                        
-                    except (ValueError, TypeError):
+                    except Exception as e:
+                        logger.error(f"Erro ao obter badges do usuário {roblox_id}", e, {"guilds": guild_ids})
                         continue
-            
-            # Salvar badges conhecidas
-            save_known_badges(known_badges)
+
+                    # Comparar com badges conhecidas (a diferença fica pendente para o flush)
+                    with span("diff", badges=len(current_badges)):
+                        new_badge_ids, _ = resident_state.record_badges(
+                            roblox_id_str, [badge['id'] for badge in current_badges]
+                        )
+
+                    if new_badge_ids:
+                        try:
+                            with span("fetch_avatar"):
+                                avatar_url, _, _ = await call_with_priority(PRIORITY_NOTIFICATION, get_user_avatar_robust, roblox_id)
+                        except Exception as e:
+                            logger.warning(f"Erro ao obter avatar do usuário {roblox_id}", {"error": str(e)})
+                            avatar_url = None
+
+                        with span("notify", badges=len(new_badge_ids)):
+                            await notify_new_badges(targets, new_badge_ids, avatar_url)
+
+                    badge_deferral.mark_checked(roblox_id_str)
+
+                except (ValueError, TypeError):
+                    continue
+                finally:
+                    # Checkpoint periódico dos cursores; as badges são gravadas pelo flush do estado residente
+                    badge_scheduler.mark_done(scheduled_guild, roblox_id_str)
+                    processed += 1
+                    if processed % MONITORING_CONFIG["checkpoint_every_users"] == 0:
+                        with span("persist"):
+                            save_badge_checkpoint()
+                            if resident_state.dirty_count() >= PERSISTENCE_CONFIG["max_dirty_keys"]:
+                                flush_state()
+
+            # Baseline em baixa prioridade: poucos usuários novos por ciclo, sem notificações
+            # (sob backpressure, apenas um por ciclo)
+            baseline_limit = 1 if cycle_monitor.backpressure else None
+            with span("baseline", pending=len(pending_baseline)):
+                await baseline_known_badges(pending_baseline, baseline_limit)
+
+            # Marcar o ciclo como completo
+            with span("persist"):
+                badge_checkpoint.complete_cycle(gid for gid, users in guild_users.items() if users)
+                save_badge_checkpoint()
             
     except Exception as e:
-        print(f"❌ Erro no monitoramento de badges: {e}")
+        logger.error("❌ Erro no monitoramento de badges", e)
+    finally:
+        tracer.finish_trace(trace)
+        await finish_monitor_cycle(cycle_monitor, monitoring_badge_task, deferred)
 
 @tasks.loop(seconds=CHECK_INTERVAL)
 async def monitoring_presence_task():
     """Task de monitoramento de presença para todos os servidores"""
+    cycle_monitor = get_cycle_monitor("presence", MONITOR_INTERVALS["presence"])
+    trace = None
     try:
-        with monitoring_lock:
+        async with monitoring_lock:
+            cycle_monitor.start_cycle()
+            trace = tracer.start_trace("presence")
             last_presence = load_last_presence()
             
             # Coletar todos os usuários únicos de todos os servidores
             all_user_ids = set()
             guild_user_map = {}  # {user_id: [guild_ids]}
+            guilds = get_monitored_guilds()
             
-            for guild_id, guild_info in guild_data.items():
+            for guild_id, guild_info in guilds.items():
                 guild_users = guild_info.get("tracked_users", {})
                 for user_id in guild_users.keys():
                     all_user_ids.add(int(user_id))
@@ -1030,7 +1505,8 @@ async def monitoring_presence_task():
             
             # Obter presença de todos os usuários com tratamento robusto
             try:
-                presence_data, success, _ = await asyncio.to_thread(get_users_presence_robust, list(all_user_ids))
+                with span("fetch_presence", users=len(all_user_ids)):
+                    presence_data, success, _ = await asyncio.to_thread(get_users_presence_robust, list(all_user_ids))
                 if not success or not presence_data:
                     logger.warning("Falha ao obter dados de presença")
                     return
@@ -1052,17 +1528,17 @@ async def monitoring_presence_task():
                     # Notificar em todos os servidores que monitoram este usuário
                     for guild_id in guild_user_map.get(str(user_id), []):
                         try:
-                            channel = get_notification_channel(int(guild_id))
+                            channel = get_notification_channel(int(guild_id), guilds[guild_id].get("config", {}))
                             if not channel:
                                 continue
                                 
-                            guild_users = get_tracked_users(int(guild_id))
-                            user_data = guild_users.get(str(user_id))
+                            user_data = guilds[guild_id]["tracked_users"].get(str(user_id))
                             if not user_data:
                                 continue
                             
                             # Obter avatar do usuário
-                            avatar_url, _, _ = await asyncio.to_thread(get_user_avatar_robust, int(user_id))
+                            with span("fetch_avatar"):
+                                avatar_url, _, _ = await call_with_priority(PRIORITY_NOTIFICATION, get_user_avatar_robust, int(user_id))
                             
                             color = COLORS["online"] if current_status == 1 else COLORS["gaming"]
                             
@@ -1079,7 +1555,8 @@ async def monitoring_presence_task():
                             place_id = presence.get('placeId')
                             if current_status == 2 and place_id:
                                 try:
-                                    place_info, success, _ = await asyncio.to_thread(get_place_info_robust, int(place_id))
+                                    with span("fetch_place"):
+                                        place_info, success, _ = await call_with_priority(PRIORITY_NOTIFICATION, get_place_info_robust, int(place_id))
                                     if success and place_info:
                                         embed.add_field(name="🎮 Jogo", value=place_info.get('name', 'Jogo Desconhecido'), inline=True)
                                 except (ValueError, TypeError):
@@ -1087,66 +1564,102 @@ async def monitoring_presence_task():
                             
                             if avatar_url:
                                 embed.set_thumbnail(url=avatar_url)
-                            
-                            await channel.send(embed=embed)
-                            
+
+                            with span("notify"):
+                                await notification_digest.notify(
+                                    channel, embed,
+                                    f"📶 **{user_data['name']}** está {presence_type_to_text(current_status)}",
+                                    get_digest_settings(int(guild_id))
+                                )
+
                         except Exception as e:
-                            print(f"Erro ao notificar presença no servidor {guild_id}: {e}")
+                            logger.error(f"Erro ao notificar presença no servidor {guild_id}", e)
                 
-                # Atualizar último status conhecido
-                last_presence[str(user_id)] = current_status
-            
-            save_last_presence(last_presence)
+                # Atualizar último status conhecido (gravado pelo flush do estado residente)
+                resident_state.set_presence(str(user_id), current_status)
             
     except Exception as e:
-        print(f"❌ Erro no monitoramento de presença: {e}")
+        logger.error("❌ Erro no monitoramento de presença", e)
+    finally:
+        tracer.finish_trace(trace)
+        await finish_monitor_cycle(cycle_monitor, monitoring_presence_task)
 
 @tasks.loop(seconds=CHECK_INTERVAL * 3)  # Grupos são verificados com menos frequência
 async def monitoring_groups_task():
     """Task de monitoramento de grupos para todos os servidores"""
+    cycle_monitor = get_cycle_monitor("groups", MONITOR_INTERVALS["groups"])
+    trace = None
     try:
-        with monitoring_lock:
-            # Iterar através de todos os servidores
-            for guild_id, guild_info in guild_data.items():
-                guild_groups = guild_info.get("tracked_groups", {})
-                if not guild_groups:
-                    continue
-                    
-                # Verificar canal de notificações
-                channel = get_notification_channel(int(guild_id))
-                if not channel:
-                    continue
-                
-                for group_id_str, group_data in guild_groups.items():
-                    try:
-                        group_id = int(group_id_str)
-                        old_member_count = group_data.get('member_count', 0)
-                        
-                        # Obter informações atuais do grupo com tratamento robusto
-                        try:
+        async with monitoring_lock:
+            cycle_monitor.start_cycle()
+            trace = tracer.start_trace("groups")
+
+            # Índice global: cada grupo é consultado uma vez, independente de quantos servidores o monitoram
+            group_index = build_group_index()
+            if not group_index:
+                return
+
+            try:
+                with span("fetch_groups_batch", groups=len(group_index)):
+                    groups_info, success, error = await asyncio.to_thread(
+                        get_groups_info_batch, [int(group_id_str) for group_id_str in group_index]
+                    )
+                if not success:
+                    logger.warning("Falha parcial na consulta em lote de grupos", {"error": error})
+            except Exception as e:
+                logger.error("Erro crítico na consulta em lote de grupos", e)
+                return
+
+            changed_guilds = set()
+            for group_id_str, targets in group_index.items():
+                try:
+                    group_id = int(group_id_str)
+                    group_info = groups_info.get(group_id)
+
+                    # Fallback para consulta individual quando o lote não trouxe a contagem de membros
+                    if not group_info or 'memberCount' not in group_info:
+                        with span("fetch_group_info"):
                             group_info, success, error = await asyncio.to_thread(get_group_info_robust, group_id)
-                            if not success:
-                                logger.warning(f"Erro ao obter info do grupo {group_id}", None, {"error": error})
-                                continue
-                        except Exception as e:
-                            logger.error(f"Erro crítico ao monitorar grupo {group_id}", e, {"guild": guild_id})
+                        if not success:
+                            logger.warning(f"Erro ao obter info do grupo {group_id}", {"error": error})
                             continue
-                        
-                        current_member_count = group_info.get('memberCount', 0)
-                        
-                        # Verificar mudança na quantidade de membros
-                        if current_member_count != old_member_count:
-                            # Atualizar dados do grupo
+
+                    current_member_count = group_info.get('memberCount', 0)
+
+                    # Comparar a contagem de cada role a cada verificação (o total pode ficar igual com entradas e saídas)
+                    with span("refresh_membership"):
+                        member_changes, success, error = await asyncio.to_thread(refresh_group_membership, group_id)
+                    if not success:
+                        logger.warning(f"Snapshot de membros do grupo {group_id} não atualizado", {"error": error})
+                    membership_changed = bool(
+                        member_changes and (member_changes["joined_count"] or member_changes["left_count"])
+                    )
+
+                    # Distribuir o resultado para o registro de cada servidor
+                    for guild_id, channel, group_data in targets:
+                        old_member_count = group_data.get('member_count', 0)
+
+                        # Verificar mudança na quantidade de membros ou na composição do grupo
+                        # (entradas e saídas simultâneas não alteram a contagem)
+                        if current_member_count != old_member_count or membership_changed:
+                            # Atualizar dados do grupo na cópia residente (servidor ocioso volta para a memória)
+                            group_data = get_tracked_groups(int(guild_id)).get(group_id_str, group_data)
                             group_data['member_count'] = current_member_count
-                            
+                            changed_guilds.add(guild_id)
+
                             # Determinar se aumentou ou diminuiu
                             if current_member_count > old_member_count:
                                 change_text = f"📈 +{current_member_count - old_member_count} novos membros"
                                 color = COLORS["success"]
-                            else:
+                            elif current_member_count < old_member_count:
                                 change_text = f"📉 -{old_member_count - current_member_count} membros saíram"
                                 color = COLORS["warning"]
-                            
+                            else:
+                                change_text = (
+                                    f"🔄 +{member_changes['joined_count']} / -{member_changes['left_count']} membros"
+                                )
+                                color = COLORS["info"]
+
                             embed = discord.Embed(
                                 title="👥 Mudança na Quantidade de Membros",
                                 color=color,
@@ -1158,26 +1671,243 @@ async def monitoring_groups_task():
                             embed.add_field(name="📊 Mudança", value=change_text, inline=True)
                             embed.add_field(name="👥 Antes", value=str(old_member_count), inline=True)
                             embed.add_field(name="👥 Agora", value=str(current_member_count), inline=True)
-                            
-                            await channel.send(embed=embed)
-                            await asyncio.sleep(1)  # Pequeno delay entre notificações
-                            
-                    except (ValueError, TypeError) as e:
-                        print(f"Erro ao processar grupo {group_id_str} no servidor {guild_id}: {e}")
-                        continue
-            
-            # Salvar mudanças
-            save_guild_data()
+
+                            if member_changes:
+                                if member_changes["joined_count"]:
+                                    embed.add_field(
+                                        name=f"➕ Entraram ({member_changes['joined_count']})",
+                                        value=format_member_list(member_changes["joined"], member_changes["joined_count"]),
+                                        inline=False
+                                    )
+                                if member_changes["left_count"]:
+                                    embed.add_field(
+                                        name=f"➖ Saíram ({member_changes['left_count']})",
+                                        value=format_member_list(member_changes["left"], member_changes["left_count"]),
+                                        inline=False
+                                    )
+
+                            with span("notify"):
+                                await notification_digest.notify(
+                                    channel, embed,
+                                    f"👥 **{group_data['name']}**: {change_text} (agora {current_member_count})",
+                                    get_digest_settings(int(guild_id))
+                                )
+
+                except (ValueError, TypeError) as e:
+                    logger.error(f"Erro ao processar grupo {group_id_str}", e)
+                    continue
+
+            # Salvar apenas os servidores com grupos alterados
+            with span("persist", guilds=len(changed_guilds)):
+                for guild_id in changed_guilds:
+                    save_guild_data(guild_id)
             
     except Exception as e:
-        print(f"❌ Erro no monitoramento de grupos: {e}")
+        logger.error("❌ Erro no monitoramento de grupos", e)
+    finally:
+        tracer.finish_trace(trace)
+        await finish_monitor_cycle(cycle_monitor, monitoring_groups_task)
+
+@tasks.loop(minutes=10)
+async def capacity_planner_task():
+    """Task que avalia a capacidade e, se configurado, estica os intervalos dos monitores"""
+    try:
+        report = build_capacity_report()
+        loops = {
+            "badges": monitoring_badge_task,
+            "presence": monitoring_presence_task,
+            "groups": monitoring_groups_task
+        }
+
+        for name, estimate in report.items():
+            if estimate["over_capacity"]:
+                logger.warning(f"Capacidade insuficiente para o monitor {name}", estimate)
+
+            if MONITORING_CONFIG["auto_stretch_interval"]:
+                cycle_monitor = get_cycle_monitor(name, MONITOR_INTERVALS[name])
+                if cycle_monitor.set_floor_interval(estimate["recommended_interval"]):
+                    loops[name].change_interval(seconds=cycle_monitor.effective_interval)
+                    logger.info(f"Intervalo de {name} esticado pelo planejador para {cycle_monitor.effective_interval:.1f}s")
+    except Exception as e:
+        logger.error("Erro no planejador de capacidade", e)
+
+@tasks.loop(seconds=PERSISTENCE_CONFIG["flush_interval_seconds"])
+async def state_flush_task():
+    """Task write-behind: grava periodicamente apenas o estado residente alterado"""
+    try:
+        await persistence_writer.wait(flush_state())
+        evict_idle_guilds()
+    except Exception as e:
+        logger.error("Erro ao gravar estado residente", e)
+
+@tasks.loop(seconds=PERSISTENCE_CONFIG["snapshot_interval_seconds"])
+async def state_snapshot_task():
+    """Task que grava o snapshot binário do estado (fora do event loop)"""
+    if state_snapshot_task.current_loop == 0:
+        return  # O estado acabou de ser carregado; o primeiro snapshot vem no próximo intervalo
+    try:
+        size = await persistence_writer.wait(persistence_writer.submit("state_snapshot", resident_state.write_snapshot))
+        logger.info(f"Snapshot de estado gravado: {size / 1024:.1f} KB")
+    except Exception as e:
+        logger.error("Erro ao gravar snapshot de estado", e)
+
+async def collect_orphaned_state() -> dict:
+    """Remove o estado de usuários e grupos que nenhum servidor monitora mais"""
+    tracked_users, tracked_groups = set(), set()
+    for guild_info in guild_data.values():
+        tracked_users.update(guild_info.get("tracked_users", {}))
+        tracked_groups.update(guild_info.get("tracked_groups", {}))
+
+    orphan_users, orphan_groups, all_tracked_users = await persistence_writer.wait(persistence_writer.submit(
+        "state_gc_scan", find_orphans, tracked_users, tracked_groups,
+        list(guild_data), resident_state.resident_user_ids()
+    ))
+
+    # Memória primeiro (no event loop), depois banco e disco (na thread de persistência)
+    resident_state.forget_users(orphan_users)
+    badge_deferral.forget(all_tracked_users)
+    return await persistence_writer.wait(persistence_writer.submit(
+        "state_gc_remove", remove_orphans, orphan_users, orphan_groups, PERSISTENCE_CONFIG["gc_archive"]
+    ))
+
+@tasks.loop(hours=PERSISTENCE_CONFIG["gc_interval_hours"])
+async def state_gc_task():
+    """Task de coleta de estado órfão"""
+    if state_gc_task.current_loop == 0:
+        return  # Aguardar um intervalo após a inicialização
+    try:
+        async with monitoring_lock:
+            report = await collect_orphaned_state()
+        if report["users"] or report["groups"]:
+            logger.info(f"Estado órfão removido:\n{format_gc_report(report)}")
+    except Exception as e:
+        logger.error("Erro na coleta de estado órfão", e)
+
+@tasks.loop(seconds=60)
+async def state_compaction_task():
+    """Task que compacta o journal de estado no banco (modo journal)"""
+    try:
+        interval = PERSISTENCE_CONFIG["journal_compact_interval_seconds"]
+        if resident_state.needs_compaction() or state_compaction_task.current_loop % max(1, interval // 60) == 0:
+            compacted = await persistence_writer.wait(persistence_writer.submit("state_compaction", resident_state.compact))
+            if compacted:
+                logger.info(f"Journal compactado no banco de estado: {compacted} registro(s)")
+    except Exception as e:
+        logger.error("Erro ao compactar o journal de estado", e)
+
+@tasks.loop(seconds=5)
+async def notification_flush_task():
+    """Task que envia os digests de notificações cuja janela expirou"""
+    try:
+        await notification_digest.flush_due()
+    except Exception as e:
+        logger.error("Erro ao enviar digests de notificações", e)
+
+# ====== MÉTRICAS ======
+
+NOTIFICATION_QUEUE_DEPTH = metrics.gauge("notification_queue_depth", "Eventos aguardando envio nos digests de notificação")
+API_CACHE_ENTRIES = metrics.gauge("roblox_api_cache_entries", "Respostas guardadas no cache da API")
+API_CACHE_HIT_RATIO = metrics.gauge("roblox_api_cache_hit_ratio", "Fração das requisições atendidas pelo cache")
+STATE_BYTES = metrics.gauge("state_store_bytes", "Tamanho em disco do estado persistido", ("file",))
+STATE_ENTRIES = metrics.gauge("state_resident_entries", "Entradas do estado residente em memória", ("kind",))
+STATE_DIRTY = metrics.gauge("state_dirty_keys", "Chaves alteradas aguardando gravação", ("kind",))
+PERSISTENCE_PENDING = metrics.gauge("persistence_pending_writes", "Gravações agendadas que ainda não começaram")
+GUILDS = metrics.gauge("guilds", "Servidores por situação", ("state",))
+TRACKED = metrics.gauge("tracked_entities", "Usuários e grupos monitorados nos servidores residentes", ("kind",))
+COMMAND_LIMITER_KEYS = metrics.gauge("command_rate_limiter_keys", "Chaves ativas no limitador de comandos", ("kind",))
+
+def collect_bot_metrics():
+    """Atualiza os gauges na hora da exportação (chamado pela thread do servidor HTTP: só leituras baratas)"""
+    NOTIFICATION_QUEUE_DEPTH.set(sum(len(entry["events"]) for entry in list(notification_digest.pending.values())))
+    API_CACHE_ENTRIES.set(len(api_client.cache))
+    API_CACHE_HIT_RATIO.set(round(api_client.cache_hit_rate(), 4))
+
+    sizes = resident_state.get_sizes()
+    for file_kind, size in {**state_store.file_sizes(), "journal_bytes": sizes["journal_bytes"],
+                            "snapshot_bytes": sizes["snapshot_bytes"]}.items():
+        STATE_BYTES.set(size, file=file_kind[:-len("_bytes")])
+    STATE_ENTRIES.set(sizes["resident_badge_users"], kind="badge_users")
+    STATE_ENTRIES.set(sizes["resident_presence"], kind="presence")
+    STATE_DIRTY.set(sizes["dirty_badge_users"], kind="badge_users")
+    STATE_DIRTY.set(sizes["dirty_presence"], kind="presence")
+    PERSISTENCE_PENDING.set(persistence_writer.pending_count())
+
+    resident_guilds = list(guild_data.values())
+    GUILDS.set(len(bot.guilds), state="joined")
+    GUILDS.set(len(resident_guilds), state="resident")
+    TRACKED.set(sum(len(guild_info.get("tracked_users", {})) for guild_info in resident_guilds), kind="users")
+    TRACKED.set(sum(len(guild_info.get("tracked_groups", {})) for guild_info in resident_guilds), kind="groups")
+
+    limiter_stats = rate_limiter.get_stats()
+    COMMAND_LIMITER_KEYS.set(limiter_stats["tracked_users"], kind="users")
+    COMMAND_LIMITER_KEYS.set(limiter_stats["tracked_guilds"], kind="guilds")
+    COMMAND_LIMITER_KEYS.set(limiter_stats["blocked_users"], kind="blocked_users")
+
+def bot_status() -> dict:
+    """Estado real da conexão do bot (para o /status)"""
+    ready = bot.is_ready() and not bot.is_closed()
+    return {
+        "status": "online" if ready else "offline",
+        "latency_ms": round(bot.latency * 1000) if ready and math.isfinite(bot.latency) else None,
+        "guilds": len(bot.guilds)
+    }
+
+def monitor_status(name: str, loop_task):
+    """Cria o provedor de estado de um monitor (task rodando, ciclos e intervalo efetivo)"""
+    def provider() -> dict:
+        monitor = cycle_monitors.get(name)
+        return {
+            "status": "active" if loop_task.is_running() else "stopped",
+            "cycles": monitor.stats["cycles"] if monitor else 0,
+            "last_duration": monitor.stats["last_duration"] if monitor else None,
+            "effective_interval": round(monitor.effective_interval, 2) if monitor else None,
+            "backpressure": monitor.backpressure if monitor else False
+        }
+    return provider
+
+metrics.register_collector(collect_bot_metrics)
+metrics.register_status("discord_bot", bot_status)
+metrics.register_status("event_loop", loop_monitor.get_stats)
+metrics.register_status("badge_monitor", monitor_status("badges", monitoring_badge_task))
+metrics.register_status("presence_monitor", monitor_status("presence", monitoring_presence_task))
+metrics.register_status("groups_monitor", monitor_status("groups", monitoring_groups_task))
 
 # ====== EXECUÇÃO DO BOT ======
 
+async def shutdown_bot():
+    """Desligamento gracioso: envia digests pendentes, grava o estado residente e fecha o bot"""
+    logger.info("🔴 Desligando bot: gravando estado pendente...")
+    try:
+        await notification_digest.flush_due(force=True)
+    except Exception as e:
+        logger.error("Erro ao enviar digests pendentes no desligamento", e)
+    try:
+        # Gravações na ordem da thread de persistência; o snapshot binário (que também faz o flush)
+        # permite que a próxima inicialização não precise carregar o banco inteiro
+        save_guild_data()
+        save_badge_checkpoint()
+        await persistence_writer.wait(persistence_writer.submit("state_snapshot", resident_state.write_snapshot))
+    except Exception as e:
+        logger.error("Erro ao gravar estado no desligamento", e)
+    await bot.close()
+
+def request_shutdown():
+    """Solicita o desligamento gracioso a partir de outra thread ou de um handler de sinal"""
+    try:
+        loop = bot.loop
+    except AttributeError:
+        loop = None
+    if loop and loop.is_running():
+        loop.call_soon_threadsafe(lambda: asyncio.ensure_future(shutdown_bot()))
+    else:
+        flush_state_now()
+
 def run_bot(token):
     """Função para executar o bot"""
     try:
         print("🚀 Iniciando bot Discord...")
+        # Abrir o banco (migração dos JSON antigos e recuperação do journal) antes de conectar
+        init_state()
         bot.run(token)
     except discord.LoginFailure:
         print("❌ Token do bot inválido! Verifique se o token está correto.")
@@ -1185,6 +1915,10 @@ def run_bot(token):
         print(f"❌ Erro HTTP ao conectar: {e}")
     except Exception as e:
         print(f"❌ Erro inesperado ao executar o bot: {e}")
+    finally:
+        # Concluir as gravações agendadas e garantir que nada alterado em memória fique sem gravar
+        persistence_writer.shutdown(wait=True)
+        flush_state_now()
 
 if __name__ == "__main__":
     BOT_TOKEN = os.getenv('DISCORD_BOT_TOKEN')
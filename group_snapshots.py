@@ -0,0 +1,260 @@
+"""
+Snapshots de membros dos grupos monitorados
+Cada snapshot guarda, por role, a contagem informada pela API e um array ordenado de IDs de usuários (int64)
+"""
+
+import os
+import sys
+import time
+import struct
+from array import array
+from typing import Dict, Any, List, Optional, Tuple
+
+from api_utils import api_client, get_group_roles_robust, get_role_members_robust, get_users_info_batch
+from config import GROUP_SNAPSHOT_CONFIG
+from sorted_ids import TYPECODE, to_sorted_array, diff_sorted, union_sorted
+from utils import logger
+
+SNAPSHOT_MAGIC = b'GSNP'
+SNAPSHOT_VERSION = 1
+# magic, versão, reservado, timestamp do snapshot, número de roles
+HEADER = struct.Struct('<4sHHdI')
+# role_id, memberCount informado pela API, quantidade de IDs gravados (-1 = role não enumerado)
+ROLE_HEADER = struct.Struct('<qqq')
+
+
+class GroupSnapshot:
+    """Membros de um grupo em um instante, separados por role"""
+
+    def __init__(self, group_id: int, roles: Dict[int, Dict[str, Any]], taken_at: float):
+        self.group_id = group_id
+        # {role_id: {"count": memberCount, "members": array('q') ordenado, ou None se o role não foi enumerado}}
+        self.roles = roles
+        self.taken_at = taken_at
+
+    def members(self) -> array:
+        """Todos os membros do grupo (união dos roles)"""
+        return union_sorted(role["members"] for role in self.roles.values() if role["members"] is not None)
+
+    def size_bytes(self) -> int:
+        """Tamanho aproximado do snapshot em disco"""
+        return HEADER.size + sum(
+            ROLE_HEADER.size + len(role["members"] or ()) * 8 for role in self.roles.values()
+        )
+
+
+class GroupSnapshotStore:
+    """Armazena snapshots de grupos, um arquivo binário por grupo"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, group_id: int) -> str:
+        return os.path.join(self.directory, f"{group_id}.bin")
+
+    def load(self, group_id: int) -> Optional[GroupSnapshot]:
+        """Carrega o snapshot de um grupo (None se não existir ou estiver corrompido)"""
+        path = self._path(group_id)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+
+            magic, version, _, taken_at, role_count = HEADER.unpack_from(data, 0)
+            if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+                raise ValueError(f"Formato de snapshot desconhecido: {magic!r} v{version}")
+
+            offset = HEADER.size
+            roles = {}
+            for _ in range(role_count):
+                role_id, reported_count, length = ROLE_HEADER.unpack_from(data, offset)
+                offset += ROLE_HEADER.size
+                if length < 0:
+                    roles[role_id] = {"count": reported_count, "members": None}
+                    continue
+                members = array(TYPECODE)
+                members.frombytes(data[offset:offset + length * 8])
+                if sys.byteorder == 'big':
+                    members.byteswap()
+                offset += length * 8
+                roles[role_id] = {"count": reported_count, "members": members}
+
+            return GroupSnapshot(group_id, roles, taken_at)
+
+        except (OSError, ValueError, struct.error) as e:
+            logger.error(f"Snapshot do grupo {group_id} inválido, será recriado", e)
+            return None
+
+    def save(self, snapshot: GroupSnapshot) -> bool:
+        """Grava o snapshot com escrita atômica (temp + rename)"""
+        path = self._path(snapshot.group_id)
+        temp_path = f"{path}.tmp"
+
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, 0, snapshot.taken_at, len(snapshot.roles)))
+                for role_id, role in snapshot.roles.items():
+                    members = role["members"]
+                    if members is None:
+                        f.write(ROLE_HEADER.pack(role_id, role["count"], -1))
+                        continue
+                    f.write(ROLE_HEADER.pack(role_id, role["count"], len(members)))
+                    if sys.byteorder == 'big':
+                        members = array(TYPECODE, members)
+                        members.byteswap()
+                    f.write(members.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+            os.replace(temp_path, path)
+            return True
+
+        except OSError as e:
+            logger.error(f"Erro ao salvar snapshot do grupo {snapshot.group_id}", e)
+            if os.path.exists(temp_path):
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+            return False
+
+    def group_ids(self) -> List[int]:
+        """IDs dos grupos com snapshot gravado"""
+        return [
+            int(name[:-len(".bin")]) for name in os.listdir(self.directory)
+            if name.endswith(".bin") and name[:-len(".bin")].isdigit()
+        ]
+
+    def delete(self, group_id: int) -> int:
+        """Remove o snapshot de um grupo. Returns: bytes liberados"""
+        path = self._path(group_id)
+        if not os.path.exists(path):
+            return 0
+        size = os.path.getsize(path)
+        os.remove(path)
+        return size
+
+
+snapshot_store = GroupSnapshotStore(GROUP_SNAPSHOT_CONFIG["directory"])
+
+
+def _record_refresh_calls(enumerated_roles: int):
+    """Registra os roles enumerados por grupo verificado (para o planejador de capacidade)"""
+    api_client.record_pages('group_refresh_roles', enumerated_roles)
+
+
+def _comparable_role_ids(old_roles: Dict[int, Dict[str, Any]], new_roles: Dict[int, Dict[str, Any]]) -> List[int]:
+    """
+    Roles que podem entrar no diff: enumerados nos dois snapshots, ou que existiam antes e sumiram
+    Um role que passou de só contagem para enumerado só ganha a linha de base (senão viraria uma entrada em massa)
+    """
+    role_ids = [
+        role_id for role_id, role in new_roles.items()
+        if role["members"] is not None and role_id in old_roles and old_roles[role_id]["members"] is not None
+    ]
+    role_ids += [role_id for role_id in old_roles if role_id not in new_roles]
+    return role_ids
+
+
+def _comparable_members(snapshot: GroupSnapshot, role_ids) -> array:
+    """Membros dos roles informados que foram enumerados no snapshot"""
+    return union_sorted(
+        snapshot.roles[role_id]["members"] for role_id in role_ids
+        if role_id in snapshot.roles and snapshot.roles[role_id]["members"] is not None
+    )
+
+
+def refresh_group_membership(group_id: int) -> Tuple[Optional[Dict[str, Any]], bool, Optional[str]]:
+    """
+    Atualiza o snapshot de membros do grupo e calcula quem entrou e saiu
+    A cada verificação busca a lista de roles (uma chamada) e só reenumera os roles cuja contagem mudou,
+    o que pega entradas e saídas simultâneas em roles diferentes mesmo com o total do grupo igual
+    (todos os roles são reenumerados quando o snapshot expira)
+    Returns: (mudanças, sucesso, erro) - mudanças é None quando não houve enumeração ou no primeiro snapshot
+    """
+    if not GROUP_SNAPSHOT_CONFIG["enabled"]:
+        return None, True, None
+
+    old_snapshot = snapshot_store.load(group_id)
+    stale = (old_snapshot is None
+             or time.time() - old_snapshot.taken_at >= GROUP_SNAPSHOT_CONFIG["refresh_interval_seconds"])
+
+    roles, success, error = get_group_roles_robust(group_id)
+    if not success:
+        return None, False, error
+
+    # O role Guest (rank 0) não tem membros listáveis
+    roles = [role for role in roles if role.get('id') and role.get('rank', 0) > 0]
+    max_role_members = GROUP_SNAPSHOT_CONFIG["max_role_members"]
+
+    new_roles = {}
+    usernames = {}
+    refreshed_roles = 0
+    for role in roles:
+        role_id = role['id']
+        member_count = role.get('memberCount', 0)
+        previous = old_snapshot.roles.get(role_id) if old_snapshot else None
+
+        # Roles grandes demais ficam apenas com a contagem
+        if member_count > max_role_members:
+            new_roles[role_id] = {"count": member_count, "members": None}
+            continue
+
+        # Contagem igual: reaproveitar os membros do snapshot anterior
+        if (not stale and previous is not None and previous["members"] is not None
+                and previous["count"] == member_count):
+            new_roles[role_id] = previous
+            continue
+
+        members, success, error = get_role_members_robust(group_id, role_id)
+        if not success:
+            return None, False, error
+        for member in members:
+            usernames[member['userId']] = member['username']
+        new_roles[role_id] = {
+            "count": member_count,
+            "members": to_sorted_array(member['userId'] for member in members)
+        }
+        refreshed_roles += 1
+
+    _record_refresh_calls(refreshed_roles)
+
+    # Nada mudou: manter o snapshot (e o horário dele, que controla a reenumeração completa)
+    counts = {role_id: role["count"] for role_id, role in new_roles.items()}
+    if not stale and counts == {role_id: role["count"] for role_id, role in old_snapshot.roles.items()}:
+        return None, True, None
+
+    new_snapshot = GroupSnapshot(group_id, new_roles, time.time() if stale else old_snapshot.taken_at)
+    snapshot_store.save(new_snapshot)
+
+    if old_snapshot is None:
+        logger.info(f"Snapshot inicial do grupo {group_id}: {len(new_roles)} roles")
+        return None, True, None
+
+    if refreshed_roles == 0:
+        return None, True, None
+
+    # Comparar apenas roles enumerados nos dois snapshots (roles só com contagem ficam de fora)
+    role_ids = _comparable_role_ids(old_snapshot.roles, new_roles)
+    joined, left = diff_sorted(
+        _comparable_members(old_snapshot, role_ids),
+        _comparable_members(new_snapshot, role_ids)
+    )
+    max_names = GROUP_SNAPSHOT_CONFIG["max_names_listed"]
+
+    # Quem saiu não aparece mais na listagem; buscar os nomes em lote
+    left_names = {}
+    if len(left) > 0:
+        users_info, _, _ = get_users_info_batch(list(left[:max_names]))
+        left_names = {user_id: info.get('name', f"User{user_id}") for user_id, info in users_info.items()}
+
+    return {
+        "joined": [(user_id, usernames.get(user_id, f"User{user_id}")) for user_id in joined[:max_names]],
+        "left": [(user_id, left_names.get(user_id, f"User{user_id}")) for user_id in left[:max_names]],
+        "joined_count": len(joined),
+        "left_count": len(left),
+        "refreshed_roles": refreshed_roles
+    }, True, None
@@ -0,0 +1,205 @@
+"""
+Journal append-only do estado do monitoramento
+Cada mudança de badges ou presença vira um registro binário com CRC32; o compactador incorpora o journal no SQLite
+"""
+
+import os
+import zlib
+import struct
+import threading
+from typing import Dict, Iterable, Iterator, Set, Tuple
+
+from utils import logger
+
+# crc32, tamanho do payload, tipo do registro
+RECORD_HEADER = struct.Struct('<IIB')
+RECORD_BADGES = 1
+RECORD_PRESENCE = 2
+# user_id, quantidade de badges adicionadas, quantidade de badges removidas (seguidas dos IDs int64)
+BADGES_PAYLOAD = struct.Struct('<qII')
+# user_id, status de presença
+PRESENCE_PAYLOAD = struct.Struct('<qb')
+
+
+def merge_badge_change(pending: Dict[str, Tuple[Set[int], Set[int]]], user_id: str,
+                       added: Iterable[int], removed: Iterable[int]):
+    """Acumula uma mudança de badges sobre as mudanças pendentes do usuário"""
+    added, removed = set(added), set(removed)
+    pending_added, pending_removed = pending.get(user_id, (set(), set()))
+    pending[user_id] = ((pending_added - removed) | added, (pending_removed - added) | removed)
+
+
+def encode_badges(user_id: str, added: Iterable[int], removed: Iterable[int]) -> bytes:
+    added, removed = list(added), list(removed)
+    payload = BADGES_PAYLOAD.pack(int(user_id), len(added), len(removed))
+    payload += struct.pack(f'<{len(added) + len(removed)}q', *added, *removed)
+    return _frame(RECORD_BADGES, payload)
+
+
+def encode_presence(user_id: str, status: int) -> bytes:
+    return _frame(RECORD_PRESENCE, PRESENCE_PAYLOAD.pack(int(user_id), int(status)))
+
+
+def _frame(record_type: int, payload: bytes) -> bytes:
+    crc = zlib.crc32(bytes([record_type]) + payload)
+    return RECORD_HEADER.pack(crc, len(payload), record_type) + payload
+
+
+class StateJournal:
+    """Arquivo de journal com escrita sequencial e recuperação até o último registro válido"""
+
+    def __init__(self, path: str, fsync: bool = True):
+        self.path = path
+        self.compacting_path = f"{path}.compacting"
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._file = None
+        self._truncate_to = None  # Tamanho válido a restaurar antes da próxima escrita (escrita parcial)
+        self.stats = {
+            "appends": 0,
+            "records_appended": 0,
+            "bytes_appended": 0,
+            "compactions": 0,
+            "records_compacted": 0,
+            "torn_tails": 0,
+            "torn_writes": 0
+        }
+
+    def _open(self):
+        if self._truncate_to is not None:
+            os.truncate(self.path, self._truncate_to)
+            self._truncate_to = None
+        if self._file is None:
+            self._file = open(self.path, 'ab')
+        return self._file
+
+    def _discard_partial_write(self, offset: int):
+        """Remove o frame incompleto de uma escrita que falhou, para não esconder os registros seguintes"""
+        self.stats["torn_writes"] += 1
+        try:
+            self._file.close()  # Pode tentar gravar o resto do buffer; o truncate abaixo descarta
+        except OSError:
+            pass
+        self._file = None
+        try:
+            os.truncate(self.path, offset)
+        except OSError as e:
+            self._truncate_to = offset
+            logger.error(f"Não foi possível truncar o journal em {offset} bytes; nova tentativa na próxima escrita", e)
+
+    def size_bytes(self) -> int:
+        """Tamanho atual do journal (inclui um journal em compactação)"""
+        return sum(os.path.getsize(path) for path in (self.path, self.compacting_path) if os.path.exists(path))
+
+    def append(self, badges: Dict[str, Tuple[Iterable[int], Iterable[int]]], presence: Dict[str, int]) -> int:
+        """
+        Anexa um lote de mudanças ao journal em uma única escrita sequencial
+        Returns: registros anexados
+        """
+        frames = [encode_badges(user_id, added, removed) for user_id, (added, removed) in badges.items()]
+        frames += [encode_presence(user_id, status) for user_id, status in presence.items()]
+        if not frames:
+            return 0
+
+        data = b''.join(frames)
+        with self._lock:
+            journal_file = self._open()
+            offset = journal_file.tell()
+            try:
+                journal_file.write(data)
+                journal_file.flush()
+                if self.fsync:
+                    os.fsync(journal_file.fileno())
+            except OSError:
+                self._discard_partial_write(offset)
+                raise
+
+        self.stats["appends"] += 1
+        self.stats["records_appended"] += len(frames)
+        self.stats["bytes_appended"] += len(data)
+        return len(frames)
+
+    def _read_records(self, path: str) -> Iterator[Tuple[int, tuple]]:
+        """Lê os registros válidos; um final truncado ou corrompido (crash durante a escrita) é descartado"""
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        offset = 0
+        while offset + RECORD_HEADER.size <= len(data):
+            crc, length, record_type = RECORD_HEADER.unpack_from(data, offset)
+            start = offset + RECORD_HEADER.size
+            payload = data[start:start + length]
+            if len(payload) < length or zlib.crc32(bytes([record_type]) + payload) != crc:
+                break
+
+            if record_type == RECORD_BADGES:
+                user_id, added_count, removed_count = BADGES_PAYLOAD.unpack_from(payload, 0)
+                ids = struct.unpack_from(f'<{added_count + removed_count}q', payload, BADGES_PAYLOAD.size)
+                yield record_type, (str(user_id), ids[:added_count], ids[added_count:])
+            elif record_type == RECORD_PRESENCE:
+                user_id, status = PRESENCE_PAYLOAD.unpack(payload)
+                yield record_type, (str(user_id), status)
+
+            offset = start + length
+
+        if offset < len(data):
+            self.stats["torn_tails"] += 1
+            logger.warning(f"Journal {path}: {len(data) - offset} byte(s) finais inválidos descartados")
+
+    def fold(self, path: str) -> Tuple[Dict[str, Tuple[Set[int], Set[int]]], Dict[str, int], int]:
+        """Reduz os registros do journal às mudanças líquidas por usuário"""
+        badges, presence, records = {}, {}, 0
+        for record_type, record in self._read_records(path):
+            records += 1
+            if record_type == RECORD_BADGES:
+                user_id, added, removed = record
+                merge_badge_change(badges, user_id, added, removed)
+            else:
+                user_id, status = record
+                presence[user_id] = status
+        return badges, presence, records
+
+    def compact_into(self, store) -> int:
+        """
+        Incorpora o journal no snapshot SQLite e o descarta
+        O journal atual é renomeado antes, então novas mudanças continuam sendo anexadas durante a compactação
+        Returns: registros compactados
+        """
+        with self._lock:
+            if not os.path.exists(self.compacting_path):
+                if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+                    return 0
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                if self._truncate_to is not None:
+                    os.truncate(self.path, self._truncate_to)
+                    self._truncate_to = None
+                os.replace(self.path, self.compacting_path)
+
+        # Aplicar é idempotente (INSERT OR IGNORE / DELETE / REPLACE): um crash aqui só repete a compactação
+        badges, presence, records = self.fold(self.compacting_path)
+        store.apply_badge_changes(badges)
+        store.save_presence(presence)
+        os.remove(self.compacting_path)
+
+        self.stats["compactions"] += 1
+        self.stats["records_compacted"] += records
+        return records
+
+    def recover_into(self, store) -> int:
+        """Na inicialização, reaplica no SQLite o que ficou no journal (inclusive uma compactação interrompida)"""
+        recovered = self.compact_into(store)  # journal em compactação, se houver
+        recovered += self.compact_into(store)  # journal atual
+        if recovered:
+            logger.info(f"🔁 Journal recuperado: {recovered} registro(s) reaplicados ao banco de estado")
+        return recovered
+
+    def get_stats(self) -> Dict[str, int]:
+        return {**self.stats, "size_bytes": self.size_bytes()}
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -1,4 +1,5 @@
-from flask import Flask, jsonify
+from flask import Flask, jsonify, Response, request
+import hmac
 import threading
 import time
 import requests
@@ -8,6 +9,9 @@ import atexit
 import signal
 import sys
 from datetime import datetime, timedelta
+from config import DEBUG_ENDPOINTS_TOKEN
+from metrics import metrics
+from tracing import tracer
 
 app = Flask(__name__)
 
@@ -32,27 +36,56 @@ def home():
     📶 Monitor Presença: Ativo
     """
 
+def is_diagnostics_request() -> bool:
+    """
+    Acesso aos endpoints de diagnóstico (expõem IDs monitorados e detalhes internos)
+    Com DEBUG_ENDPOINTS_TOKEN: header "Authorization: Bearer <token>"; sem token: apenas localhost sem proxy
+    """
+    if DEBUG_ENDPOINTS_TOKEN:
+        header = request.headers.get("Authorization", "")
+        return hmac.compare_digest(header.encode(), f"Bearer {DEBUG_ENDPOINTS_TOKEN}".encode())
+    return request.remote_addr in ("127.0.0.1", "::1") and "X-Forwarded-For" not in request.headers
+
+def diagnostics_denied():
+    return jsonify({"error": "unauthorized"}), 401
+
 @app.route('/status')
 def status():
-    """Endpoint de status - retorna JSON com informações detalhadas"""
+    """Endpoint de status - detalhes dos serviços só para requisições autorizadas"""
     uptime_seconds = time.time() - start_time
     
-    return jsonify({
+    result = {
         "status": "online",
         "message": "Monitor de badges e presença rodando",
         "uptime_seconds": round(uptime_seconds, 2),
         "uptime_formatted": get_uptime_formatted(),
-        "start_time": datetime.fromtimestamp(start_time).isoformat(),
-        "current_time": datetime.now().isoformat(),
-        "platform": "render" if is_render else "local",
-        "ping_stats": ping_stats,
-        "services": {
-            "flask_server": "online",
-            "discord_bot": "running",
-            "badge_monitor": "active",
-            "presence_monitor": "active"
-        }
-    })
+        "current_time": datetime.now().isoformat()
+    }
+    if is_diagnostics_request():
+        result.update({
+            "start_time": datetime.fromtimestamp(start_time).isoformat(),
+            "platform": "render" if is_render else "local",
+            "ping_stats": ping_stats,
+            "services": {
+                "flask_server": "online",
+                **metrics.status()  # Estado real informado pelo bot (conexão e monitores)
+            }
+        })
+    return jsonify(result)
+
+@app.route('/traces')
+def traces():
+    """Endpoint com os traces lentos recentes dos ciclos de monitoramento (JSON, autorizado)"""
+    if not is_diagnostics_request():
+        return diagnostics_denied()
+    return jsonify(tracer.dump())
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Endpoint de métricas no formato de texto do Prometheus (autorizado)"""
+    if not is_diagnostics_request():
+        return diagnostics_denied()
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4; charset=utf-8")
 
 @app.route('/health')
 def health():
@@ -172,10 +205,21 @@ def auto_ping_loop():
             time.sleep(60)  # Aguardar 1 minuto antes de tentar novamente
 
 # Handlers de shutdown
+shutdown_callbacks = []  # Funções chamadas no desligamento (ex: gravar estado pendente do bot)
+
+def register_shutdown_callback(callback):
+    """Registra uma função a ser chamada quando o sistema for desligado"""
+    shutdown_callbacks.append(callback)
+
 def shutdown_handler(signum=None, frame=None):
     """Handler chamado quando o sistema vai ser desligado"""
     print("\n🔴 Sistema sendo desligado...")
     log_system_event('shutdown', 'Bot de monitoramento foi desligado')
+    for callback in shutdown_callbacks:
+        try:
+            callback()
+        except Exception as e:
+            print(f"❌ Erro no callback de desligamento: {e}")
     time.sleep(1)  # Tempo para log
 
 def exit_handler():
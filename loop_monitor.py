@@ -0,0 +1,165 @@
+"""
+Detector de atraso (lag) do event loop e de chamadas bloqueantes
+Um heartbeat no loop mede o atraso; uma thread de vigia captura a pilha do loop quando ele fica travado
+"""
+
+import os
+import sys
+import time
+import asyncio
+import threading
+import traceback
+from typing import Any, Dict, List, Optional
+
+from config import LOOP_MONITOR_CONFIG
+from metrics import metrics
+from utils import logger, critical_notifier
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+LOOP_LAG_SECONDS = metrics.histogram(
+    "event_loop_lag_seconds", "Atraso do heartbeat do event loop",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+LOOP_BLOCKS = metrics.counter("event_loop_blocks_total", "Travamentos do event loop acima do limite", ("location",))
+LOOP_BLOCKED_SECONDS = metrics.counter(
+    "event_loop_blocked_seconds_total", "Tempo total de travamento do event loop por local", ("location",)
+)
+
+
+class LoopLagMonitor:
+    """Mede o lag do event loop continuamente e atribui os travamentos ao código que estava rodando"""
+
+    def __init__(self):
+        self.loop_thread_id: Optional[int] = None
+        self.deadline = 0.0  # Quando o próximo heartbeat deveria acontecer
+        self._captured_deadline = None  # Heartbeat ao qual a pilha capturada pertence
+        self._captured_stack: Optional[List[traceback.FrameSummary]] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._watcher: Optional[threading.Thread] = None
+        self._alert_tasks = set()
+        self.offenders: Dict[str, Dict[str, Any]] = {}  # {local: {"count", "total", "max", "stack"}}
+        self.stats = {"beats": 0, "blocks": 0, "max_lag": 0.0, "last_lag": 0.0}
+
+    def start(self):
+        """Inicia o heartbeat (no event loop atual) e a thread de vigia; chamadas repetidas são ignoradas"""
+        if not LOOP_MONITOR_CONFIG["enabled"] or self.is_running():
+            return self._heartbeat_task
+
+        self.loop_thread_id = threading.get_ident()
+        self.deadline = time.monotonic() + LOOP_MONITOR_CONFIG["interval_seconds"]
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch, daemon=True, name="LoopLagWatcher")
+            self._watcher.start()
+        logger.info("🫀 Detector de lag do event loop iniciado", {
+            "threshold": LOOP_MONITOR_CONFIG["block_threshold_seconds"]
+        })
+        return self._heartbeat_task
+
+    def is_running(self) -> bool:
+        """Heartbeat ativo (mesma interface das tasks do discord.ext, para o TaskWatchdog)"""
+        return bool(self._heartbeat_task and not self._heartbeat_task.done())
+
+    async def _heartbeat(self):
+        interval = LOOP_MONITOR_CONFIG["interval_seconds"]
+        while True:
+            self.deadline = time.monotonic() + interval
+            await asyncio.sleep(interval)
+            lag = max(0.0, time.monotonic() - self.deadline)
+
+            self.stats["beats"] += 1
+            self.stats["last_lag"] = round(lag, 4)
+            self.stats["max_lag"] = round(max(self.stats["max_lag"], lag), 4)
+            LOOP_LAG_SECONDS.observe(lag)
+
+            if lag >= LOOP_MONITOR_CONFIG["block_threshold_seconds"]:
+                self._record_block(lag)
+
+    def _watch(self):
+        """Thread de vigia: captura a pilha do event loop uma vez por travamento"""
+        threshold = LOOP_MONITOR_CONFIG["block_threshold_seconds"]
+        sample_interval = min(threshold / 2, LOOP_MONITOR_CONFIG["interval_seconds"])
+        while True:
+            time.sleep(sample_interval)
+            deadline = self.deadline
+            if time.monotonic() - deadline < threshold or self._captured_deadline == deadline:
+                continue
+
+            frame = sys._current_frames().get(self.loop_thread_id)
+            if frame is None:
+                continue
+            self._captured_stack = traceback.extract_stack(frame)
+            self._captured_deadline = deadline
+
+    def _culprit(self, stack: Optional[List[traceback.FrameSummary]]) -> str:
+        """Frame mais interno do próprio bot na pilha capturada (ou o mais interno, se não houver)"""
+        if not stack:
+            return "desconhecido"
+        for frame in reversed(stack):
+            if frame.filename.startswith(PROJECT_DIR) and not frame.filename.endswith("loop_monitor.py"):
+                return f"{os.path.basename(frame.filename)}:{frame.lineno} {frame.name}"
+        frame = stack[-1]
+        return f"{os.path.basename(frame.filename)}:{frame.lineno} {frame.name}"
+
+    def _record_block(self, lag: float):
+        stack = self._captured_stack if self._captured_deadline == self.deadline else None
+        location = self._culprit(stack)
+        self._captured_stack = None
+
+        self.stats["blocks"] += 1
+        LOOP_BLOCKS.inc(location=location)
+        LOOP_BLOCKED_SECONDS.inc(lag, location=location)
+
+        offender = self.offenders.get(location)
+        if offender is None:
+            if len(self.offenders) >= LOOP_MONITOR_CONFIG["max_offenders"]:
+                # Descartar o local com menor tempo total de travamento
+                del self.offenders[min(self.offenders, key=lambda key: self.offenders[key]["total"])]
+            offender = self.offenders[location] = {"count": 0, "total": 0.0, "max": 0.0, "stack": []}
+        formatted_stack = traceback.format_list(stack[-LOOP_MONITOR_CONFIG["stack_depth"]:]) if stack else []
+        offender["count"] += 1
+        offender["total"] += lag
+        if lag >= offender["max"]:
+            offender["max"] = lag
+            if formatted_stack:
+                offender["stack"] = formatted_stack
+
+        logger.warning(f"🐢 Event loop travado por {lag:.2f}s em {location}")
+
+        if lag >= LOOP_MONITOR_CONFIG["alert_threshold_seconds"]:
+            # Pilha deste travamento (a do offender é a do pior travamento já visto no local)
+            alert = asyncio.create_task(self._alert(lag, location, formatted_stack))
+            self._alert_tasks.add(alert)
+            alert.add_done_callback(self._alert_tasks.discard)
+
+    async def _alert(self, lag: float, location: str, stack: List[str]):
+        worst = self.worst_offenders(3)
+        await critical_notifier.notify_owner(
+            "🐢 Event Loop Travado",
+            f"O event loop ficou **{lag:.1f}s** sem responder (heartbeat do Discord em risco).\n"
+            f"Local: `{location}`\n```\n{''.join(stack)[-1500:] or 'pilha não capturada'}\n```",
+            "event_loop_lag",
+            {
+                f"#{index} {entry['location']}"[:256]: f"{entry['count']}x, total {entry['total']:.1f}s, máx {entry['max']:.1f}s"
+                for index, entry in enumerate(worst, 1)
+            }
+        )
+
+    def worst_offenders(self, limit: int = 5) -> List[Dict[str, Any]]:
+        """Locais que mais travaram o event loop (por tempo total)"""
+        ranked = sorted(list(self.offenders.items()), key=lambda item: item[1]["total"], reverse=True)[:limit]
+        return [
+            {"location": location, "count": entry["count"], "total": round(entry["total"], 3), "max": round(entry["max"], 3)}
+            for location, entry in ranked
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "running": self.is_running(),
+            "worst_offenders": self.worst_offenders(3)
+        }
+
+
+loop_monitor = LoopLagMonitor()
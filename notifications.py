@@ -0,0 +1,161 @@
+"""
+Sistema de notificações em lote (digest) para o bot Discord Roblox Monitor
+Agrupa eventos do mesmo canal em uma única mensagem para reduzir spam e chamadas à API do Discord
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, Any, List
+
+import discord
+
+from config import NOTIFICATION_CONFIG, COLORS
+from utils import logger
+from tracing import span
+
+# Limites impostos pelo Discord
+DISCORD_MAX_EMBEDS_PER_MESSAGE = 10
+DISCORD_MAX_DESCRIPTION_LENGTH = 4096
+DISCORD_MAX_EMBED_CHARS_PER_MESSAGE = 6000  # Soma dos textos de todos os embeds da mensagem
+
+
+class NotificationDigest:
+    """Agrupa notificações por canal e envia em lotes"""
+
+    def __init__(self):
+        # {channel_id: {"channel": canal, "events": [...], "first_at": timestamp, "settings": {...}}}
+        self.pending: Dict[int, Dict[str, Any]] = {}
+        self.lock = asyncio.Lock()
+        self.stats = {
+            'events_queued': 0,
+            'messages_sent': 0,
+            'summaries_sent': 0,
+            'send_errors': 0
+        }
+
+    @staticmethod
+    def settings_from_config(guild_config: Dict[str, Any]) -> Dict[str, Any]:
+        """Extrai as configurações de digest do config do servidor"""
+        return {key: guild_config.get(key, default) for key, default in NOTIFICATION_CONFIG.items()}
+
+    def queue_depth(self) -> int:
+        """Número total de eventos aguardando envio"""
+        return sum(len(entry["events"]) for entry in self.pending.values())
+
+    async def notify(self, channel, embed: discord.Embed, summary_line: str, settings: Dict[str, Any]):
+        """Envia uma notificação imediatamente ou a coloca no digest do canal"""
+        if not settings.get("digest_enabled", False):
+            await self._send(channel, embeds=[embed])
+            await asyncio.sleep(1)  # Delay entre notificações
+            return
+
+        async with self.lock:
+            entry = self.pending.get(channel.id)
+            if entry is None:
+                entry = {
+                    "channel": channel,
+                    "events": [],
+                    "first_at": time.time(),
+                    "settings": settings
+                }
+                self.pending[channel.id] = entry
+            entry["settings"] = settings  # Vale a configuração mais recente do servidor
+            entry["events"].append({"embed": embed, "summary": summary_line})
+            self.stats['events_queued'] += 1
+
+    async def update_settings(self, guild_id: int, settings: Dict[str, Any]):
+        """Aplica novas configurações aos digests pendentes dos canais do servidor"""
+        async with self.lock:
+            for entry in self.pending.values():
+                if getattr(getattr(entry["channel"], "guild", None), "id", None) == guild_id:
+                    entry["settings"] = settings
+
+    async def flush_due(self, force: bool = False):
+        """Envia os digests cuja janela de agrupamento já expirou"""
+        now = time.time()
+        async with self.lock:
+            due = [
+                channel_id for channel_id, entry in self.pending.items()
+                if force or now - entry["first_at"] >= entry["settings"].get("digest_window_seconds", 0)
+            ]
+            entries = [self.pending.pop(channel_id) for channel_id in due]
+
+        for entry in entries:
+            await self._flush_entry(entry)
+
+    async def _flush_entry(self, entry: Dict[str, Any]):
+        """Envia os eventos acumulados de um canal"""
+        channel = entry["channel"]
+        events = entry["events"]
+        settings = entry["settings"]
+
+        if not events:
+            return
+
+        if len(events) > settings.get("digest_summary_threshold", DISCORD_MAX_EMBEDS_PER_MESSAGE):
+            await self._send(channel, embeds=[self.build_summary_embed(events, settings)])
+            self.stats['summaries_sent'] += 1
+            return
+
+        max_embeds = min(settings.get("digest_max_embeds", DISCORD_MAX_EMBEDS_PER_MESSAGE), DISCORD_MAX_EMBEDS_PER_MESSAGE)
+        chunks = self.pack_chunks(events, max_embeds)
+        for index, chunk in enumerate(chunks):
+            if not await self._send(channel, embeds=[event["embed"] for event in chunk]):
+                # Lote recusado (ex.: embed acima dos limites): não perder os eventos, mandar o resumo
+                await self._send(channel, embeds=[self.build_summary_embed(chunk, settings)])
+                self.stats['summaries_sent'] += 1
+            if index < len(chunks) - 1:
+                await asyncio.sleep(1)  # Delay entre mensagens do mesmo canal
+
+    @staticmethod
+    def pack_chunks(events: List[Dict[str, Any]], max_embeds: int) -> List[List[Dict[str, Any]]]:
+        """Divide os eventos em mensagens respeitando o limite de embeds e de caracteres por mensagem"""
+        chunks = []
+        chunk, chunk_chars = [], 0
+        for event in events:
+            embed_chars = len(event["embed"])
+            if chunk and (len(chunk) >= max_embeds or chunk_chars + embed_chars > DISCORD_MAX_EMBED_CHARS_PER_MESSAGE):
+                chunks.append(chunk)
+                chunk, chunk_chars = [], 0
+            chunk.append(event)
+            chunk_chars += embed_chars
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    @staticmethod
+    def build_summary_embed(events: List[Dict[str, Any]], settings: Dict[str, Any]) -> discord.Embed:
+        """Cria um embed de resumo listando os eventos do digest"""
+        max_lines = settings.get("digest_summary_max_lines", 25)
+        lines = [event["summary"] for event in events[:max_lines]]
+        remaining = len(events) - len(lines)
+        if remaining > 0:
+            lines.append(f"… e mais {remaining} evento(s)")
+
+        description = "\n".join(lines)
+        if len(description) > DISCORD_MAX_DESCRIPTION_LENGTH:
+            description = description[:DISCORD_MAX_DESCRIPTION_LENGTH - 1] + "…"
+
+        return discord.Embed(
+            title=f"📬 Resumo de Notificações ({len(events)} eventos)",
+            description=description,
+            color=COLORS["info"],
+            timestamp=datetime.utcnow()
+        )
+
+    async def _send(self, channel, embeds: List[discord.Embed]) -> bool:
+        """Envia uma mensagem com um ou mais embeds"""
+        try:
+            with span("discord_send", embeds=len(embeds)):
+                await channel.send(embeds=embeds)
+            self.stats['messages_sent'] += 1
+            return True
+        except Exception as e:
+            self.stats['send_errors'] += 1
+            logger.error(f"Erro ao enviar notificação para o canal {getattr(channel, 'id', None)}", e)
+            return False
+
+
+# Instância global do digest
+notification_digest = NotificationDigest()
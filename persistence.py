@@ -0,0 +1,91 @@
+"""
+Gravação de estado fora do event loop
+Uma thread dedicada executa as gravações em ordem; pedidos repetidos para a mesma chave são agrupados
+"""
+
+import time
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from utils import logger
+
+
+class PersistenceWriter:
+    """Executor de gravações com uma única thread, que junta pedidos pendentes da mesma chave"""
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="PersistenceWriter")
+        self._lock = threading.Lock()
+        self._pending = {}  # {chave: [função, argumentos, future]} ainda não iniciados
+        self.stats = {
+            "submitted": 0,
+            "coalesced": 0,
+            "completed": 0,
+            "errors": 0,
+            "last_duration": {},
+            "max_duration": {}
+        }
+
+    def submit(self, key: str, func: Callable[..., Any], *args) -> Future:
+        """
+        Agenda uma gravação. Se já houver uma gravação pendente da mesma chave, ela passa a usar
+        os argumentos mais recentes e o mesmo future é devolvido
+        """
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending:
+                pending[0], pending[1] = func, args
+                self.stats["coalesced"] += 1
+                return pending[2]
+
+            future = Future()
+            self._pending[key] = [func, args, future]
+            self.stats["submitted"] += 1
+
+        self._executor.submit(self._run, key)
+        return future
+
+    def _run(self, key: str):
+        with self._lock:
+            func, args, future = self._pending.pop(key)
+
+        if not future.set_running_or_notify_cancel():
+            return
+
+        started = time.perf_counter()
+        try:
+            result = func(*args)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Erro na gravação em segundo plano: {key}", e)
+            future.set_exception(e)
+        else:
+            self.stats["completed"] += 1
+            future.set_result(result)
+        finally:
+            # Agregado pelo prefixo da chave ("guild_data:123" -> "guild_data"), para não crescer com os servidores
+            kind = key.split(":", 1)[0]
+            duration = round(time.perf_counter() - started, 4)
+            self.stats["last_duration"][kind] = duration
+            self.stats["max_duration"][kind] = max(duration, self.stats["max_duration"].get(kind, 0.0))
+
+    async def wait(self, future: Future) -> Any:
+        """Aguarda uma gravação sem bloquear o event loop (para quem precisa de durabilidade)"""
+        return await asyncio.wrap_future(future)
+
+    def pending_count(self) -> int:
+        """Gravações agendadas que ainda não começaram"""
+        with self._lock:
+            return len(self._pending)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "pending": self.pending_count()}
+
+    def shutdown(self, wait: bool = True):
+        """Encerra a thread de gravação (após concluir o que já foi agendado)"""
+        self._executor.shutdown(wait=wait)
+
+
+persistence_writer = PersistenceWriter()
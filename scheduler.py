@@ -0,0 +1,295 @@
+"""
+Agendamento dos ciclos de monitoramento
+Detecção de estouro de ciclo, backpressure, checkpoints e fila justa entre servidores
+"""
+
+import time
+import bisect
+import heapq
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, Optional, Iterable, Iterator, Tuple
+
+from config import MONITORING_CONFIG, CHECKPOINT_FILE
+from utils import logger, safe_json_load, safe_json_save
+from metrics import metrics, CYCLE_BUCKETS
+
+CYCLE_SECONDS = metrics.histogram(
+    "monitor_cycle_seconds", "Duração dos ciclos de monitoramento", ("monitor",), CYCLE_BUCKETS
+)
+CYCLE_OVERRUNS = metrics.counter("monitor_cycle_overruns_total", "Ciclos que estouraram o intervalo efetivo", ("monitor",))
+CYCLE_INTERVAL = metrics.gauge("monitor_effective_interval_seconds", "Intervalo efetivo atual do monitor", ("monitor",))
+
+
+class CycleMonitor:
+    """Mede a duração dos ciclos de uma task e ajusta o intervalo efetivo em caso de sobrecarga"""
+
+    def __init__(self, name: str, base_interval: float):
+        self.name = name
+        self.base_interval = base_interval
+        self.effective_interval = base_interval
+        self.floor_interval = base_interval  # Piso definido pelo planejador de capacidade
+        self.backpressure = False
+        self.consecutive_overruns = 0
+        self.cycle_started_at: Optional[float] = None
+        self.durations = deque(maxlen=MONITORING_CONFIG["cycle_history_size"])
+        self.stats = {
+            'cycles': 0,
+            'overruns': 0,
+            'deferred_users': 0,
+            'last_duration': 0.0,
+            'max_duration': 0.0,
+            'last_lag': 0.0
+        }
+
+    @property
+    def max_interval(self) -> float:
+        """Maior intervalo efetivo permitido"""
+        return self.base_interval * MONITORING_CONFIG["max_interval_multiplier"]
+
+    def start_cycle(self):
+        """Marca o início de um ciclo"""
+        self.cycle_started_at = time.monotonic()
+
+    def end_cycle(self, deferred: int = 0) -> Dict[str, Any]:
+        """
+        Marca o fim de um ciclo e recalcula o intervalo efetivo
+        Returns: resumo do ciclo (duração, estouro, intervalo)
+        """
+        if self.cycle_started_at is None:
+            return {}
+
+        duration = time.monotonic() - self.cycle_started_at
+        self.cycle_started_at = None
+
+        self.durations.append(duration)
+        self.stats['cycles'] += 1
+        self.stats['deferred_users'] += deferred
+        self.stats['last_duration'] = round(duration, 2)
+        self.stats['max_duration'] = round(max(self.stats['max_duration'], duration), 2)
+        CYCLE_SECONDS.observe(duration, monitor=self.name)
+
+        previous_interval = self.effective_interval
+        overrun = duration > self.effective_interval
+
+        if overrun:
+            self.stats['overruns'] += 1
+            CYCLE_OVERRUNS.inc(monitor=self.name)
+            self.stats['last_lag'] = round(duration - self.effective_interval, 2)
+            self.consecutive_overruns += 1
+            self.backpressure = True
+            self.effective_interval = min(
+                max(duration * MONITORING_CONFIG["overrun_stretch_factor"], self.effective_interval),
+                self.max_interval
+            )
+            logger.warning(f"Ciclo de {self.name} estourou o intervalo", {
+                "duration": round(duration, 2),
+                "interval": round(previous_interval, 2),
+                "new_interval": round(self.effective_interval, 2),
+                "deferred": deferred
+            })
+        else:
+            self.consecutive_overruns = 0
+            # Relaxar o intervalo gradualmente enquanto houver folga
+            if duration < self.effective_interval * MONITORING_CONFIG["relax_threshold"]:
+                self.effective_interval = max(
+                    self.floor_interval,
+                    self.effective_interval / MONITORING_CONFIG["overrun_stretch_factor"]
+                )
+                if self.effective_interval == self.floor_interval:
+                    self.backpressure = False
+
+        CYCLE_INTERVAL.set(self.effective_interval, monitor=self.name)
+        return {
+            "duration": duration,
+            "overrun": overrun,
+            "interval_changed": self.effective_interval != previous_interval,
+            "effective_interval": self.effective_interval
+        }
+
+    def set_floor_interval(self, seconds: float) -> bool:
+        """
+        Define o menor intervalo efetivo permitido (nunca abaixo do intervalo base)
+        Returns: True se o intervalo efetivo mudou
+        """
+        self.floor_interval = min(max(self.base_interval, seconds), self.max_interval)
+        previous_interval = self.effective_interval
+        if self.effective_interval < self.floor_interval:
+            self.effective_interval = self.floor_interval
+        return self.effective_interval != previous_interval
+
+    def should_alert(self) -> bool:
+        """Indica se os estouros consecutivos justificam um alerta ao proprietário"""
+        return self.consecutive_overruns >= MONITORING_CONFIG["overrun_alert_after"]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas dos ciclos"""
+        average = sum(self.durations) / len(self.durations) if self.durations else 0
+        return {
+            **self.stats,
+            'average_duration': round(average, 2),
+            'base_interval': self.base_interval,
+            'effective_interval': round(self.effective_interval, 2),
+            'floor_interval': round(self.floor_interval, 2),
+            'backpressure': self.backpressure
+        }
+
+
+class PriorityDeferral:
+    """Decide quais usuários de baixa prioridade podem ser adiados sob backpressure"""
+
+    def __init__(self):
+        self.last_checked: Dict[str, float] = {}  # {roblox_id_str: timestamp}
+
+    def mark_checked(self, roblox_id_str: str):
+        """Registra que o usuário foi verificado agora"""
+        self.last_checked[roblox_id_str] = time.time()
+
+    def should_defer(self, roblox_id_str: str, presence_status: int) -> bool:
+        """Usuários offline verificados recentemente são adiados (sem nunca passar do limite de espera)"""
+        if presence_status != 0:
+            return False
+        last_checked = self.last_checked.get(roblox_id_str)
+        if last_checked is None:
+            return False
+        return time.time() - last_checked < MONITORING_CONFIG["low_priority_max_defer_seconds"]
+
+    def forget(self, tracked_ids):
+        """Remove usuários que não são mais monitorados"""
+        for roblox_id_str in list(self.last_checked):
+            if roblox_id_str not in tracked_ids:
+                del self.last_checked[roblox_id_str]
+
+
+class CycleCheckpoint:
+    """Checkpoint persistente do progresso de um ciclo (cursores por servidor na ordem de usuários)"""
+
+    def __init__(self, name: str, file_path: str = CHECKPOINT_FILE):
+        self.name = name
+        self.file_path = file_path
+        self.state: Optional[Dict[str, Any]] = None
+
+    def _load(self) -> Dict[str, Any]:
+        """Carrega o checkpoint do disco (apenas na primeira vez)"""
+        if self.state is None:
+            data = safe_json_load(self.file_path, {})
+            self.state = data.get(self.name, {})
+            self.state.setdefault("guild_cursors", {})
+            self.state.setdefault("completed_cycles", 0)
+            if self.state["guild_cursors"]:
+                logger.info(f"Checkpoint de {self.name} carregado: {len(self.state['guild_cursors'])} cursor(es) de servidor")
+        return self.state
+
+    def snapshot_state(self) -> Dict[str, Any]:
+        """Cópia do estado atual, para ser gravada fora do event loop"""
+        state = self._load()
+        return {
+            "guild_cursors": dict(state["guild_cursors"]),
+            "completed_cycles": state["completed_cycles"],
+            "updated_at": datetime.now().isoformat()
+        }
+
+    def persist(self, state: Dict[str, Any]):
+        """Grava no disco um estado obtido com snapshot_state"""
+        data = safe_json_load(self.file_path, {})
+        data[self.name] = state
+        safe_json_save(self.file_path, data)
+
+    def guild_cursors(self) -> Dict[str, str]:
+        """Último usuário processado de cada servidor"""
+        return self._load()["guild_cursors"]
+
+    def set_cursor(self, guild_id: str, roblox_id_str: str):
+        """Atualiza o cursor de um servidor (em memória)"""
+        self.guild_cursors()[guild_id] = roblox_id_str
+
+    def save(self):
+        """Salva os cursores atuais (síncrono)"""
+        self.persist(self.snapshot_state())
+
+    def complete_cycle(self, active_guild_ids: Iterable[str]):
+        """Marca o ciclo como completo (em memória), descartando cursores de servidores sem usuários"""
+        state = self._load()
+        active = set(active_guild_ids)
+        state["guild_cursors"] = {gid: cursor for gid, cursor in state["guild_cursors"].items() if gid in active}
+        state["completed_cycles"] += 1
+
+
+class FairShareScheduler:
+    """
+    Escalonador de fila justa ponderada (WFQ) entre servidores
+    Cada servidor tem sua fila de usuários (retomada do seu cursor), um peso e um limite por ciclo
+    """
+
+    def __init__(self, checkpoint: CycleCheckpoint):
+        self.checkpoint = checkpoint
+        self.stats = {'last_served': {}}
+
+    def plan(
+        self,
+        guild_users: Dict[str, Iterable[str]],
+        weights: Dict[str, float],
+        caps: Dict[str, int]
+    ) -> Iterator[Tuple[str, str]]:
+        """
+        Gera (roblox_id_str, guild_id) na ordem de atendimento do ciclo
+        O servidor com menor tempo virtual (atendidos / peso) é sempre o próximo
+        """
+        cursors = self.checkpoint.guild_cursors()
+        queues: Dict[str, deque] = {}
+
+        for guild_id, users in guild_users.items():
+            order = sorted(users, key=int)
+            cursor = cursors.get(guild_id)
+            if cursor is not None and order:
+                start = bisect.bisect_right([int(user_id) for user_id in order], int(cursor))
+                order = order[start:] + order[:start]
+            if order:
+                queues[guild_id] = deque(order)
+
+        heap = [(0.0, guild_id) for guild_id in queues]
+        heapq.heapify(heap)
+        scheduled = set()
+        served: Dict[str, int] = {guild_id: 0 for guild_id in queues}
+
+        while heap:
+            _, guild_id = heapq.heappop(heap)
+            queue = queues[guild_id]
+
+            # Usuários compartilhados já atendidos por outro servidor não consomem a cota deste
+            while queue and queue[0] in scheduled:
+                self.checkpoint.set_cursor(guild_id, queue.popleft())
+            if not queue:
+                continue
+
+            roblox_id_str = queue.popleft()
+            scheduled.add(roblox_id_str)
+            served[guild_id] += 1
+            yield roblox_id_str, guild_id
+
+            cap = caps.get(guild_id) or 0
+            if queue and not (cap and served[guild_id] >= cap):
+                weight = max(weights.get(guild_id, 1.0), 0.1)
+                heapq.heappush(heap, (served[guild_id] / weight, guild_id))
+
+        self.stats['last_served'] = served
+
+    def mark_done(self, guild_id: str, roblox_id_str: str):
+        """Avança o cursor do servidor após processar o usuário"""
+        self.checkpoint.set_cursor(guild_id, roblox_id_str)
+
+
+# Monitores de ciclo das tasks
+cycle_monitors: Dict[str, CycleMonitor] = {}
+
+
+def get_cycle_monitor(name: str, base_interval: float) -> CycleMonitor:
+    """Obtém (ou cria) o monitor de ciclo de uma task"""
+    if name not in cycle_monitors:
+        cycle_monitors[name] = CycleMonitor(name, base_interval)
+    return cycle_monitors[name]
+
+
+badge_deferral = PriorityDeferral()
+badge_checkpoint = CycleCheckpoint("badges")
+badge_scheduler = FairShareScheduler(badge_checkpoint)
@@ -0,0 +1,59 @@
+"""
+Conjuntos compactos de IDs inteiros
+Arrays ordenados de inteiros de 64 bits (array('q')) com busca binária e diff por merge
+"""
+
+import bisect
+from array import array
+from typing import Iterable, Tuple
+
+TYPECODE = 'q'
+
+
+def to_sorted_array(values: Iterable[int]) -> array:
+    """Cria um array ordenado e sem duplicatas a partir de inteiros"""
+    return array(TYPECODE, sorted(set(values)))
+
+
+def contains(sorted_ids: array, value: int) -> bool:
+    """Verifica se o valor está no array ordenado (busca binária)"""
+    index = bisect.bisect_left(sorted_ids, value)
+    return index < len(sorted_ids) and sorted_ids[index] == value
+
+
+def diff_sorted(old: array, new: array) -> Tuple[array, array]:
+    """
+    Compara dois arrays ordenados em uma única passada (merge)
+    Returns: (adicionados, removidos)
+    """
+    added = array(TYPECODE)
+    removed = array(TYPECODE)
+    i, j = 0, 0
+    len_old, len_new = len(old), len(new)
+
+    while i < len_old and j < len_new:
+        old_value, new_value = old[i], new[j]
+        if old_value == new_value:
+            i += 1
+            j += 1
+        elif old_value < new_value:
+            removed.append(old_value)
+            i += 1
+        else:
+            added.append(new_value)
+            j += 1
+
+    if i < len_old:
+        removed.extend(old[i:])
+    if j < len_new:
+        added.extend(new[j:])
+
+    return added, removed
+
+
+def union_sorted(arrays: Iterable[array]) -> array:
+    """União de vários arrays ordenados"""
+    merged = array(TYPECODE)
+    for ids in arrays:
+        merged.extend(ids)
+    return to_sorted_array(merged)
@@ -0,0 +1,72 @@
+"""
+Coleta de lixo do estado do monitoramento
+Remove (e arquiva) badges, presença e snapshots de grupos de usuários e grupos que nenhum servidor monitora mais
+"""
+
+import os
+from datetime import datetime
+from typing import Dict, Any, Iterable, Set, Tuple
+
+from config import ARCHIVE_DIR
+from group_snapshots import snapshot_store
+from state_store import state_store, resident_state
+from utils import logger
+
+
+def find_orphans(tracked_users: Set[str], tracked_groups: Set[str], resident_guild_ids: Iterable[str],
+                 resident_user_ids: Set[str]) -> Tuple[Set[str], Set[int], Set[str]]:
+    """
+    Encontra usuários e grupos sem nenhum servidor que os monitore
+    tracked_*: monitorados pelos servidores residentes; os servidores só no banco são lidos aqui
+    Returns: (usuários órfãos, grupos órfãos, todos os usuários monitorados)
+    """
+    stored_users, stored_groups = state_store.tracked_ids(exclude_guild_ids=resident_guild_ids)
+    all_users = tracked_users | stored_users
+    all_groups = tracked_groups | stored_groups
+
+    known_users = state_store.badge_user_ids() | state_store.presence_user_ids() | resident_user_ids
+    orphan_users = known_users - all_users
+    orphan_groups = {group_id for group_id in snapshot_store.group_ids() if str(group_id) not in all_groups}
+    return orphan_users, orphan_groups, all_users
+
+
+def remove_orphans(orphan_users: Set[str], orphan_groups: Set[int], archive: bool = True) -> Dict[str, Any]:
+    """
+    Remove do banco e do disco o estado órfão (rodar fora do event loop, depois de forget_users)
+    Returns: relatório do que foi liberado
+    """
+    # Mudanças pendentes no journal precisam chegar ao banco antes de apagar, senão voltariam na compactação
+    resident_state.flush()
+    resident_state.compact()
+
+    db_bytes_before = state_store.get_stats()["db_bytes"]
+    archive_path = None
+    if archive and orphan_users:
+        archive_path = os.path.join(ARCHIVE_DIR, f"orphans_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json.gz")
+
+    removed = state_store.remove_users(orphan_users, archive_path)
+
+    snapshot_bytes = 0
+    for group_id in orphan_groups:
+        snapshot_bytes += snapshot_store.delete(group_id)
+
+    report = {
+        **removed,
+        "groups": len(orphan_groups),
+        "group_snapshot_bytes": snapshot_bytes,
+        "db_bytes_before": db_bytes_before,
+        "db_bytes_after": state_store.get_stats()["db_bytes"],
+        "archive": archive_path
+    }
+    logger.info("🧹 Coleta de estado órfão concluída", report)
+    return report
+
+
+def format_gc_report(report: Dict[str, Any]) -> str:
+    """Formata o relatório da coleta para exibição"""
+    return (
+        f"👤 {report['users']} usuário(s) órfão(s): {report['badge_rows']} badge(s), "
+        f"{report['presence_rows']} presença(s)\n"
+        f"👥 {report['groups']} grupo(s): {report['group_snapshot_bytes'] / 1024:.1f} KB de snapshots\n"
+        f"📦 Arquivo: {os.path.basename(report['archive']) if report['archive'] else 'não gerado'}"
+    )
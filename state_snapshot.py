@@ -0,0 +1,268 @@
+"""
+Snapshot binário do estado de badges e presença, lido via mmap
+Cabeçalho fixo + índice ordenado de usuários + arrays de int64; as badges de cada usuário são lidas sob demanda
+Uso: python state_snapshot.py export <diretório> | import <diretório> (JSON no formato antigo)
+"""
+
+import os
+import sys
+import mmap
+import json
+import time
+import bisect
+import struct
+from array import array
+from typing import Dict, Any, Optional
+
+from sorted_ids import TYPECODE
+from utils import logger
+
+SNAPSHOT_MAGIC = b'BSNP'
+SNAPSHOT_VERSION = 1
+# magic, versão do formato, reservado, versão do estado, criado em, usuários com badges, usuários com presença, total de badges
+HEADER = struct.Struct('<4sHHqdQQQ')
+# Seções após o cabeçalho (int64 little-endian):
+# user_ids[usuários] | offsets[usuários] | counts[usuários] | badge_ids[total] | presence_user_ids[presença] | presence_status[presença]
+ITEM_SIZE = 8
+
+
+def write_snapshot(path: str, state_version: int, user_ids: array, counts: array, badge_ids: array,
+                   presence_user_ids: array, presence_status: array) -> int:
+    """Grava o snapshot com escrita atômica (temp + rename). Returns: bytes gravados"""
+    offsets = array(TYPECODE)
+    position = 0
+    for count in counts:
+        offsets.append(position)
+        position += count
+
+    sections = [user_ids, offsets, counts, badge_ids, presence_user_ids, presence_status]
+    if sys.byteorder != 'little':
+        sections = [array(TYPECODE, section) for section in sections]
+        for section in sections:
+            section.byteswap()
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(HEADER.pack(
+            SNAPSHOT_MAGIC, SNAPSHOT_VERSION, 0, state_version, time.time(),
+            len(user_ids), len(presence_user_ids), len(badge_ids)
+        ))
+        for section in sections:
+            f.write(section.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+        size = f.tell()
+
+    os.replace(temp_path, path)
+    return size
+
+
+class StateSnapshot:
+    """Snapshot mapeado em memória; nada é decodificado até ser consultado"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise
+
+        (magic, version, _, self.state_version, self.created_at,
+         self.user_count, self.presence_count, self.badge_count) = HEADER.unpack_from(self._mmap, 0)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            self.close()
+            raise ValueError(f"Formato de snapshot desconhecido: {magic!r} v{version}")
+
+        expected = HEADER.size + ITEM_SIZE * (3 * self.user_count + self.badge_count + 2 * self.presence_count)
+        if len(self._mmap) != expected:
+            self.close()
+            raise ValueError(f"Snapshot truncado: {len(self._mmap)} bytes, esperado {expected}")
+
+        self._raw = memoryview(self._mmap)
+        offset = HEADER.size
+        self._sections = {}
+        for name, length in (("user_ids", self.user_count), ("offsets", self.user_count),
+                             ("counts", self.user_count), ("badge_ids", self.badge_count),
+                             ("presence_user_ids", self.presence_count), ("presence_status", self.presence_count)):
+            self._sections[name] = (offset, length)
+            offset += length * ITEM_SIZE
+
+        start, length = self._sections["user_ids"]
+        self._user_ids = self._raw[start:start + length * ITEM_SIZE].cast(TYPECODE)
+
+    def _int_at(self, section: str, index: int) -> int:
+        start, _ = self._sections[section]
+        return struct.unpack_from('<q', self._raw, start + index * ITEM_SIZE)[0]
+
+    def _find(self, user_id: int) -> int:
+        index = bisect.bisect_left(self._user_ids, user_id)
+        if index < self.user_count and self._user_ids[index] == user_id:
+            return index
+        return -1
+
+    def contains(self, user_id: str) -> bool:
+        return self._find(int(user_id)) >= 0
+
+    def badges(self, user_id: str) -> Optional[array]:
+        """Badges conhecidas do usuário (None se o usuário não está no snapshot)"""
+        index = self._find(int(user_id))
+        if index < 0:
+            return None
+
+        offset, count = self._int_at("offsets", index), self._int_at("counts", index)
+        start, _ = self._sections["badge_ids"]
+        badge_ids = array(TYPECODE)
+        badge_ids.frombytes(self._raw[start + offset * ITEM_SIZE:start + (offset + count) * ITEM_SIZE])
+        return badge_ids
+
+    def user_ids(self) -> array:
+        """IDs de todos os usuários com badges no snapshot"""
+        return array(TYPECODE, self._user_ids)
+
+    def presence(self) -> Dict[str, int]:
+        """Último status de presença de todos os usuários do snapshot"""
+        user_start, _ = self._sections["presence_user_ids"]
+        status_start, _ = self._sections["presence_status"]
+        size = self.presence_count * ITEM_SIZE
+        user_ids = self._raw[user_start:user_start + size].cast(TYPECODE)
+        statuses = self._raw[status_start:status_start + size].cast(TYPECODE)
+        try:
+            return {str(user_id): status for user_id, status in zip(user_ids, statuses)}
+        finally:
+            user_ids.release()
+            statuses.release()
+
+    def size_bytes(self) -> int:
+        return len(self._mmap)
+
+    def close(self):
+        if getattr(self, "_user_ids", None) is not None:
+            self._user_ids.release()
+            self._user_ids = None
+        if getattr(self, "_raw", None) is not None:
+            self._raw.release()
+            self._raw = None
+        self._mmap.close()
+        self._file.close()
+
+
+def open_snapshot(path: str, state_version: int) -> Optional[StateSnapshot]:
+    """Abre o snapshot se ele corresponder exatamente à versão atual do estado no banco"""
+    if sys.byteorder != 'little' or not os.path.exists(path):
+        return None
+
+    try:
+        snapshot = StateSnapshot(path)
+    except (OSError, ValueError, struct.error) as e:
+        logger.warning(f"Snapshot de estado ignorado: {e}")
+        return None
+
+    if snapshot.state_version != state_version:
+        logger.info(
+            f"Snapshot de estado desatualizado (v{snapshot.state_version}, banco v{state_version}) - usando o banco"
+        )
+        snapshot.close()
+        return None
+
+    return snapshot
+
+
+class SnapshotBadgeMap(dict):
+    """Badges conhecidas com leitura sob demanda do snapshot; usuários lidos ficam residentes"""
+
+    def __init__(self, snapshot: StateSnapshot):
+        super().__init__()
+        self.snapshot = snapshot
+        self.removed = set()  # Usuários removidos da memória que ainda constam no snapshot
+
+    def _fault(self, user_id: str) -> Optional[array]:
+        if user_id in self.removed:
+            return None
+        badge_ids = self.snapshot.badges(user_id)
+        if badge_ids is not None:
+            dict.__setitem__(self, user_id, badge_ids)
+        return badge_ids
+
+    def __missing__(self, user_id: str) -> array:
+        badge_ids = self._fault(user_id)
+        if badge_ids is None:
+            raise KeyError(user_id)
+        return badge_ids
+
+    def __contains__(self, user_id) -> bool:
+        if dict.__contains__(self, user_id):
+            return True
+        return user_id not in self.removed and self.snapshot.contains(user_id)
+
+    def __setitem__(self, user_id: str, badge_ids: array):
+        self.removed.discard(user_id)
+        dict.__setitem__(self, user_id, badge_ids)
+
+    def get(self, user_id: str, default=None):
+        if dict.__contains__(self, user_id):
+            return dict.__getitem__(self, user_id)
+        badge_ids = self._fault(user_id)
+        return default if badge_ids is None else badge_ids
+
+
+# ====== IMPORTAÇÃO / EXPORTAÇÃO JSON ======
+
+def export_json(store, directory: str) -> Dict[str, int]:
+    """Exporta o estado do banco nos arquivos JSON do formato antigo (known_badges, last_presence, guild_data)"""
+    os.makedirs(directory, exist_ok=True)
+    _, user_ids, counts, badge_ids, presence_user_ids, presence_status = store.export_state()
+
+    badges, position = {}, 0
+    for user_id, count in zip(user_ids, counts):
+        badges[str(user_id)] = badge_ids[position:position + count].tolist()
+        position += count
+    presence = {str(user_id): status for user_id, status in zip(presence_user_ids, presence_status)}
+    guilds = store.load_guilds()
+
+    for name, data in (("known_badges.json", badges), ("last_presence.json", presence), ("guild_data.json", guilds)):
+        with open(os.path.join(directory, name), 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+    return {"badge_users": len(badges), "presence": len(presence), "guilds": len(guilds)}
+
+
+def import_json(store, directory: str) -> Dict[str, int]:
+    """Importa arquivos JSON do formato antigo para o banco (com o bot parado)"""
+    counts = {}
+    badges_path = os.path.join(directory, "known_badges.json")
+    if os.path.exists(badges_path):
+        with open(badges_path, 'r', encoding='utf-8') as f:
+            badges = json.load(f)
+        store.apply_badge_changes({user_id: (badge_ids, ()) for user_id, badge_ids in badges.items()})
+        counts["badge_users"] = len(badges)
+
+    presence_path = os.path.join(directory, "last_presence.json")
+    if os.path.exists(presence_path):
+        with open(presence_path, 'r', encoding='utf-8') as f:
+            presence = json.load(f)
+        store.save_presence(presence)
+        counts["presence"] = len(presence)
+
+    guilds_path = os.path.join(directory, "guild_data.json")
+    if os.path.exists(guilds_path):
+        with open(guilds_path, 'r', encoding='utf-8') as f:
+            guilds = json.load(f)
+        store.save_guilds({**store.load_guilds(), **guilds})
+        counts["guilds"] = len(guilds)
+
+    return counts
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] not in ("export", "import"):
+        print("Uso: python state_snapshot.py export|import <diretório>")
+        sys.exit(1)
+
+    from state_store import state_store, init_state
+
+    init_state()
+    command, target_dir = sys.argv[1], sys.argv[2]
+    result = export_json(state_store, target_dir) if command == "export" else import_json(state_store, target_dir)
+    print(f"✅ {command}: {result}")
@@ -0,0 +1,590 @@
+"""
+Armazenamento do estado do monitoramento em SQLite (modo WAL)
+Badges conhecidas, último status de presença e dados dos servidores, com atualizações incrementais
+O estado de badges e presença fica residente em memória e só o que mudou é gravado (write-behind),
+direto no banco ou, no modo "journal", anexado ao journal e compactado no banco depois.
+Na inicialização, um snapshot binário válido (state_snapshot) evita carregar todas as badges do banco
+"""
+
+import os
+import gzip
+import json
+import time
+import sqlite3
+import threading
+from array import array
+from typing import Dict, Any, Iterable, Optional, Sequence, Set, Tuple
+
+from config import (
+    STATE_DB_FILE, STATE_JOURNAL_FILE, STATE_SNAPSHOT_FILE, BADGES_FILE, PRESENCE_FILE, GUILD_DATA_FILE, PERSISTENCE_CONFIG
+)
+from journal import StateJournal, merge_badge_change
+from sorted_ids import TYPECODE, to_sorted_array, contains, diff_sorted
+from state_snapshot import StateSnapshot, SnapshotBadgeMap, open_snapshot, write_snapshot
+from utils import logger, safe_json_load
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS badge_users (
+    user_id INTEGER PRIMARY KEY,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS known_badges (
+    user_id INTEGER NOT NULL,
+    badge_id INTEGER NOT NULL,
+    PRIMARY KEY (user_id, badge_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS presence (
+    user_id INTEGER PRIMARY KEY,
+    status INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS guilds (
+    guild_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class StateStore:
+    """Estado persistente do bot em um banco SQLite (WAL)"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._guild_json = {}  # {guild_id: json gravado} para gravar apenas servidores alterados
+        self.stats = {
+            "badge_rows_written": 0,
+            "presence_rows_written": 0,
+            "guild_rows_written": 0
+        }
+        self.conn = None  # Aberta em open() (criar a instância não toca no disco)
+        # Versão do estado de badges/presença, incrementada a cada gravação (valida o snapshot binário)
+        self.state_version = 0
+
+    def open(self):
+        """Abre o banco, cria o esquema e importa os JSON antigos (uma única vez)"""
+        with self._lock:
+            if self.conn is not None:
+                return
+            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript(SCHEMA)
+            self.conn.commit()
+
+        self.state_version = int(self.get_meta("state_version") or 0)
+        self.migrate_from_json()
+
+    # ====== MIGRAÇÃO ======
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with self._lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _bump_state_version(self):
+        """Incrementa a versão do estado (chamar dentro da transação de escrita)"""
+        self.state_version += 1
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('state_version', ?)", (str(self.state_version),)
+        )
+
+    def migrate_from_json(self):
+        """Importa uma única vez os arquivos JSON antigos (known_badges, last_presence e guild_data)"""
+        if self.get_meta("json_migrated_at"):
+            return
+
+        legacy_files = [path for path in (BADGES_FILE, PRESENCE_FILE, GUILD_DATA_FILE) if os.path.exists(path)]
+        if not legacy_files:
+            self.set_meta("json_migrated_at", str(time.time()))
+            return
+
+        logger.info(f"🔄 Migrando estado JSON para SQLite: {legacy_files}")
+
+        badges = safe_json_load(BADGES_FILE, {})
+        presence = safe_json_load(PRESENCE_FILE, {})
+        guilds = safe_json_load(GUILD_DATA_FILE, {})
+
+        self.apply_badge_changes({user_id: (badge_ids, ()) for user_id, badge_ids in badges.items()})
+        self.save_presence(presence)
+        self.save_guilds(guilds)
+        self.set_meta("json_migrated_at", str(time.time()))
+
+        # Os arquivos antigos ficam como cópia, mas fora do caminho de leitura
+        for path in legacy_files:
+            os.replace(path, f"{path}.migrated")
+
+        logger.info(
+            f"✅ Migração concluída: {len(badges)} usuário(s) com badges, "
+            f"{len(presence)} presença(s), {len(guilds)} servidor(es)"
+        )
+
+    # ====== BADGES CONHECIDAS ======
+
+    def load_known_badges(self) -> Dict[str, array]:
+        """Carrega as badges conhecidas de todos os usuários (arrays ordenados de int64)"""
+        with self._lock:
+            badges = {str(row[0]): array(TYPECODE) for row in self.conn.execute("SELECT user_id FROM badge_users")}
+            # A chave primária (user_id, badge_id) já entrega os IDs ordenados por usuário
+            for user_id, badge_id in self.conn.execute(
+                "SELECT user_id, badge_id FROM known_badges ORDER BY user_id, badge_id"
+            ):
+                badges.setdefault(str(user_id), array(TYPECODE)).append(badge_id)
+        return badges
+
+    def export_state(self) -> Tuple[int, array, array, array, array, array]:
+        """
+        Lê badges e presença em arrays compactos, em uma leitura consistente
+        Returns: (versão, user_ids, contagens, badge_ids, presence_user_ids, presence_status)
+        """
+        user_ids, counts, badge_ids = array(TYPECODE), array(TYPECODE), array(TYPECODE)
+        presence_user_ids, presence_status = array(TYPECODE), array(TYPECODE)
+
+        with self._lock:
+            version = self.state_version
+            for user_id, badge_id in self.conn.execute(
+                "SELECT u.user_id, k.badge_id FROM badge_users u "
+                "LEFT JOIN known_badges k ON k.user_id = u.user_id ORDER BY u.user_id, k.badge_id"
+            ):
+                if not user_ids or user_ids[-1] != user_id:
+                    user_ids.append(user_id)
+                    counts.append(0)
+                if badge_id is not None:
+                    badge_ids.append(badge_id)
+                    counts[-1] += 1
+
+            for user_id, status in self.conn.execute("SELECT user_id, status FROM presence ORDER BY user_id"):
+                presence_user_ids.append(user_id)
+                presence_status.append(status)
+
+        return version, user_ids, counts, badge_ids, presence_user_ids, presence_status
+
+    def presence_user_ids(self) -> Set[str]:
+        """IDs dos usuários com status de presença gravado"""
+        with self._lock:
+            return {str(row[0]) for row in self.conn.execute("SELECT user_id FROM presence")}
+
+    def remove_users(self, user_ids: Iterable[str], archive_path: Optional[str] = None) -> Dict[str, int]:
+        """
+        Remove badges e presença dos usuários informados, opcionalmente arquivando antes (JSON gzip)
+        Returns: linhas removidas por tabela
+        """
+        rows = [(int(user_id),) for user_id in user_ids]
+        if not rows:
+            return {"users": 0, "badge_rows": 0, "presence_rows": 0}
+
+        with self._lock:
+            if archive_path:
+                archived = {"badges": {}, "presence": {}, "archived_at": time.time()}
+                for (user_id,) in rows:
+                    archived["badges"][str(user_id)] = [
+                        badge_id for (badge_id,) in self.conn.execute(
+                            "SELECT badge_id FROM known_badges WHERE user_id = ? ORDER BY badge_id", (user_id,)
+                        )
+                    ]
+                    status = self.conn.execute("SELECT status FROM presence WHERE user_id = ?", (user_id,)).fetchone()
+                    if status:
+                        archived["presence"][str(user_id)] = status[0]
+                os.makedirs(os.path.dirname(archive_path), exist_ok=True)
+                with gzip.open(archive_path, 'wt', encoding='utf-8') as f:
+                    json.dump(archived, f)
+
+            with self.conn:
+                badge_rows = self.conn.executemany("DELETE FROM known_badges WHERE user_id = ?", rows).rowcount
+                self.conn.executemany("DELETE FROM badge_users WHERE user_id = ?", rows)
+                presence_rows = self.conn.executemany("DELETE FROM presence WHERE user_id = ?", rows).rowcount
+                self._bump_state_version()
+
+        return {"users": len(rows), "badge_rows": badge_rows, "presence_rows": presence_rows}
+
+    def badge_user_ids(self) -> Set[str]:
+        """IDs dos usuários que já passaram pelo baseline de badges"""
+        with self._lock:
+            return {str(row[0]) for row in self.conn.execute("SELECT user_id FROM badge_users")}
+
+    def apply_badge_changes(self, changes: Dict[str, Tuple[Iterable[int], Iterable[int]]]) -> int:
+        """
+        Aplica mudanças incrementais nas badges conhecidas
+        changes: {user_id: (badges adicionadas, badges removidas)}
+        Returns: linhas gravadas
+        """
+        if not changes:
+            return 0
+
+        now = time.time()
+        written = 0
+        with self._lock, self.conn:
+            for user_id, (added, removed) in changes.items():
+                uid = int(user_id)
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO badge_users (user_id, updated_at) VALUES (?, ?)", (uid, now)
+                )
+                added_rows = [(uid, int(badge_id)) for badge_id in added]
+                removed_rows = [(uid, int(badge_id)) for badge_id in removed]
+                if added_rows:
+                    self.conn.executemany(
+                        "INSERT OR IGNORE INTO known_badges (user_id, badge_id) VALUES (?, ?)", added_rows
+                    )
+                if removed_rows:
+                    self.conn.executemany(
+                        "DELETE FROM known_badges WHERE user_id = ? AND badge_id = ?", removed_rows
+                    )
+                written += 1 + len(added_rows) + len(removed_rows)
+            self._bump_state_version()
+
+        self.stats["badge_rows_written"] += written
+        return written
+
+    # ====== PRESENÇA ======
+
+    def load_presence(self) -> Dict[str, int]:
+        """Carrega o último status de presença de todos os usuários"""
+        with self._lock:
+            return {str(user_id): status for user_id, status in self.conn.execute("SELECT user_id, status FROM presence")}
+
+    def save_presence(self, changes: Dict[str, int]) -> int:
+        """Grava apenas os status de presença que mudaram"""
+        if not changes:
+            return 0
+
+        now = time.time()
+        rows = [(int(user_id), int(status), now) for user_id, status in changes.items()]
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO presence (user_id, status, updated_at) VALUES (?, ?, ?)", rows
+            )
+            self._bump_state_version()
+
+        self.stats["presence_rows_written"] += len(rows)
+        return len(rows)
+
+    # ====== DADOS DOS SERVIDORES ======
+
+    def load_guilds(self) -> Dict[str, Dict[str, Any]]:
+        """Carrega os dados de todos os servidores"""
+        guilds = {}
+        with self._lock:
+            for guild_id, data in self.conn.execute("SELECT guild_id, data FROM guilds"):
+                guilds[guild_id] = json.loads(data)
+                self._guild_json[guild_id] = data
+        return guilds
+
+    def tracked_ids(self, exclude_guild_ids: Iterable[str] = ()) -> Tuple[Set[str], Set[str]]:
+        """Usuários e grupos monitorados pelos servidores gravados (exceto os informados)"""
+        excluded = set(exclude_guild_ids)
+        users, groups = set(), set()
+        with self._lock:
+            rows = self.conn.execute("SELECT guild_id, data FROM guilds").fetchall()
+        for guild_id, data in rows:
+            if guild_id in excluded:
+                continue
+            guild_info = json.loads(data)
+            users.update(guild_info.get("tracked_users", {}))
+            groups.update(guild_info.get("tracked_groups", {}))
+        return users, groups
+
+    def guild_ids(self) -> Set[str]:
+        """IDs de todos os servidores gravados"""
+        with self._lock:
+            return {row[0] for row in self.conn.execute("SELECT guild_id FROM guilds")}
+
+    def load_guild(self, guild_id: str) -> Optional[Dict[str, Any]]:
+        """Carrega os dados de um único servidor"""
+        with self._lock:
+            row = self.conn.execute("SELECT data FROM guilds WHERE guild_id = ?", (guild_id,)).fetchone()
+        if not row:
+            return None
+        self._guild_json[guild_id] = row[0]
+        return json.loads(row[0])
+
+    def save_guild(self, guild_id: str, data: Dict[str, Any]) -> bool:
+        """Grava o registro de um único servidor (transação própria; nada é gravado se não mudou)"""
+        try:
+            serialized = json.dumps(data, ensure_ascii=False, sort_keys=True)
+            if self._guild_json.get(guild_id) == serialized:
+                return True
+
+            with self._lock, self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO guilds (guild_id, data, updated_at) VALUES (?, ?, ?)",
+                    (guild_id, serialized, time.time())
+                )
+            self._guild_json[guild_id] = serialized
+            self.stats["guild_rows_written"] += 1
+            return True
+
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.error(f"Erro ao salvar dados do servidor {guild_id} no SQLite", e)
+            return False
+
+    def delete_guild(self, guild_id: str) -> bool:
+        """Remove o registro de um servidor"""
+        with self._lock, self.conn:
+            deleted = self.conn.execute("DELETE FROM guilds WHERE guild_id = ?", (guild_id,)).rowcount
+        self._guild_json.pop(guild_id, None)
+        self.stats["guild_rows_written"] += deleted
+        return bool(deleted)
+
+    def save_guilds(self, guilds: Dict[str, Dict[str, Any]]) -> bool:
+        """Grava apenas os servidores cujo conteúdo mudou desde a última gravação (um registro por servidor)"""
+        success = True
+        for guild_id, data in list(guilds.items()):
+            success = self.save_guild(guild_id, data) and success
+        return success
+
+    # ====== MANUTENÇÃO ======
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Tamanho do banco e contagem de linhas por tabela"""
+        with self._lock:
+            counts = {
+                table: self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("badge_users", "known_badges", "presence", "guilds")
+            }
+        return {**self.stats, "rows": counts, **self.file_sizes()}
+
+    def file_sizes(self) -> Dict[str, int]:
+        """Tamanho do banco e do WAL em disco (sem consultar o banco)"""
+        wal_path = f"{self.db_path}-wal"
+        return {
+            "db_bytes": os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0,
+            "wal_bytes": os.path.getsize(wal_path) if os.path.exists(wal_path) else 0
+        }
+
+    def close(self):
+        """Faz checkpoint do WAL e fecha a conexão"""
+        with self._lock:
+            if self.conn is None:
+                return
+            try:
+                self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            finally:
+                self.conn.close()
+
+
+EMPTY_IDS = array(TYPECODE)
+
+
+class ResidentState:
+    """Badges conhecidas (arrays ordenados de int64) e presença mantidas em memória, com rastreamento das chaves alteradas"""
+
+    def __init__(self, store: StateStore, journal: Optional[StateJournal] = None, snapshot_path: str = STATE_SNAPSHOT_FILE):
+        self.store = store
+        self.journal = journal  # Se definido, o flush anexa ao journal em vez de gravar no banco
+        self.snapshot_path = snapshot_path
+        self._snapshot = None
+        self._snapshot_checked = False
+        self._lock = threading.Lock()
+        self._known_badges = None  # {user_id: [badge_ids]} carregado uma única vez
+        self._presence = None      # {user_id: status}
+        self.dirty_badges = {}     # {user_id: (adicionadas, removidas)} desde o último flush
+        self.dirty_presence = {}   # {user_id: status} desde o último flush
+        self.stats = {
+            "flushes": 0,
+            "flushed_badge_users": 0,
+            "flushed_presence": 0,
+            "flush_errors": 0,
+            "last_flush": None,
+            "last_snapshot": None,
+            "last_snapshot_seconds": None,
+            "snapshot_bytes": 0
+        }
+
+    @property
+    def known_badges(self) -> Dict[str, array]:
+        """Badges conhecidas (somente leitura; use record_badges para alterar)"""
+        if self._known_badges is None:
+            snapshot = self._open_snapshot()
+            if snapshot:
+                # Leitura sob demanda: cada usuário é lido do snapshot na primeira consulta
+                self._known_badges = SnapshotBadgeMap(snapshot)
+                logger.info(f"Badges conhecidas mapeadas do snapshot: {snapshot.user_count} usuário(s)")
+            else:
+                self._known_badges = self.store.load_known_badges()
+                logger.info(f"Badges conhecidas carregadas em memória: {len(self._known_badges)} usuário(s)")
+        return self._known_badges
+
+    @property
+    def presence(self) -> Dict[str, int]:
+        """Último status de presença (somente leitura; use set_presence para alterar)"""
+        if self._presence is None:
+            snapshot = self._open_snapshot()
+            self._presence = snapshot.presence() if snapshot else self.store.load_presence()
+        return self._presence
+
+    def _open_snapshot(self) -> Optional[StateSnapshot]:
+        """Snapshot binário válido para a versão atual do banco (aberto uma única vez)"""
+        if self._snapshot is None and not self._snapshot_checked:
+            self._snapshot_checked = True
+            self._snapshot = open_snapshot(self.snapshot_path, self.store.state_version)
+        return self._snapshot
+
+    def write_snapshot(self) -> int:
+        """
+        Grava um snapshot binário do estado (após gravar pendências e compactar o journal)
+        Pode rodar fora do event loop. Returns: bytes gravados
+        """
+        self.flush()
+        self.compact()
+        started = time.time()
+        size = write_snapshot(self.snapshot_path, *self.store.export_state())
+        self.stats["last_snapshot"] = time.time()
+        self.stats["last_snapshot_seconds"] = round(time.time() - started, 3)
+        self.stats["snapshot_bytes"] = size
+        return size
+
+    def record_badges(self, user_id: str, current_badge_ids: Sequence[int]) -> Tuple[array, array]:
+        """
+        Registra as badges atuais do usuário e marca a diferença como pendente de gravação
+        Returns: (badges novas, badges removidas)
+        """
+        known = self.known_badges.get(user_id)
+
+        # Caso comum: nada mudou; mesma quantidade e todas já conhecidas (busca binária, sem montar array)
+        # IDs repetidos na resposta também caem aqui: a badge que faltou é tratada na próxima verificação
+        if (known is not None and len(current_badge_ids) == len(known)
+                and all(contains(known, badge_id) for badge_id in current_badge_ids)):
+            return EMPTY_IDS, EMPTY_IDS
+
+        current = to_sorted_array(current_badge_ids)
+        if known is not None and known == current:
+            return EMPTY_IDS, EMPTY_IDS
+
+        if known is None:
+            added, removed = current, EMPTY_IDS
+        else:
+            added, removed = diff_sorted(known, current)
+
+        self.known_badges[user_id] = current
+        with self._lock:
+            merge_badge_change(self.dirty_badges, user_id, added, removed)
+
+        return added, removed
+
+    def set_presence(self, user_id: str, status: int):
+        """Atualiza o status de presença do usuário (gravado no próximo flush se mudou)"""
+        if self.presence.get(user_id) == status:
+            return
+        self.presence[user_id] = status
+        with self._lock:
+            self.dirty_presence[user_id] = status
+
+    def forget_users(self, user_ids: Iterable[str]) -> int:
+        """Remove usuários da memória e das mudanças pendentes (não mexe no banco). Returns: usuários removidos"""
+        forgotten = 0
+        with self._lock:
+            for user_id in user_ids:
+                found = False
+                if self._known_badges is not None:
+                    if isinstance(self._known_badges, SnapshotBadgeMap):
+                        found = user_id in self._known_badges
+                        self._known_badges.removed.add(user_id)
+                    found = self._known_badges.pop(user_id, None) is not None or found
+                if self._presence is not None:
+                    found = self._presence.pop(user_id, None) is not None or found
+                found = self.dirty_badges.pop(user_id, None) is not None or found
+                found = self.dirty_presence.pop(user_id, None) is not None or found
+                forgotten += found
+        return forgotten
+
+    def resident_user_ids(self) -> Set[str]:
+        """Usuários com badges ou presença residentes em memória"""
+        return set(dict.keys(self._known_badges or {})) | set(self._presence or {})
+
+    def dirty_count(self) -> int:
+        """Quantidade de chaves alteradas ainda não gravadas"""
+        return len(self.dirty_badges) + len(self.dirty_presence)
+
+    def flush(self) -> int:
+        """Grava apenas as chaves alteradas. Returns: chaves gravadas"""
+        with self._lock:
+            badges, self.dirty_badges = self.dirty_badges, {}
+            presence, self.dirty_presence = self.dirty_presence, {}
+
+        if not badges and not presence:
+            return 0
+
+        try:
+            if self.journal:
+                self.journal.append(badges, presence)
+            else:
+                self.store.apply_badge_changes(badges)
+                self.store.save_presence(presence)
+        except (sqlite3.Error, OSError) as e:
+            # Devolver as mudanças para a próxima tentativa (sem sobrescrever alterações mais novas)
+            with self._lock:
+                for user_id, changes in badges.items():
+                    self.dirty_badges.setdefault(user_id, changes)
+                for user_id, status in presence.items():
+                    self.dirty_presence.setdefault(user_id, status)
+            self.stats["flush_errors"] += 1
+            logger.error("Erro ao gravar estado residente", e)
+            return 0
+
+        self.stats["flushes"] += 1
+        self.stats["flushed_badge_users"] += len(badges)
+        self.stats["flushed_presence"] += len(presence)
+        self.stats["last_flush"] = time.time()
+        return len(badges) + len(presence)
+
+    def compact(self) -> int:
+        """Incorpora o journal no banco (sem efeito no modo sqlite). Returns: registros compactados"""
+        if not self.journal:
+            return 0
+        return self.journal.compact_into(self.store)
+
+    def needs_compaction(self) -> bool:
+        """Verifica se o journal passou do tamanho limite"""
+        return bool(self.journal) and self.journal.size_bytes() >= PERSISTENCE_CONFIG["journal_compact_bytes"]
+
+    def get_sizes(self) -> Dict[str, int]:
+        """Contagens do estado residente (baratas; seguras para ler de outra thread)"""
+        return {
+            "resident_badge_users": len(self._known_badges or {}),
+            "resident_presence": len(self._presence or {}),
+            "dirty_badge_users": len(self.dirty_badges),
+            "dirty_presence": len(self.dirty_presence),
+            "journal_bytes": self.journal.size_bytes() if self.journal else 0,
+            "snapshot_bytes": os.path.getsize(self.snapshot_path) if os.path.exists(self.snapshot_path) else 0
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estatísticas do estado residente"""
+        return {
+            **self.stats,
+            "mode": "journal" if self.journal else "sqlite",
+            "dirty_badge_users": len(self.dirty_badges),
+            "dirty_presence": len(self.dirty_presence),
+            "resident_badge_users": len(self._known_badges or {}),
+            "resident_badge_bytes": sum(
+                len(badge_ids) * badge_ids.itemsize for badge_ids in (self._known_badges or {}).values()
+            ),
+            "resident_presence": len(self._presence or {})
+        }
+
+
+state_store = StateStore(STATE_DB_FILE)
+state_journal = StateJournal(STATE_JOURNAL_FILE, PERSISTENCE_CONFIG["journal_fsync"])
+resident_state = ResidentState(state_store)
+
+
+def init_state():
+    """
+    Abre o banco, migra os JSON antigos e recupera o journal
+    Chamar na inicialização do bot/CLI: importar o módulo não cria nem renomeia arquivos
+    """
+    if state_store.conn is not None:
+        return
+    state_store.open()
+    # O journal é sempre recuperado na inicialização, mesmo que o modo tenha mudado desde a última execução
+    state_journal.recover_into(state_store)
+    resident_state.journal = state_journal if PERSISTENCE_CONFIG["mode"] == "journal" else None
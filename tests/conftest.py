@@ -0,0 +1,13 @@
+"""
+Configuração dos testes: módulos do bot importáveis a partir da raiz e dados gravados em um diretório temporário
+"""
+
+import os
+import sys
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+# config.py cria os diretórios de dados na importação; não sujar a raiz do projeto
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="roblox_bot_tests_"))
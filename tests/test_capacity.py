@@ -0,0 +1,59 @@
+import pytest
+
+from api_utils import api_client
+from capacity import plan_capacity
+
+INTERVALS = {"badges": 300, "presence": 300, "groups": 900}
+
+
+@pytest.fixture(autouse=True)
+def fresh_stats(monkeypatch):
+    monkeypatch.setattr(api_client, "page_stats", {})
+    monkeypatch.setattr(api_client, "endpoint_cache_stats", {})
+
+
+def test_cache_hits_reduce_estimated_calls():
+    api_client.record_pages('badges', 2)
+    base = plan_capacity(100, 0, INTERVALS)["badges"]["calls_per_cycle"]
+    assert base == 200
+
+    api_client.endpoint_cache_stats['badges'] = {'requests': 4, 'hits': 1}
+    estimate = plan_capacity(100, 0, INTERVALS)["badges"]
+    assert estimate["calls_per_cycle"] == 150
+    assert estimate["cache_hit_rate"] == 25
+
+
+def test_group_estimate_includes_membership_refresh():
+    # 250 grupos: 3 lotes; cada grupo verificado consultou os roles e enumerou 2 roles de 3 páginas
+    for _ in range(4):
+        api_client.record_pages('group_refresh_roles', 2)
+        api_client.record_pages('group_roles', 3)
+
+    assert plan_capacity(0, 250, INTERVALS)["groups"]["calls_per_cycle"] == 3 + 250 * (1 + 2 * 3)
+
+
+def test_checks_without_enumeration_still_fetch_the_role_list():
+    api_client.record_pages('group_refresh_roles', 1)
+    for _ in range(3):
+        api_client.record_pages('group_refresh_roles', 0)
+
+    assert plan_capacity(0, 100, INTERVALS)["groups"]["calls_per_cycle"] == 1 + 100 * (1 + 0.25)
+
+
+def test_budget_is_the_background_share_of_the_limit():
+    api_client.record_pages('badges', 1)
+    # badges: 60/min, polling em segundo plano fica com 80% = 48/min
+    estimate = plan_capacity(48, 0, {**INTERVALS, "badges": 60})["badges"]
+    assert estimate["limit_per_minute"] == 48
+    assert estimate["min_cycle_seconds"] == 60
+    assert not estimate["over_capacity"]
+
+    assert plan_capacity(49, 0, {**INTERVALS, "badges": 60})["badges"]["over_capacity"]
+
+
+def test_only_a_batch_of_pending_baselines_counts_per_cycle(monkeypatch):
+    from config import MONITORING_CONFIG
+    monkeypatch.setitem(MONITORING_CONFIG, "baseline_batch_size", 5)
+    api_client.record_pages('badges', 3)
+
+    assert plan_capacity(100, 0, INTERVALS, pending_baseline=20)["badges"]["calls_per_cycle"] == (80 + 5) * 3
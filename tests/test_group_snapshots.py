@@ -0,0 +1,79 @@
+from array import array
+
+from group_snapshots import GroupSnapshot, _comparable_members, _comparable_role_ids
+from sorted_ids import TYPECODE, diff_sorted
+
+
+def role(count, *members, enumerated=True):
+    return {"count": count, "members": array(TYPECODE, members) if enumerated else None}
+
+
+def group_diff(old_roles, new_roles):
+    old, new = GroupSnapshot(1, old_roles, 0), GroupSnapshot(1, new_roles, 1)
+    role_ids = _comparable_role_ids(old_roles, new_roles)
+    return diff_sorted(_comparable_members(old, role_ids), _comparable_members(new, role_ids))
+
+
+def test_enumerated_roles_are_diffed():
+    joined, left = group_diff({10: role(2, 1, 2)}, {10: role(2, 2, 3)})
+    assert list(joined) == [3]
+    assert list(left) == [1]
+
+
+def test_role_enumerated_for_the_first_time_only_sets_baseline():
+    # Role grande demais (só contagem) que ficou abaixo do limite e foi enumerado agora
+    old_roles = {10: role(2, 1, 2), 20: role(5000, enumerated=False)}
+    new_roles = {10: role(2, 1, 2), 20: role(900, *range(100, 1000))}
+
+    assert _comparable_role_ids(old_roles, new_roles) == [10]
+    joined, left = group_diff(old_roles, new_roles)
+    assert len(joined) == 0 and len(left) == 0
+
+
+def test_role_that_became_count_only_is_ignored():
+    joined, left = group_diff({20: role(3, 1, 2, 3)}, {20: role(5000, enumerated=False)})
+    assert len(joined) == 0 and len(left) == 0
+
+
+def test_removed_role_reports_its_members_as_left():
+    joined, left = group_diff({10: role(1, 1), 20: role(2, 5, 6)}, {10: role(1, 1)})
+    assert len(joined) == 0
+    assert list(left) == [5, 6]
+
+
+def test_refresh_detects_join_and_leave_with_unchanged_total(monkeypatch):
+    import group_snapshots
+
+    members = {10: [1, 2], 20: [5, 6]}
+    enumerated = []
+
+    def get_roles(group_id):
+        return [{"id": role_id, "rank": rank, "memberCount": len(ids)}
+                for rank, (role_id, ids) in enumerate(members.items(), 1)], True, None
+
+    def get_members(group_id, role_id):
+        enumerated.append(role_id)
+        return [{"userId": user_id, "username": f"u{user_id}"} for user_id in members[role_id]], True, None
+
+    monkeypatch.setattr(group_snapshots, "get_group_roles_robust", get_roles)
+    monkeypatch.setattr(group_snapshots, "get_role_members_robust", get_members)
+    monkeypatch.setattr(group_snapshots, "get_users_info_batch", lambda ids: ({}, True, None))
+
+    group_id = 987654
+    assert group_snapshots.refresh_group_membership(group_id) == (None, True, None)
+    taken_at = group_snapshots.snapshot_store.load(group_id).taken_at
+
+    # Sem mudança de contagem: só a lista de roles, nenhum role reenumerado
+    enumerated.clear()
+    assert group_snapshots.refresh_group_membership(group_id) == (None, True, None)
+    assert enumerated == []
+
+    # Alguém entrou no role 10 e outra pessoa saiu do role 20: o total do grupo continua 4
+    members[10] = [1, 2, 3]
+    members[20] = [6]
+    changes, success, _ = group_snapshots.refresh_group_membership(group_id)
+    assert success
+    assert sorted(enumerated) == [10, 20]
+    assert changes["joined"] == [(3, "u3")]
+    assert [user_id for user_id, _ in changes["left"]] == [5]
+    assert group_snapshots.snapshot_store.load(group_id).taken_at == taken_at
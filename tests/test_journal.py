@@ -0,0 +1,117 @@
+import errno
+
+import pytest
+
+from journal import RECORD_BADGES, RECORD_PRESENCE, StateJournal, encode_presence, merge_badge_change
+
+
+class FakeStore:
+    def __init__(self):
+        self.badges = {}
+        self.presence = {}
+
+    def apply_badge_changes(self, badges):
+        for user_id, (added, removed) in badges.items():
+            merge_badge_change(self.badges, user_id, added, removed)
+
+    def save_presence(self, presence):
+        self.presence.update(presence)
+
+
+class PartialWriteFile:
+    """Arquivo que grava só metade dos dados e falha como um disco cheio"""
+
+    def __init__(self, real_file):
+        self.real_file = real_file
+
+    def tell(self):
+        return self.real_file.tell()
+
+    def write(self, data):
+        self.real_file.write(data[:len(data) // 2])
+        self.real_file.flush()
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    def flush(self):
+        self.real_file.flush()
+
+    def fileno(self):
+        return self.real_file.fileno()
+
+    def close(self):
+        self.real_file.close()
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = StateJournal(str(tmp_path / "state_journal.bin"), fsync=False)
+    yield journal
+    journal.close()
+
+
+def test_round_trip(journal):
+    assert journal.append({"1": ([10, 11], [])}, {"1": 2}) == 2
+    assert journal.append({"1": ([12], [10]), "2": ([20], [])}, {"2": 0}) == 3
+    journal.close()
+
+    records = list(journal._read_records(journal.path))
+    assert records[0] == (RECORD_BADGES, ("1", (10, 11), ()))
+    assert records[1] == (RECORD_PRESENCE, ("1", 2))
+
+    badges, presence, count = journal.fold(journal.path)
+    assert count == 5
+    assert badges == {"1": ({11, 12}, {10}), "2": ({20}, set())}
+    assert presence == {"1": 2, "2": 0}
+
+
+def test_torn_tail_is_discarded(journal):
+    journal.append({"1": ([10], [])}, {})
+    journal.close()
+    with open(journal.path, 'ab') as f:
+        f.write(encode_presence("2", 1)[:-3])
+
+    badges, presence, count = journal.fold(journal.path)
+    assert count == 1
+    assert badges == {"1": ({10}, set())}
+    assert presence == {}
+    assert journal.stats["torn_tails"] == 1
+
+
+def test_corrupted_record_stops_recovery(journal):
+    journal.append({}, {"1": 1})
+    journal.close()
+    with open(journal.path, 'r+b') as f:
+        f.seek(-1, 2)
+        f.write(b'\x7f')
+
+    assert journal.fold(journal.path)[2] == 0
+
+
+def test_partial_write_is_truncated(journal):
+    journal.append({}, {"1": 1})
+    valid_size = journal._open().tell()
+    journal._file = PartialWriteFile(journal._open())
+
+    with pytest.raises(OSError):
+        journal.append({"2": ([20, 21, 22], [])}, {"2": 2})
+    assert journal.size_bytes() == valid_size
+    assert journal.stats["torn_writes"] == 1
+
+    # Os registros gravados depois da falha continuam recuperáveis
+    journal.append({}, {"3": 1})
+    store = FakeStore()
+    assert journal.compact_into(store) == 2
+    assert store.presence == {"1": 1, "3": 1}
+    assert journal.stats["torn_tails"] == 0
+
+
+def test_recover_applies_interrupted_compaction(journal, tmp_path):
+    journal.append({}, {"1": 1})
+    journal.close()
+    (tmp_path / "state_journal.bin").rename(journal.compacting_path)
+    journal.append({}, {"1": 0, "2": 2})
+
+    store = FakeStore()
+    assert journal.recover_into(store) == 3
+    assert store.presence == {"1": 0, "2": 2}
+    assert journal.size_bytes() == 0
@@ -0,0 +1,47 @@
+import asyncio
+import traceback
+
+import loop_monitor as loop_monitor_module
+from config import LOOP_MONITOR_CONFIG
+from loop_monitor import LoopLagMonitor
+
+
+def stack_at(library_line):
+    # Mesmo local no bot, parado em linhas diferentes de uma biblioteca
+    return [
+        traceback.FrameSummary(loop_monitor_module.PROJECT_DIR + "/discord_bot.py", 10, "check_badges", line="x()"),
+        traceback.FrameSummary("/usr/lib/python3/json/decoder.py", library_line, "decode", line="y()")
+    ]
+
+
+def test_alert_uses_the_stack_of_the_current_stall(monkeypatch):
+    alerts = []
+
+    class Notifier:
+        async def notify_owner(self, title, description, *args):
+            alerts.append(description)
+
+    monkeypatch.setattr(loop_monitor_module, "critical_notifier", Notifier())
+    monitor = LoopLagMonitor()
+    threshold = LOOP_MONITOR_CONFIG["alert_threshold_seconds"]
+
+    async def stall(lag, stack):
+        monitor.deadline += 1
+        monitor._captured_deadline, monitor._captured_stack = monitor.deadline, stack
+        monitor._record_block(lag)
+        await asyncio.gather(*monitor._alert_tasks)
+
+    async def scenario():
+        await stall(threshold * 3, stack_at(100))
+        await stall(threshold, stack_at(200))
+        await stall(threshold, None)
+
+    asyncio.run(scenario())
+
+    location = "discord_bot.py:10 check_badges"
+    assert location in alerts[0] and "line 100" in alerts[0]
+    # Travamento menor no mesmo local: o alerta mostra a pilha dele, não a do pior travamento
+    assert "line 200" in alerts[1] and "line 100" not in alerts[1]
+    assert "pilha não capturada" in alerts[2]
+    assert monitor.offenders[location]["count"] == 2
+    assert "line 100" in "".join(monitor.offenders[location]["stack"])
@@ -0,0 +1,53 @@
+from metrics import MetricsRegistry
+
+
+def test_counter_and_gauge_render():
+    registry = MetricsRegistry()
+    requests = registry.counter("api_requests_total", "Requisições", ("endpoint",))
+    requests.inc(endpoint="badges")
+    requests.inc(2, endpoint="badges")
+    requests.inc(endpoint='pre"sence')
+    registry.gauge("queue_depth", "Fila").set(1.5)
+
+    lines = registry.render().splitlines()
+    assert "# TYPE api_requests_total counter" in lines
+    assert 'api_requests_total{endpoint="badges"} 3' in lines
+    assert 'api_requests_total{endpoint="pre\\"sence"} 1' in lines
+    assert "queue_depth 1.5" in lines
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latência", buckets=(0.1, 1))
+    for value in (0.05, 0.5, 0.7, 3):
+        latency.observe(value)
+
+    lines = registry.render().splitlines()
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1"} 3' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 4' in lines
+    assert "latency_seconds_sum 4.25" in lines
+    assert "latency_seconds_count 4" in lines
+
+
+def test_same_name_returns_same_metric():
+    registry = MetricsRegistry()
+    assert registry.counter("events_total", "Eventos") is registry.counter("events_total", "Eventos")
+
+
+def test_collectors_and_status_providers_isolate_errors():
+    registry = MetricsRegistry()
+    gauge = registry.gauge("users", "Usuários")
+
+    def broken():
+        raise RuntimeError("falhou")
+
+    registry.register_collector(broken)
+    registry.register_collector(lambda: gauge.set(42))
+    registry.register_status("ok", lambda: {"status": "running"})
+    registry.register_status("broken", broken)
+
+    assert "users 42" in registry.render().splitlines()
+    status = registry.status()
+    assert status["ok"] == {"status": "running"}
+    assert status["broken"]["status"] == "unknown"
@@ -0,0 +1,68 @@
+import asyncio
+
+import discord
+
+from notifications import DISCORD_MAX_EMBED_CHARS_PER_MESSAGE, NotificationDigest
+
+
+def event(chars):
+    return {"embed": discord.Embed(description="x" * chars), "summary": f"evento de {chars}"}
+
+
+def test_pack_chunks_respects_embed_count():
+    chunks = NotificationDigest.pack_chunks([event(10) for _ in range(25)], 10)
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+
+
+def test_pack_chunks_respects_total_characters():
+    chunks = NotificationDigest.pack_chunks([event(2500) for _ in range(5)], 10)
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    for chunk in chunks:
+        assert sum(len(item["embed"]) for item in chunk) <= DISCORD_MAX_EMBED_CHARS_PER_MESSAGE
+
+
+class FakeChannel:
+    id = 1
+
+    def __init__(self, fail_first=False):
+        self.sent = []
+        self.fail_first = fail_first
+
+    async def send(self, embeds):
+        if self.fail_first and not self.sent:
+            self.sent.append(None)
+            raise RuntimeError("400 Bad Request")
+        self.sent.append(embeds)
+
+
+def test_rejected_chunk_falls_back_to_summary():
+    digest = NotificationDigest()
+    channel = FakeChannel(fail_first=True)
+    entry = {"channel": channel, "events": [event(10), event(20)], "settings": {}}
+
+    asyncio.run(digest._flush_entry(entry))
+
+    assert len(channel.sent) == 2
+    assert len(channel.sent[1]) == 1
+    assert "2 eventos" in channel.sent[1][0].title
+    assert digest.stats["summaries_sent"] == 1
+
+
+def test_pending_window_uses_updated_settings():
+    digest = NotificationDigest()
+    channel = FakeChannel()
+    channel.guild = type("Guild", (), {"id": 7})()
+    other = FakeChannel()
+    other.id = 2
+    other.guild = type("Guild", (), {"id": 8})()
+
+    async def scenario():
+        await digest.notify(channel, event(10)["embed"], "a", {"digest_enabled": True, "digest_window_seconds": 300})
+        await digest.notify(other, event(10)["embed"], "b", {"digest_enabled": True, "digest_window_seconds": 300})
+        await digest.update_settings(7, {"digest_enabled": True, "digest_window_seconds": 0})
+        await digest.flush_due()
+
+    asyncio.run(scenario())
+
+    assert len(channel.sent) == 1
+    assert other.sent == []
@@ -0,0 +1,79 @@
+from types import SimpleNamespace
+
+import pytest
+
+import utils
+from config import RATE_LIMIT_CONFIG
+from utils import RateLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(utils, "time", SimpleNamespace(time=lambda: clock.now))
+    monkeypatch.setitem(RATE_LIMIT_CONFIG, "max_requests_per_minute", 6)
+    monkeypatch.setitem(RATE_LIMIT_CONFIG, "max_requests_per_minute_per_guild", 8)
+    monkeypatch.setitem(RATE_LIMIT_CONFIG, "block_seconds", 120)
+    return clock
+
+
+def test_burst_up_to_limit_then_block(clock):
+    limiter = RateLimiter()
+    for _ in range(6):
+        assert limiter.can_make_request(1) == (True, None)
+
+    allowed, message = limiter.can_make_request(1)
+    assert not allowed and "2 minutos" in message
+    assert limiter.get_stats()["blocked_users"] == 1
+
+    # Bloqueado mesmo depois da cota se recompor, até o fim do bloqueio
+    clock.now += 60
+    assert not limiter.can_make_request(1)[0]
+    clock.now += 61
+    assert limiter.can_make_request(1)[0]
+
+
+def test_quota_refills_at_a_steady_rate(clock):
+    limiter = RateLimiter()
+    for _ in range(6):
+        limiter.can_make_request(1)
+
+    # Intervalo de emissão = 60 / 6 = 10s: a cada 10s cabe mais uma requisição
+    clock.now += 10
+    assert limiter.can_make_request(1)[0]
+    assert not limiter.can_make_request(1)[0]
+    assert limiter.can_make_request(2)[0]
+
+
+def test_guild_limit_does_not_block_user(clock):
+    limiter = RateLimiter()
+    for user_id in range(8):
+        assert limiter.can_make_request(user_id, guild_id=99)[0]
+
+    allowed, message = limiter.can_make_request(100, guild_id=99)
+    assert not allowed and "servidor" in message
+    assert 100 not in limiter.blocked_users
+    assert limiter.can_make_request(100, guild_id=5)[0]
+
+
+def test_evict_idle_drops_refilled_keys(clock):
+    limiter = RateLimiter()
+    limiter.can_make_request(1, guild_id=99)
+    clock.now += 5
+    limiter.can_make_request(2)
+
+    clock.now += 6
+    assert limiter.evict_idle() == 2
+    assert set(limiter.user_tat) == {2}
+    assert limiter.guild_tat == {}
+
+
+@pytest.mark.parametrize("block_seconds, text", [(30, "30 segundos"), (90, "90 segundos"), (300, "5 minutos")])
+def test_block_message_duration(clock, monkeypatch, block_seconds, text):
+    monkeypatch.setitem(RATE_LIMIT_CONFIG, "block_seconds", block_seconds)
+    limiter = RateLimiter()
+    for _ in range(6):
+        limiter.can_make_request(1)
+
+    allowed, message = limiter.can_make_request(1)
+    assert not allowed and f"Bloqueado por {text}." in message
@@ -0,0 +1,47 @@
+import pytest
+
+from scheduler import CycleCheckpoint, FairShareScheduler
+
+
+@pytest.fixture
+def scheduler(tmp_path):
+    return FairShareScheduler(CycleCheckpoint("badges", str(tmp_path / "monitor_checkpoint.json")))
+
+
+def test_round_robin_and_shared_users(scheduler):
+    plan = list(scheduler.plan({"A": ["3", "1", "2"], "B": ["4", "3"]}, {}, {}))
+
+    assert plan == [("1", "A"), ("3", "B"), ("2", "A"), ("4", "B")]
+    # Usuário compartilhado já atendido por B só avança o cursor de A
+    assert scheduler.checkpoint.guild_cursors()["A"] == "3"
+    assert scheduler.stats["last_served"] == {"A": 2, "B": 2}
+
+
+def test_weights_share_the_cycle(scheduler):
+    guild_users = {"A": [str(user_id) for user_id in range(1, 100)], "B": [str(user_id) for user_id in range(100, 200)]}
+    plan = list(scheduler.plan(guild_users, {"A": 2.0}, {}))[:30]
+
+    served_a = sum(1 for _, guild_id in plan if guild_id == "A")
+    assert served_a == 20
+
+
+def test_cap_limits_users_per_cycle(scheduler):
+    plan = list(scheduler.plan({"A": ["1", "2", "3"], "B": ["4"]}, {}, {"A": 2}))
+
+    assert [user_id for user_id, guild_id in plan if guild_id == "A"] == ["1", "2"]
+    assert ("4", "B") in plan
+
+
+def test_resumes_after_cursor(scheduler):
+    scheduler.mark_done("A", "2")
+    plan = list(scheduler.plan({"A": ["1", "2", "3"]}, {}, {}))
+
+    assert [user_id for user_id, _ in plan] == ["3", "1", "2"]
+
+
+def test_checkpoint_persists_cursors(scheduler, tmp_path):
+    scheduler.mark_done("A", "2")
+    scheduler.checkpoint.persist(scheduler.checkpoint.snapshot_state())
+
+    reloaded = CycleCheckpoint("badges", str(tmp_path / "monitor_checkpoint.json"))
+    assert reloaded.guild_cursors() == {"A": "2"}
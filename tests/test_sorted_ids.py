@@ -0,0 +1,35 @@
+from array import array
+
+from sorted_ids import TYPECODE, contains, diff_sorted, to_sorted_array, union_sorted
+
+
+def ids(*values):
+    return array(TYPECODE, values)
+
+
+def test_to_sorted_array_sorts_and_dedups():
+    assert to_sorted_array([5, 1, 3, 1, 5]) == ids(1, 3, 5)
+
+
+def test_contains():
+    sorted_ids = ids(2, 4, 8)
+    assert contains(sorted_ids, 4)
+    assert not contains(sorted_ids, 5)
+    assert not contains(sorted_ids, 9)
+    assert not contains(ids(), 1)
+
+
+def test_diff_sorted():
+    added, removed = diff_sorted(ids(1, 2, 4, 7), ids(2, 3, 4, 9, 10))
+    assert added == ids(3, 9, 10)
+    assert removed == ids(1, 7)
+
+
+def test_diff_sorted_empty_sides():
+    assert diff_sorted(ids(), ids(1, 2)) == (ids(1, 2), ids())
+    assert diff_sorted(ids(1, 2), ids()) == (ids(), ids(1, 2))
+    assert diff_sorted(ids(1, 2), ids(1, 2)) == (ids(), ids())
+
+
+def test_union_sorted():
+    assert union_sorted([ids(1, 5), ids(2, 5), ids()]) == ids(1, 2, 5)
@@ -0,0 +1,75 @@
+from array import array
+
+import pytest
+
+from sorted_ids import TYPECODE
+from state_snapshot import HEADER, SnapshotBadgeMap, StateSnapshot, open_snapshot, write_snapshot
+
+
+def ids(*values):
+    return array(TYPECODE, values)
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    path = str(tmp_path / "state_snapshot.bin")
+    write_snapshot(path, 7, ids(3, 10, 42), ids(2, 0, 3), ids(100, 101, 200, 201, 202), ids(3, 99), ids(2, 0))
+    return path
+
+
+def test_round_trip(snapshot_path):
+    snapshot = StateSnapshot(snapshot_path)
+    try:
+        assert snapshot.state_version == 7
+        assert (snapshot.user_count, snapshot.presence_count, snapshot.badge_count) == (3, 2, 5)
+        assert snapshot.user_ids() == ids(3, 10, 42)
+        assert snapshot.badges("3") == ids(100, 101)
+        assert snapshot.badges("10") == ids()
+        assert snapshot.badges("42") == ids(200, 201, 202)
+        assert snapshot.badges("5") is None
+        assert snapshot.contains("42") and not snapshot.contains("43")
+        assert snapshot.presence() == {"3": 2, "99": 0}
+    finally:
+        snapshot.close()
+
+
+def test_truncated_snapshot_is_rejected(snapshot_path):
+    with open(snapshot_path, 'r+b') as f:
+        f.truncate(HEADER.size + 8)
+
+    with pytest.raises(ValueError):
+        StateSnapshot(snapshot_path)
+    assert open_snapshot(snapshot_path, 7) is None
+
+
+def test_bad_magic_is_rejected(snapshot_path):
+    with open(snapshot_path, 'r+b') as f:
+        f.write(b'XXXX')
+
+    with pytest.raises(ValueError):
+        StateSnapshot(snapshot_path)
+
+
+def test_stale_version_is_ignored(snapshot_path):
+    assert open_snapshot(snapshot_path, 8) is None
+    snapshot = open_snapshot(snapshot_path, 7)
+    assert snapshot is not None
+    snapshot.close()
+
+
+def test_badge_map_faults_in_and_tracks_removals(snapshot_path):
+    snapshot = StateSnapshot(snapshot_path)
+    try:
+        badges = SnapshotBadgeMap(snapshot)
+        assert len(badges) == 0
+        assert "42" in badges
+        assert badges["42"] == ids(200, 201, 202)
+        assert len(badges) == 1
+
+        badges.removed.add("3")
+        assert "3" not in badges
+        assert badges.get("3") is None
+        with pytest.raises(KeyError):
+            badges["3"]
+    finally:
+        snapshot.close()
@@ -0,0 +1,31 @@
+import os
+from array import array
+
+from sorted_ids import TYPECODE
+from state_store import ResidentState, StateStore
+
+
+def test_store_does_not_touch_disk_until_opened(tmp_path):
+    db_path = str(tmp_path / "state.db")
+    store = StateStore(db_path)
+    assert not os.path.exists(db_path)
+
+    store.open()
+    assert os.path.exists(db_path)
+    store.close()
+
+
+
+def test_record_badges_detects_changes(tmp_path):
+    store = StateStore(str(tmp_path / "state.db"))
+    store.open()
+    state = ResidentState(store, snapshot_path=str(tmp_path / "snapshot.bin"))
+
+    assert state.record_badges("1", [3, 1, 2]) == (array(TYPECODE, [1, 2, 3]), array(TYPECODE, []))
+    assert state.record_badges("1", [2, 3, 1]) == (array(TYPECODE, []), array(TYPECODE, []))
+    assert state.dirty_count() == 1
+
+    assert state.record_badges("1", [1, 2, 2]) == (array(TYPECODE, []), array(TYPECODE, []))
+    assert state.record_badges("1", [1, 4]) == (array(TYPECODE, [4]), array(TYPECODE, [2, 3]))
+    assert list(state.known_badges["1"]) == [1, 4]
+    store.close()
@@ -0,0 +1,172 @@
+"""
+Tracing leve dos ciclos de monitoramento
+Spans aninhados por fase e por chamada externa; traces lentos ficam em um buffer circular em memória
+"""
+
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from config import TRACING_CONFIG
+
+# Span ativo no contexto atual (propagado para asyncio.to_thread via contextvars)
+current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Span:
+    """Trecho cronometrado de um trace"""
+
+    __slots__ = ("name", "attrs", "started", "duration", "children", "root")
+
+    def __init__(self, name: str, attrs: Dict[str, Any], root: Optional["Trace"]):
+        self.name = name
+        self.attrs = attrs
+        self.started = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.children: List["Span"] = []
+        self.root = root
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        entry = {
+            "name": self.name,
+            "start_ms": round((self.started - origin) * 1000, 2),
+            "duration_ms": round((self.duration or 0) * 1000, 2)
+        }
+        if self.attrs:
+            entry["attrs"] = self.attrs
+        if self.children:
+            entry["children"] = [child.to_dict(origin) for child in self.children]
+        return entry
+
+
+class Trace(Span):
+    """Span raiz de um ciclo; também soma o tempo por nome de span (inclusive dos spans não guardados)"""
+
+    __slots__ = ("started_at", "span_count", "dropped_spans", "totals", "token", "_lock")
+
+    def __init__(self, name: str, attrs: Dict[str, Any]):
+        super().__init__(name, attrs, None)
+        self.root = self
+        self.started_at = datetime.now()
+        self.span_count = 0
+        self.dropped_spans = 0
+        self.totals: Dict[str, List[float]] = {}  # {nome: [quantidade, segundos]}
+        self.token = None
+        self._lock = threading.Lock()
+
+    def add_child(self, parent: Span, child: Span) -> bool:
+        """Anexa o span à árvore, respeitando o limite de spans por trace"""
+        with self._lock:
+            if self.span_count >= TRACING_CONFIG["max_spans_per_trace"]:
+                self.dropped_spans += 1
+                return False
+            self.span_count += 1
+            parent.children.append(child)
+            return True
+
+    def add_total(self, name: str, duration: float):
+        with self._lock:
+            total = self.totals.setdefault(name, [0, 0.0])
+            total[0] += 1
+            total[1] += duration
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Tempo acumulado por nome de span, do maior para o menor"""
+        with self._lock:
+            totals = sorted(self.totals.items(), key=lambda item: item[1][1], reverse=True)
+        return [
+            {"name": name, "count": count, "total_ms": round(seconds * 1000, 2)}
+            for name, (count, seconds) in totals
+        ]
+
+    def to_dict(self, origin: Optional[float] = None) -> Dict[str, Any]:
+        entry = super().to_dict(self.started if origin is None else origin)
+        entry.update({
+            "started_at": self.started_at.isoformat(),
+            "spans": self.span_count,
+            "dropped_spans": self.dropped_spans,
+            "summary": self.summary()
+        })
+        return entry
+
+
+class Tracer:
+    """Cria traces e spans e guarda os traces lentos mais recentes"""
+
+    def __init__(self):
+        self.slow_traces = deque(maxlen=TRACING_CONFIG["buffer_size"])
+        self.last_traces: Dict[str, Trace] = {}  # Último trace de cada nome, lento ou não
+        self.stats = {"traces": 0, "slow_traces": 0}
+
+    def start_trace(self, name: str, **attrs) -> Optional[Trace]:
+        """Abre o trace de um ciclo; spans abertos depois na mesma task (inclusive em to_thread) ficam aninhados"""
+        if not TRACING_CONFIG["enabled"]:
+            return None
+        root = Trace(name, attrs)
+        root.token = current_span.set(root)
+        return root
+
+    def finish_trace(self, root: Optional[Trace]):
+        """Fecha o trace (na mesma task que o abriu) e o guarda no buffer se o ciclo foi lento"""
+        if root is None or root.duration is not None:
+            return
+        current_span.reset(root.token)
+        root.duration = time.perf_counter() - root.started
+        self.stats["traces"] += 1
+        self.last_traces[root.name] = root
+        if root.duration >= TRACING_CONFIG["slow_trace_seconds"].get(root.name, TRACING_CONFIG["default_slow_trace_seconds"]):
+            self.slow_traces.append(root)
+            self.stats["slow_traces"] += 1
+
+    @contextmanager
+    def trace(self, name: str, **attrs) -> Iterator[Optional[Trace]]:
+        """Versão em bloco de start_trace/finish_trace"""
+        root = self.start_trace(name, **attrs)
+        try:
+            yield root
+        finally:
+            self.finish_trace(root)
+
+    @contextmanager
+    def span(self, name: str, **attrs) -> Iterator[Optional[Span]]:
+        """Cronometra um trecho dentro do trace atual (sem trace ativo, não faz nada)"""
+        parent = current_span.get()
+        if parent is None:
+            yield None
+            return
+
+        root = parent.root
+        span = Span(name, attrs, root)
+        attached = root.add_child(parent, span)
+        token = current_span.set(span if attached else parent)
+        try:
+            yield span
+        finally:
+            current_span.reset(token)
+            span.duration = time.perf_counter() - span.started
+            root.add_total(name, span.duration)
+
+    def dump(self, limit: Optional[int] = None, include_last: bool = True) -> Dict[str, Any]:
+        """Traces lentos guardados (mais recente primeiro) e o último trace de cada ciclo"""
+        slow = list(self.slow_traces)[::-1][:limit]
+        result = {"stats": dict(self.stats), "slow_traces": [trace.to_dict() for trace in slow]}
+        if include_last:
+            result["last_traces"] = {name: trace.to_dict() for name, trace in list(self.last_traces.items())}
+        return result
+
+    def format_summary(self, trace: Trace, top: int = 8) -> str:
+        """Resumo legível de um trace: duração total e fases que mais consumiram tempo"""
+        lines = [f"⏱️ **{trace.name}** em {trace.started_at.strftime('%d/%m %H:%M:%S')}: {trace.duration:.1f}s"]
+        for entry in trace.summary()[:top]:
+            lines.append(f"• `{entry['name']}` ×{entry['count']}: {entry['total_ms'] / 1000:.2f}s")
+        if trace.dropped_spans:
+            lines.append(f"⚠️ {trace.dropped_spans} span(s) além do limite só entraram no resumo")
+        return "\n".join(lines)
+
+
+tracer = Tracer()
+span = tracer.span
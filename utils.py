@@ -8,9 +8,18 @@ import os
 import time
 import logging
 import shutil
+import sqlite3
+import threading
+import hashlib
+import gzip
+import bz2
+import lzma
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, Any, Optional, List, Union, Tuple
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+import queue
+import atexit
 import asyncio
 import traceback
 from typing import TYPE_CHECKING
@@ -18,75 +27,144 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     import discord
 
-from config import LOGGING_CONFIG, BACKUP_CONFIG, RATE_LIMIT_CONFIG, BOT_OWNER_ID
+from config import LOGGING_CONFIG, BACKUP_CONFIG, RATE_LIMIT_CONFIG, BOT_OWNER_ID, STATE_DB_FILE
+
+# Compressão dos blobs de backup: {codec: extensão do arquivo}
+BACKUP_CODECS = {"gzip": "gz", "bz2": "bz2", "lzma": "xz"}
+BACKUP_OPENERS = {"gz": gzip.open, "bz2": bz2.open, "xz": lzma.open}
+BACKUP_CHUNK_SIZE = 1024 * 1024
 
 # ====== SISTEMA DE LOGGING ======
 
+class LazyQueueHandler(QueueHandler):
+    """Enfileira o registro sem formatar: mensagem, dados extras e JSON só são montados pela thread do listener"""
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """Uma linha JSON por registro (arquivo de log)"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        for field in ("error", "traceback", "data"):
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Formato legível para o console, no mesmo estilo de antes"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        message = super().format(record)
+        if getattr(record, "error", None) is not None:
+            message += f" | Erro: {record.error}"
+        if getattr(record, "traceback", None) is not None:
+            message += f" | Traceback: {record.traceback}"
+        if getattr(record, "data", None) is not None:
+            message += f" | Dados: {json.dumps(record.data, default=str)}"
+        return message
+
+
 class RobustLogger:
-    """Sistema de logging robusto com rotação e múltiplos destinos"""
+    """
+    Sistema de logging robusto com rotação e múltiplos destinos
+    O event loop só enfileira o registro; arquivo (JSON) e console são escritos por uma thread de listener
+    """
+    
+    listener: Optional[QueueListener] = None
     
-    def __init__(self, name: str = "RobloxBot"):
+    def __init__(self, name: str = "RobloxBot", level: Optional[str] = None):
         self.logger = logging.getLogger(name)
-        self.logger.setLevel(getattr(logging, LOGGING_CONFIG["log_level"]))
+        self.logger.setLevel(getattr(logging, level or LOGGING_CONFIG["log_level"]))
         
-        # Evitar duplicar handlers
-        if not self.logger.handlers:
+        # Evitar duplicar handlers (subsistemas propagam para o logger principal)
+        if "." not in name and not self.logger.handlers:
             self._setup_handlers()
     
     def _setup_handlers(self):
-        """Configura handlers de logging"""
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
-        
+        """Configura a fila de logging e o listener com os handlers de arquivo e console"""
         # Handler para arquivo com rotação
         file_handler = RotatingFileHandler(
             LOGGING_CONFIG["log_file"],
             maxBytes=LOGGING_CONFIG["max_log_size"],
             backupCount=LOGGING_CONFIG["backup_count"]
         )
-        file_handler.setFormatter(formatter)
-        self.logger.addHandler(file_handler)
+        file_handler.setFormatter(
+            JsonFormatter() if LOGGING_CONFIG["file_format"] == "json"
+            else TextFormatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        )
         
         # Handler para console
         console_handler = logging.StreamHandler()
-        console_handler.setFormatter(formatter)
-        self.logger.addHandler(console_handler)
+        console_handler.setFormatter(TextFormatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+        
+        log_queue = queue.SimpleQueue()
+        self.logger.addHandler(LazyQueueHandler(log_queue))
+        RobustLogger.listener = QueueListener(log_queue, file_handler, console_handler)
+        RobustLogger.listener.start()
+        atexit.register(self.shutdown)
+    
+    @classmethod
+    def shutdown(cls):
+        """Escreve o que ainda está na fila e para o listener"""
+        if cls.listener is not None:
+            cls.listener.stop()
+            cls.listener = None
+    
+    def _log(self, level: int, message: str, args: tuple = (), extra_data: Optional[Dict] = None,
+             error: Optional[BaseException] = None, with_traceback: bool = False):
+        """Só cria o registro se o nível estiver habilitado; a serialização fica para o listener"""
+        if not self.logger.isEnabledFor(level):
+            return
+        extra = {}
+        if extra_data:
+            extra["data"] = dict(extra_data)  # Cópia rasa: o chamador pode alterar o dicionário depois
+        if error:
+            extra["error"] = str(error)
+        if with_traceback:
+            extra["traceback"] = traceback.format_exc()
+        self.logger.log(level, message, *args, extra=extra)
+    
+    def isEnabledFor(self, level: int) -> bool:
+        return self.logger.isEnabledFor(level)
+    
+    def debug(self, message: str, *args, extra_data: Optional[Dict] = None):
+        """Log de depuração (args formatados com % apenas se o nível estiver habilitado)"""
+        self._log(logging.DEBUG, message, args, extra_data)
     
     def info(self, message: str, extra_data: Optional[Dict] = None):
         """Log de informação com dados extras opcionais"""
-        if extra_data:
-            message += f" | Dados: {json.dumps(extra_data, default=str)}"
-        self.logger.info(message)
+        self._log(logging.INFO, message, extra_data=extra_data)
     
     def warning(self, message: str, extra_data: Optional[Dict] = None):
         """Log de aviso"""
-        if extra_data:
-            message += f" | Dados: {json.dumps(extra_data, default=str)}"
-        self.logger.warning(message)
+        self._log(logging.WARNING, message, extra_data=extra_data)
     
     def error(self, message: str, error: Optional[BaseException] = None, extra_data: Optional[Dict] = None):
         """Log de erro com traceback"""
-        if error:
-            message += f" | Erro: {str(error)}"
-            if LOGGING_CONFIG["log_level"] == "DEBUG":
-                message += f" | Traceback: {traceback.format_exc()}"
-        if extra_data:
-            message += f" | Dados: {json.dumps(extra_data, default=str)}"
-        self.logger.error(message)
+        self._log(logging.ERROR, message, extra_data=extra_data, error=error,
+                  with_traceback=bool(error) and self.logger.isEnabledFor(logging.DEBUG))
     
     def critical(self, message: str, error: Optional[BaseException] = None, extra_data: Optional[Dict] = None):
         """Log crítico - também pode enviar para Discord"""
-        if error:
-            message += f" | Erro Crítico: {str(error)}"
-            message += f" | Traceback: {traceback.format_exc()}"
-        if extra_data:
-            message += f" | Dados: {json.dumps(extra_data, default=str)}"
-        self.logger.critical(message)
+        self._log(logging.CRITICAL, message, extra_data=extra_data, error=error, with_traceback=bool(error))
 
 # Instância global do logger
 logger = RobustLogger()
 
+def get_logger(subsystem: str) -> RobustLogger:
+    """Logger de um subsistema (RobloxBot.<subsistema>) com nível próprio definido em LOGGING_CONFIG"""
+    return RobustLogger(f"RobloxBot.{subsystem}", LOGGING_CONFIG["subsystem_levels"].get(subsystem))
+
 # ====== SISTEMA DE VALIDAÇÃO ======
 
 class InputValidator:
@@ -146,67 +224,220 @@ class InputValidator:
 # ====== SISTEMA DE BACKUP ======
 
 class BackupManager:
-    """Gerenciador robusto de backups"""
+    """
+    Gerenciador robusto de backups
+    Cada backup é um manifesto que aponta para blobs comprimidos endereçados pelo SHA-256 do conteúdo,
+    então arquivos que não mudaram entre backups são gravados uma única vez
+    """
     
-    def __init__(self, backup_dir: str = "backups"):
+    def __init__(self, backup_dir: str = BACKUP_CONFIG["backup_dir"]):
         self.backup_dir = backup_dir
+        self.objects_dir = os.path.join(backup_dir, "objects")
+        self.manifests_dir = os.path.join(backup_dir, "manifests")
+        self.codec = BACKUP_CODECS[BACKUP_CONFIG["compression"]]
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="BackupManager")
         self.ensure_backup_dir()
     
     def ensure_backup_dir(self):
         """Garante que o diretório de backup existe"""
         if not os.path.exists(self.backup_dir):
-            os.makedirs(self.backup_dir)
             logger.info(f"Diretório de backup criado: {self.backup_dir}")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.manifests_dir, exist_ok=True)
     
     def create_backup(self, files_to_backup: List[str], reason: str = "manual") -> bool:
-        """Cria backup dos arquivos especificados"""
+        """Cria backup dos arquivos especificados (bloqueante; no event loop use create_backup_async)"""
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_name = f"backup_{reason}_{timestamp}"
-            backup_path = os.path.join(self.backup_dir, backup_name)
-            
-            os.makedirs(backup_path, exist_ok=True)
-            
-            backed_up_files = []
-            for file_path in files_to_backup:
-                if os.path.exists(file_path):
-                    backup_file_path = os.path.join(backup_path, os.path.basename(file_path))
-                    shutil.copy2(file_path, backup_file_path)
-                    backed_up_files.append(file_path)
-            
-            if backed_up_files:
-                logger.info(f"Backup criado: {backup_name}", {
-                    "files": backed_up_files,
-                    "reason": reason,
-                    "path": backup_path
-                })
-                self._cleanup_old_backups()
-                return True
-            else:
-                logger.warning(f"Nenhum arquivo encontrado para backup: {files_to_backup}")
-                return False
-                
+            with self._lock:
+                return self._create_backup(files_to_backup, reason)
         except Exception as e:
             logger.error(f"Erro ao criar backup: {reason}", e)
             return False
     
+    async def create_backup_async(self, files_to_backup: List[str], reason: str = "manual") -> bool:
+        """Cria o backup na thread de backup, sem bloquear o event loop"""
+        return await asyncio.wrap_future(self._executor.submit(self.create_backup, files_to_backup, reason))
+    
+    def _create_backup(self, files_to_backup: List[str], reason: str) -> bool:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        backup_name = f"backup_{reason}_{timestamp}"
+        
+        entries = {}
+        new_bytes = 0
+        for file_path in files_to_backup:
+            if not os.path.exists(file_path):
+                continue
+            
+            if file_path.endswith(".db"):
+                # Cópia consistente para um arquivo temporário; o blob é gerado a partir dela
+                temp_path = os.path.join(self.backup_dir, f".{os.path.basename(file_path)}.tmp")
+                try:
+                    self._backup_sqlite(file_path, temp_path)
+                    entry, stored = self._store_blob(temp_path)
+                finally:
+                    if os.path.exists(temp_path):
+                        os.remove(temp_path)
+            else:
+                entry, stored = self._store_blob(file_path)
+            
+            entries[os.path.basename(file_path)] = entry
+            new_bytes += stored
+        
+        if not entries:
+            logger.warning(f"Nenhum arquivo encontrado para backup: {files_to_backup}")
+            return False
+        
+        manifest = {
+            "name": backup_name,
+            "reason": reason,
+            "created_at": datetime.now().isoformat(),
+            "files": entries
+        }
+        manifest_path = os.path.join(self.manifests_dir, f"{backup_name}.json")
+        temp_path = f"{manifest_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(temp_path, manifest_path)
+        
+        logger.info(f"Backup criado: {backup_name}", {
+            "files": list(entries),
+            "reason": reason,
+            "new_bytes": new_bytes,
+            "deduplicated": sum(1 for entry in entries.values() if entry["reused"])
+        })
+        self._cleanup_old_backups()
+        return True
+    
+    def _backup_sqlite(self, db_path: str, backup_file_path: str):
+        """Copia consistente de um banco SQLite em uso (inclui o conteúdo do WAL)"""
+        source = sqlite3.connect(db_path)
+        target = sqlite3.connect(backup_file_path)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+    
+    def _blob_path(self, digest: str, extension: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], f"{digest}.{extension}")
+    
+    def _store_blob(self, file_path: str) -> Tuple[Dict[str, Any], int]:
+        """
+        Grava o conteúdo do arquivo como blob comprimido, se ainda não existir
+        Returns: (entrada do manifesto, bytes novos gravados)
+        """
+        sha256 = hashlib.sha256()
+        size = 0
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(BACKUP_CHUNK_SIZE), b''):
+                sha256.update(chunk)
+                size += len(chunk)
+        digest = sha256.hexdigest()
+        
+        # Um blob já gravado com qualquer codec serve
+        for extension in BACKUP_CODECS.values():
+            blob_path = self._blob_path(digest, extension)
+            if os.path.exists(blob_path):
+                return {"sha256": digest, "size": size, "blob": os.path.relpath(blob_path, self.backup_dir), "reused": True}, 0
+        
+        blob_path = self._blob_path(digest, self.codec)
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        temp_path = f"{blob_path}.tmp"
+        with open(file_path, 'rb') as source, BACKUP_OPENERS[self.codec](temp_path, 'wb') as target:
+            shutil.copyfileobj(source, target, BACKUP_CHUNK_SIZE)
+        os.replace(temp_path, blob_path)
+        
+        entry = {"sha256": digest, "size": size, "blob": os.path.relpath(blob_path, self.backup_dir), "reused": False}
+        return entry, os.path.getsize(blob_path)
+    
+    def list_backups(self) -> List[Dict[str, Any]]:
+        """Manifestos dos backups retidos, do mais recente para o mais antigo"""
+        manifests = []
+        for name in os.listdir(self.manifests_dir):
+            if name.endswith(".json"):
+                manifest = safe_json_load(os.path.join(self.manifests_dir, name), {})
+                if manifest.get("files"):
+                    manifests.append(manifest)
+        manifests.sort(key=lambda manifest: manifest["created_at"], reverse=True)
+        return manifests
+    
+    def restore_backup(self, backup_name: str, target_dir: str) -> List[str]:
+        """
+        Reconstrói os arquivos de um backup em target_dir (com o bot parado), conferindo o SHA-256
+        Returns: caminhos restaurados
+        """
+        manifest_path = os.path.join(self.manifests_dir, f"{backup_name}.json")
+        if os.path.exists(manifest_path):
+            manifest = safe_json_load(manifest_path, {})
+        else:
+            # Backups antigos eram cópias completas em um diretório
+            legacy_path = os.path.join(self.backup_dir, backup_name)
+            if not os.path.isdir(legacy_path):
+                raise FileNotFoundError(f"Backup não encontrado: {backup_name}")
+            os.makedirs(target_dir, exist_ok=True)
+            restored = []
+            for name in os.listdir(legacy_path):
+                shutil.copy2(os.path.join(legacy_path, name), os.path.join(target_dir, name))
+                restored.append(os.path.join(target_dir, name))
+            return restored
+        
+        os.makedirs(target_dir, exist_ok=True)
+        restored = []
+        for name, entry in manifest["files"].items():
+            blob_path = os.path.join(self.backup_dir, entry["blob"])
+            extension = blob_path.rsplit(".", 1)[1]
+            target_path = os.path.join(target_dir, name)
+            temp_path = f"{target_path}.restoring"
+            
+            sha256 = hashlib.sha256()
+            with BACKUP_OPENERS[extension](blob_path, 'rb') as source, open(temp_path, 'wb') as target:
+                for chunk in iter(lambda: source.read(BACKUP_CHUNK_SIZE), b''):
+                    sha256.update(chunk)
+                    target.write(chunk)
+            
+            if sha256.hexdigest() != entry["sha256"]:
+                os.remove(temp_path)
+                raise ValueError(f"Blob corrompido para {name} no backup {backup_name}")
+            os.replace(temp_path, target_path)
+            restored.append(target_path)
+        
+        logger.info(f"Backup restaurado: {backup_name}", {"target_dir": target_dir, "files": restored})
+        return restored
+    
     def _cleanup_old_backups(self):
-        """Remove backups antigos mantendo apenas os mais recentes"""
+        """Remove backups antigos mantendo apenas os mais recentes e apaga blobs sem referência"""
         try:
             backups = []
-            for item in os.listdir(self.backup_dir):
-                backup_path = os.path.join(self.backup_dir, item)
-                if os.path.isdir(backup_path):
-                    stat = os.stat(backup_path)
-                    backups.append((backup_path, stat.st_mtime))
+            for name in os.listdir(self.manifests_dir):
+                if name.endswith(".json"):
+                    path = os.path.join(self.manifests_dir, name)
+                    backups.append((path, os.stat(path).st_mtime))
+            # Diretórios de backups completos do formato antigo entram na mesma retenção
+            for name in os.listdir(self.backup_dir):
+                path = os.path.join(self.backup_dir, name)
+                if name.startswith("backup_") and os.path.isdir(path):
+                    backups.append((path, os.stat(path).st_mtime))
             
             backups.sort(key=lambda x: x[1], reverse=True)
             
             max_backups = BACKUP_CONFIG["max_backup_files"]
-            if len(backups) > max_backups:
-                for backup_path, _ in backups[max_backups:]:
+            for backup_path, _ in backups[max_backups:]:
+                if os.path.isdir(backup_path):
                     shutil.rmtree(backup_path)
-                    logger.info(f"Backup antigo removido: {backup_path}")
+                else:
+                    os.remove(backup_path)
+                logger.info(f"Backup antigo removido: {backup_path}")
+            
+            referenced = {
+                os.path.normpath(os.path.join(self.backup_dir, entry["blob"]))
+                for manifest in self.list_backups() for entry in manifest["files"].values()
+            }
+            for root, _, names in os.walk(self.objects_dir):
+                for name in names:
+                    path = os.path.normpath(os.path.join(root, name))
+                    if path not in referenced:
+                        os.remove(path)
                     
         except Exception as e:
             logger.error("Erro ao limpar backups antigos", e)
@@ -214,55 +445,112 @@ class BackupManager:
 # ====== SISTEMA DE RATE LIMITING ======
 
 class RateLimiter:
-    """Limitador de taxa para proteger contra abuso"""
+    """
+    Limitador de taxa para proteger contra abuso (GCRA)
+    Cada usuário ou servidor guarda só o horário teórico da próxima chegada (TAT): a verificação é O(1)
+    e chaves sem atividade são removidas periodicamente
+    """
     
     def __init__(self):
-        self.requests = {}  # {user_id: [(timestamp, count), ...]}
+        self.user_tat = {}  # {user_id: horário teórico de chegada}
+        self.guild_tat = {}  # {guild_id: horário teórico de chegada}
         self.blocked_users = {}  # {user_id: unblock_timestamp}
+        self.last_eviction = time.time()
+        self.stats = {"allowed": 0, "denied": 0, "blocked": 0, "evicted": 0}
+    
+    @staticmethod
+    def _next_tat(tat_table: Dict[int, float], key: int, now: float, per_minute: int) -> Tuple[float, float]:
+        """
+        Calcula o novo TAT para uma chegada agora
+        Returns: (novo TAT, segundos até poder tentar de novo; 0 se permitido)
+        """
+        interval = 60 / per_minute
+        burst_tolerance = 60 - interval  # Permite até per_minute requisições seguidas
+        tat = max(tat_table.get(key, now), now)
+        retry_after = tat - burst_tolerance - now
+        return tat + interval, max(retry_after, 0.0)
     
-    def can_make_request(self, user_id: int) -> Tuple[bool, Optional[str]]:
-        """Verifica se o usuário pode fazer uma requisição"""
+    def can_make_request(self, user_id: int, guild_id: Optional[int] = None) -> Tuple[bool, Optional[str]]:
+        """Verifica se o usuário (e o servidor, se informado) pode fazer uma requisição"""
         current_time = time.time()
+        if current_time - self.last_eviction >= RATE_LIMIT_CONFIG["eviction_interval_seconds"]:
+            self.evict_idle(current_time)
         
         # Verificar se o usuário está bloqueado
         if user_id in self.blocked_users:
             unblock_time = self.blocked_users[user_id]
             if current_time < unblock_time:
                 remaining = int(unblock_time - current_time)
+                self.stats["denied"] += 1
                 return False, f"Você está temporariamente bloqueado. Tente novamente em {remaining} segundos."
             else:
                 del self.blocked_users[user_id]
         
-        # Limpar requisições antigas (mais de 1 minuto)
-        if user_id in self.requests:
-            self.requests[user_id] = [
-                req for req in self.requests[user_id]
-                if current_time - req[0] < 60
-            ]
-        
-        # Contar requisições no último minuto
-        user_requests = self.requests.get(user_id, [])
-        total_requests = sum(req[1] for req in user_requests)
-        
         max_requests = RATE_LIMIT_CONFIG["max_requests_per_minute"]
+        user_tat, retry_after = self._next_tat(self.user_tat, user_id, current_time, max_requests)
+        if retry_after > 0:
+            # Bloquear usuário
+            block_seconds = RATE_LIMIT_CONFIG["block_seconds"]
+            self.blocked_users[user_id] = current_time + block_seconds
+            self.stats["denied"] += 1
+            self.stats["blocked"] += 1
+            block_text = f"{block_seconds // 60} minutos" if block_seconds >= 60 and block_seconds % 60 == 0 else f"{block_seconds} segundos"
+            return False, f"Muitas requisições! Limite: {max_requests}/min. Bloqueado por {block_text}."
         
-        if total_requests >= max_requests:
-            # Bloquear usuário por 5 minutos
-            self.blocked_users[user_id] = current_time + 300
-            return False, f"Muitas requisições! Limite: {max_requests}/min. Bloqueado por 5 minutos."
+        if guild_id is not None:
+            max_guild_requests = RATE_LIMIT_CONFIG["max_requests_per_minute_per_guild"]
+            guild_tat, retry_after = self._next_tat(self.guild_tat, guild_id, current_time, max_guild_requests)
+            if retry_after > 0:
+                # Limite do servidor não bloqueia o usuário nem consome a cota dele
+                self.stats["denied"] += 1
+                return False, (
+                    f"Este servidor atingiu o limite de {max_guild_requests} comandos/min. "
+                    f"Tente novamente em {int(retry_after) + 1} segundos."
+                )
+            self.guild_tat[guild_id] = guild_tat
         
         # Registrar nova requisição
-        if user_id not in self.requests:
-            self.requests[user_id] = []
-        self.requests[user_id].append((current_time, 1))
-        
+        self.user_tat[user_id] = user_tat
+        self.stats["allowed"] += 1
         return True, None
     
+    def evict_idle(self, current_time: Optional[float] = None) -> int:
+        """Remove chaves cuja cota já se recompôs totalmente (equivalem a chaves novas) e bloqueios vencidos"""
+        current_time = current_time or time.time()
+        evicted = 0
+        for tat_table in (self.user_tat, self.guild_tat):
+            idle_keys = [key for key, tat in tat_table.items() if tat <= current_time]
+            for key in idle_keys:
+                del tat_table[key]
+            evicted += len(idle_keys)
+        
+        expired = [user_id for user_id, unblock_time in self.blocked_users.items() if unblock_time <= current_time]
+        for user_id in expired:
+            del self.blocked_users[user_id]
+        
+        self.last_eviction = current_time
+        self.stats["evicted"] += evicted
+        return evicted
+    
     def clear_user_limits(self, user_id: int):
         """Limpa limites de um usuário (para owners/admins)"""
-        self.requests.pop(user_id, None)
+        self.user_tat.pop(user_id, None)
         self.blocked_users.pop(user_id, None)
         logger.info(f"Limites de rate limiting removidos para usuário {user_id}")
+    
+    def reset(self):
+        """Limpa os limites de todos os usuários e servidores"""
+        self.user_tat.clear()
+        self.guild_tat.clear()
+        self.blocked_users.clear()
+    
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            **self.stats,
+            "tracked_users": len(self.user_tat),
+            "tracked_guilds": len(self.guild_tat),
+            "blocked_users": len(self.blocked_users)
+        }
 
 # ====== UTILITÁRIOS GERAIS ======
 
@@ -421,7 +709,8 @@ class CriticalNotifier:
         self.error_count = 0
         self.last_notification = 0
         self.cooldown = 300  # 5 minutos entre notificações
-    
+        self.last_alerts = {}  # {alert_key: timestamp} para alertas operacionais
+
     def set_bot(self, bot_instance):
         """Define a instância do bot"""
         self.bot = bot_instance
@@ -431,8 +720,8 @@ class CriticalNotifier:
         # Sempre fazer backup em erro crítico se configurado
         if BACKUP_CONFIG.get("backup_on_critical_error", False):
             try:
-                backup_manager.create_backup([
-                    "guild_data.json", "known_badges.json", "last_presence.json", "bot.log"
+                await backup_manager.create_backup_async([
+                    STATE_DB_FILE, LOGGING_CONFIG["log_file"]
                 ], f"critical_error_{int(time.time())}")
                 logger.info("Backup automático criado devido a erro crítico")
             except Exception as backup_error:
@@ -486,6 +775,37 @@ class CriticalNotifier:
         except Exception as notify_error:
             logger.error("Erro ao enviar notificação crítica", notify_error)
 
+    async def notify_owner(self, title: str, message: str, alert_key: str, fields: Optional[Dict[str, str]] = None):
+        """Envia um alerta operacional (não crítico) por DM ao proprietário, com cooldown por tipo de alerta"""
+        current_time = time.time()
+        if current_time - self.last_alerts.get(alert_key, 0) < self.cooldown:
+            return
+
+        if not self.bot or not BOT_OWNER_ID:
+            return
+
+        try:
+            import discord
+
+            owner = self.bot.get_user(BOT_OWNER_ID)
+            if not owner:
+                return
+
+            embed = discord.Embed(
+                title=title,
+                description=message[:2000],
+                color=0xFF9900,
+                timestamp=datetime.utcnow()
+            )
+            for name, value in (fields or {}).items():
+                embed.add_field(name=name, value=str(value)[:1000], inline=True)
+
+            await owner.send(embed=embed)
+            self.last_alerts[alert_key] = current_time
+
+        except Exception as notify_error:
+            logger.error(f"Erro ao enviar alerta ao proprietário: {alert_key}", notify_error)
+
 # Instâncias globais
 critical_notifier = CriticalNotifier()
 # Instâncias globais dos sistemas
@@ -508,13 +828,11 @@ async def auto_backup_task():
             await asyncio.sleep(interval_seconds)
             
             files_to_backup = [
-                "guild_data.json",
-                "known_badges.json", 
-                "last_presence.json",
-                "bot.log"
+                STATE_DB_FILE,
+                LOGGING_CONFIG["log_file"]
             ]
             
-            success = backup_manager.create_backup(files_to_backup, "auto")
+            success = await backup_manager.create_backup_async(files_to_backup, "auto")
             if success:
                 logger.info("Backup automático realizado com sucesso")
             else:
@@ -522,4 +840,20 @@ async def auto_backup_task():
                 
         except Exception as e:
             logger.error("Erro na task de backup automático", e)
-            await asyncio.sleep(60)  # Esperar 1 minuto antes de tentar novamente
\ No newline at end of file
+            await asyncio.sleep(60)  # Esperar 1 minuto antes de tentar novamente
+
+# ====== RESTAURAÇÃO DE BACKUPS ======
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) == 2 and sys.argv[1] == "list":
+        for manifest in backup_manager.list_backups():
+            total = sum(entry["size"] for entry in manifest["files"].values())
+            print(f"💾 {manifest['name']} - {manifest['created_at']} - {', '.join(manifest['files'])} ({total / 1024:.1f} KB)")
+    elif len(sys.argv) == 4 and sys.argv[1] == "restore":
+        restored_files = backup_manager.restore_backup(sys.argv[2], sys.argv[3])
+        print(f"✅ {len(restored_files)} arquivo(s) restaurado(s) em {sys.argv[3]}")
+    else:
+        print("Uso: python utils.py list | restore <backup> <diretório>")
+        sys.exit(1)